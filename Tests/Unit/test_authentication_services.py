@@ -0,0 +1,75 @@
+import shutil
+
+import pytest
+
+from movie_web_app import create_app
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_users, write_users_file
+from movie_web_app.authentication.services import AuthenticationException, NameNotUniqueException, authenticate_user
+from movie_web_app.authentication.services import add_user as services_add_user
+from movie_web_app.domainmodel.model import PLAINTEXT_PASSWORD_PREFIX, User
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(TEST_DATA_PATH, path)
+    return str(path)
+
+
+def test_plaintext_passwords_are_loaded_without_hashing(in_memory_repo):
+    assert in_memory_repo.get_user('thorke').password == PLAINTEXT_PASSWORD_PREFIX + 'cLQ^C#oFXloS'
+
+
+def test_plaintext_password_is_hashed_on_first_login(in_memory_repo):
+    with pytest.raises(AuthenticationException):
+        authenticate_user('thorke', 'wrong password', in_memory_repo)
+    assert in_memory_repo.get_user('thorke').password.startswith(PLAINTEXT_PASSWORD_PREFIX)
+
+    authenticate_user('thorke', 'cLQ^C#oFXloS', in_memory_repo)
+    assert in_memory_repo.get_user('thorke').password.startswith('pbkdf2')
+    authenticate_user('thorke', 'cLQ^C#oFXloS', in_memory_repo)
+
+
+def test_plaintext_password_with_non_ascii_characters_is_compared(in_memory_repo):
+    in_memory_repo.add_user(User('amélie', PLAINTEXT_PASSWORD_PREFIX + 'crème brûlée'))
+
+    with pytest.raises(AuthenticationException):
+        authenticate_user('amélie', 'crème brulée', in_memory_repo)
+    authenticate_user('amélie', 'crème brûlée', in_memory_repo)
+    assert in_memory_repo.get_user('amélie').password.startswith('pbkdf2')
+
+
+def test_registering_a_username_taken_meanwhile_fails(in_memory_repo, monkeypatch):
+    add_user = in_memory_repo.add_user
+
+    def add_user_after_another(user):
+        add_user(User(user.username, 'pbkdf2:sha256:260000$salt$hash'))
+        add_user(user)
+
+    monkeypatch.setattr(in_memory_repo, 'add_user', add_user_after_another)
+    with pytest.raises(NameNotUniqueException):
+        services_add_user('gmichael', 'careless whisper', in_memory_repo)
+    assert in_memory_repo.get_user('gmichael').password == 'pbkdf2:sha256:260000$salt$hash'
+
+
+def test_users_file_with_hashes_is_loaded_as_it_is(data_path):
+    write_users_file(f'{data_path}/users.csv', workers=1)
+    repo = MemoryRepository()
+    load_users(data_path, repo)
+
+    assert repo.get_user('thorke').password.startswith('pbkdf2')
+    authenticate_user('thorke', 'cLQ^C#oFXloS', repo)
+    with pytest.raises(AuthenticationException):
+        authenticate_user('thorke', 'wrong password', repo)
+
+
+def test_hash_users_command_rewrites_the_users_file(data_path):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path})
+    result = app.test_cli_runner().invoke(args=['hash-users'])
+
+    assert result.exit_code == 0
+    with open(f'{data_path}/users.csv') as infile:
+        assert infile.readline().strip() == 'id,username,password_hash'
+        assert 'cLQ^C#oFXloS' not in infile.read()
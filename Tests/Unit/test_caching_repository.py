@@ -0,0 +1,76 @@
+import pytest
+
+from movie_web_app.adapters.caching_repository import CachingRepository
+from movie_web_app.domainmodel.model import Movie, Genre, make_genre_association, make_review
+
+
+@pytest.fixture
+def cached_repo(repository):
+    return CachingRepository(repository, max_entries=3, ttl=60)
+
+
+def test_cache_returns_results_of_the_wrapped_repository(cached_repo, repository):
+    assert cached_repo.get_movie_by_id(1) == repository.get_movie_by_id(1)
+    assert cached_repo.get_movies_by_genre('Action') == repository.get_movies_by_genre('Action')
+    assert cached_repo.get_movies_by_release_year(2014) == repository.get_movies_by_release_year(2014)
+    assert cached_repo.get_movie_by_id(1000) is None
+    assert cached_repo.search_movie_by_title('the') == repository.search_movie_by_title('the')
+
+
+def test_cache_counts_hits_and_misses(cached_repo):
+    movie = cached_repo.get_movie_by_id(1)
+    assert cached_repo.get_movie_by_id(1) is movie
+    cached_repo.get_movies_by_genre('Action')
+
+    stats = cached_repo.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 2, 0.3333)
+    assert stats['methods']['get_movie_by_id'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+    assert stats['methods']['get_movies_by_release_year']['hit_rate'] is None
+
+
+def test_cache_evicts_the_least_recently_used_results(cached_repo):
+    for movie_id in (1, 2, 3):
+        cached_repo.get_movie_by_id(movie_id)
+    cached_repo.get_movie_by_id(1)
+    cached_repo.get_movie_by_id(4)
+    cached_repo.get_movie_by_id(1)
+    cached_repo.get_movie_by_id(2)
+
+    stats = cached_repo.stats()
+    assert stats['entries'] == 3
+    assert stats['evictions'] == 2
+    assert stats['hits'] == 2
+
+
+def test_cache_expires_results_after_their_time_to_live(repository):
+    cached_repo = CachingRepository(repository, max_entries=10, ttl=0)
+    cached_repo.get_movies_by_genre('Action')
+    cached_repo.get_movies_by_genre('Action')
+
+    assert cached_repo.stats()['hits'] == 0
+    assert cached_repo.stats()['expirations'] == 1
+
+
+def test_cache_drops_results_changed_by_a_review(cached_repo):
+    votes = cached_repo.get_movie_by_id(2).votes
+    release_year = cached_repo.get_movie_by_id(2).release_year
+    cached_repo.get_movies_by_release_year(release_year)
+    cached_repo.add_review(make_review('Not bad', cached_repo.get_user('thorke'), cached_repo.get_movie_by_id(2), 6))
+
+    assert cached_repo.get_movie_by_id(2).votes == votes + 1
+    assert [review.review_text for review in cached_repo.get_movie_by_id(2).reviews] == ['Not bad']
+    assert next(movie for movie in cached_repo.get_movies_by_release_year(release_year) if movie.id == 2).votes == \
+           votes + 1
+
+
+def test_cache_drops_results_changed_by_a_new_movie(cached_repo):
+    assert cached_repo.get_movie_by_id(1001) is None
+    action = cached_repo.get_movies_by_genre('Action')
+    movie = Movie('Brand New Release', 2016)
+    movie.id = 1001
+    make_genre_association(movie, next(genre for genre in cached_repo.get_genres() if genre == Genre('Action')))
+    cached_repo.add_movie(movie)
+
+    assert cached_repo.get_movie_by_id(1001) == movie
+    assert cached_repo.get_movies_by_genre('Action') == action + [1001]
+    assert movie in cached_repo.get_movies_by_release_year(2016)
@@ -0,0 +1,94 @@
+import pytest
+
+from datetime import datetime
+
+from movie_web_app.adapters.catalog_file import CatalogFile, CatalogFileException, CatalogMovie, write_catalog_file
+from movie_web_app.adapters.memory_repository import LoadProgress, MemoryRepository, populate
+from movie_web_app.domainmodel.model import WatchList, make_review
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def catalog(tmp_path, in_memory_repo):
+    path = str(tmp_path / 'movies.catalog')
+    write_catalog_file(reversed(in_memory_repo.get_movies_by_id(range(1, 51))), path)
+    return CatalogFile(path)
+
+
+def test_catalog_file_materializes_movies(catalog, in_memory_repo):
+    movie = catalog.movie(1)
+    original = in_memory_repo.get_movie_by_id(1)
+
+    assert len(catalog) == 50
+    assert movie == original and movie is not original
+    assert movie.id == 1
+    assert movie.description == original.description
+    assert movie.director == 'James Gunn'
+    assert [actor.actor_full_name for actor in movie.actors] == \
+           [actor.actor_full_name for actor in original.actors]
+    assert [genre.genre_full_name for genre in movie.genres] == ['Action', 'Adventure', 'Sci-Fi']
+    assert (movie.runtime_minutes, movie.rating, movie.votes) == (121, 8.1, original.votes)
+    assert (movie.revenue, movie.metascore) == (333.13, 76.0)
+    assert catalog.movie(1) is movie
+    assert catalog.movie(51) is None
+
+
+def test_catalog_file_keeps_unavailable_values(catalog, in_memory_repo):
+    movie_id = next(movie.id for movie in in_memory_repo.get_movies_by_id(range(1, 51))
+                    if movie.revenue == 'Not Available')
+
+    assert catalog.movie(movie_id).revenue == 'Not Available'
+
+
+def test_catalog_file_filters_its_mapped_columns(catalog, in_memory_repo):
+    ranges = {'release_year': (2014, 2016), 'rating': (7.0, None)}
+
+    assert catalog.filter(ranges).tolist() == in_memory_repo.get_movies_by_facets(ranges)
+    assert catalog.column('id').tolist() == list(range(1, 51))
+    assert not catalog.column('votes').flags.writeable
+
+
+class StageRecordingProgress(LoadProgress):
+    def __setattr__(self, name, value):
+        if name == 'stage':
+            self.__dict__.setdefault('stages', []).append(value)
+        super().__setattr__(name, value)
+
+
+def test_repository_populated_from_catalog_file_reads_movies_from_it(tmp_path, in_memory_repo):
+    path = str(tmp_path / 'movies.catalog')
+    write_catalog_file(in_memory_repo.get_movies_by_id(in_memory_repo.get_movies_by_facets(dict())), path)
+    repo = MemoryRepository()
+    progress = StageRecordingProgress()
+    populate(TEST_DATA_PATH, repo, progress=progress, catalog=CatalogFile(path))
+    progress.finish()
+
+    movie = repo.get_movie_by_id(1)
+    original = in_memory_repo.get_movie_by_id(1)
+    assert repo.get_number_of_movies() == in_memory_repo.get_number_of_movies()
+    assert list(dict.fromkeys(progress.stages)) == ['parsing movies', 'indexing movies', 'loading users', 'loading reviews', 'ready']
+    assert progress.movies_parsed == progress.movies_indexed == repo.get_number_of_movies()
+    assert (progress.users_loaded, progress.reviews_loaded) == (3, 3)
+    assert isinstance(movie, CatalogMovie)
+    assert movie == original and movie.description == original.description
+    assert movie.director == original.director
+    assert movie.actors == original.actors and movie.genres == original.genres
+    assert [review.review_text for review in movie.reviews] == [review.review_text for review in original.reviews]
+    assert repo.get_movies_by_genre('Sci-Fi') == in_memory_repo.get_movies_by_genre('Sci-Fi')
+    ranges = {'rating': (7.0, None)}
+    assert repo.get_movies_by_facets(ranges) == in_memory_repo.get_movies_by_facets(ranges)
+
+    watchlist = WatchList()
+    watchlist.add_movie(movie)
+    assert watchlist.first_movie_in_watchlist() is movie
+    repo.add_review(make_review('Still great', repo.get_user('thorke'), movie, 9, datetime(2020, 10, 15)))
+    assert [review.review_text for review in movie.reviews][-1] == 'Still great'
+
+
+def test_catalog_file_rejects_other_files(tmp_path):
+    path = tmp_path / 'movies.csv'
+    path.write_bytes(b'Rank,Title,Genre,Description\n')
+
+    with pytest.raises(CatalogFileException):
+        CatalogFile(str(path))
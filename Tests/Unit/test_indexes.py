@@ -0,0 +1,205 @@
+from movie_web_app.adapters.indexes import normalize_name, bitset_to_ids, tokenize, TrigramIndex, BM25Index, \
+    BKTree, levenshtein_distance, PrefixIndex, SortedIndex
+
+import pytest
+
+
+@pytest.fixture()
+def trigram_index():
+    index = TrigramIndex()
+    index.add(1, 'Guardians of the Galaxy')
+    index.add(2, 'Prometheus')
+    index.add(3, 'Up')
+    index.add(4, 'La La Land')
+    return index
+
+
+def test_normalize_name():
+    assert normalize_name('  Penélope   CRUZ ') == 'penelope cruz'
+    assert normalize_name('chris  pratt') == normalize_name('Chris Pratt')
+
+
+def test_trigram_index_finds_substrings_case_insensitively(trigram_index):
+    assert trigram_index.search('GALAXY') == {1}
+    assert trigram_index.search('the gal') == {1}
+    assert trigram_index.search('la la') == {4}
+    assert trigram_index.search('Interstellar') == set()
+
+
+def test_trigram_index_verifies_candidates(trigram_index):
+    # Every trigram of the query occurs in 'Prometheus', but the query itself does not.
+    assert trigram_index.search('ometheusomet') == set()
+
+
+def test_trigram_index_handles_queries_shorter_than_a_trigram(trigram_index):
+    assert trigram_index.search('up') == {3}
+    assert trigram_index.search('p') == {2, 3}
+    assert trigram_index.search('') == {1, 2, 3, 4}
+
+
+def test_trigram_index_can_remove_a_text(trigram_index):
+    trigram_index.remove(1)
+    trigram_index.remove(3)
+
+    assert trigram_index.search('galaxy') == set()
+    assert trigram_index.search('up') == set()
+    assert len(trigram_index) == 2
+
+
+def test_bitset_to_ids():
+    assert bitset_to_ids(0) == []
+    assert bitset_to_ids(0b101001) == [0, 3, 5]
+    assert bitset_to_ids(1 << 1_000_000 | 2) == [1, 1_000_000]
+
+
+@pytest.fixture()
+def bm25_index():
+    index = BM25Index()
+    index.add(1, (('Guardians of the Galaxy', 3), ('A group of intergalactic criminals must save the universe.', 1)))
+    index.add(2, (('Prometheus', 3), ('A team finds a structure on a distant moon.', 1)))
+    index.add(3, (('Passengers', 3), ('A spacecraft carrying passengers has a malfunction in its sleep chambers.', 1)))
+    return index
+
+
+def test_tokenize():
+    assert tokenize("Intergalactic CRIMINALS, café-owners") == ['intergalactic', 'criminals', 'cafe', 'owners']
+
+
+def test_bm25_index_ranks_matching_documents(bm25_index):
+    results = bm25_index.search('distant moon')
+
+    assert [key for key, score in results] == [2]
+    assert results[0][1] > 0
+
+
+def test_bm25_index_weights_titles_above_descriptions(bm25_index):
+    bm25_index.add(4, (('Sleepless', 3), ('Passengers of a night train.', 1)))
+
+    assert [key for key, score in bm25_index.search('passengers')] == [3, 4]
+
+
+def test_bm25_index_limits_results_and_ignores_unknown_terms(bm25_index):
+    assert len(bm25_index.search('a', limit=2)) == 2
+    assert bm25_index.search('xyzzy') == []
+    assert BM25Index().search('anything') == []
+
+
+def test_levenshtein_distance():
+    assert levenshtein_distance('chris pratt', 'chris pratt') == 0
+    assert levenshtein_distance('chris prat', 'chris pratt') == 1
+    assert levenshtein_distance('kitten', 'sitting') == 3
+    assert levenshtein_distance('kitten', 'sitting', max_distance=1) == 2
+    assert levenshtein_distance('', 'abc') == 3
+
+
+def test_bk_tree_finds_words_within_the_distance_bound():
+    tree = BKTree()
+    for word in ('chris pratt', 'chris pine', 'chris evans', 'chris pratt', 'vin diesel'):
+        tree.add(word)
+
+    assert len(tree) == 4
+    assert tree.search('chris prat', max_distance=2) == [(1, 'chris pratt')]
+    assert tree.search('chris pin', max_distance=4) == [(1, 'chris pine'), (4, 'chris evans'), (4, 'chris pratt')]
+    assert tree.search('zzz', max_distance=2) == []
+    assert BKTree().search('anyone', max_distance=2) == []
+
+
+@pytest.fixture()
+def prefix_index():
+    index = PrefixIndex()
+    index.add('Guardians of the Galaxy', 1)
+    index.add('The Great Wall', 2)
+    index.add('The Grand Budapest Hotel', 3)
+    index.add('Gravity', 4)
+    return index
+
+
+def test_prefix_index_completes_any_word_of_a_text(prefix_index):
+    weights = {1: 757074, 2: 56036, 3: 530881, 4: 622089}
+
+    assert prefix_index.complete('gra', weights.get) == [4, 3]
+    assert prefix_index.complete('the g', weights.get) == [1, 3, 2]
+    assert prefix_index.complete('GALAXY', weights.get) == [1]
+    assert prefix_index.complete('xyz', weights.get) == []
+    assert prefix_index.complete('', weights.get) == []
+
+
+def test_prefix_index_limits_completions(prefix_index):
+    assert prefix_index.complete('g', lambda value: value, limit=2) == [4, 3]
+
+
+def test_prefix_index_stops_ranking_when_the_time_budget_is_spent():
+    index = PrefixIndex()
+    for value in range(1000):
+        index.add(f'title {value:04}', value, all_words=False)
+
+    assert len(index.complete('title', lambda value: value, time_budget=0)) == 10
+    assert index.complete('title', lambda value: value, limit=1) == [999]
+
+
+@pytest.fixture()
+def sorted_index():
+    index = SortedIndex()
+    for key, value in ((1, 7.0), (2, 8.0), (3, 7.0), (4, 9.1), (5, 6.5)):
+        index.add(key, value)
+    return index
+
+
+def test_sorted_index_returns_top_keys(sorted_index):
+    assert sorted_index.top(2) == [4, 2]
+    assert sorted_index.top(2, offset=2) == [3, 1]
+    assert sorted_index.top(10, offset=4) == [5]
+    assert sorted_index.top(10, offset=10) == []
+
+
+def test_sorted_index_returns_keys_within_a_range(sorted_index):
+    assert sorted_index.range(7.0, 7.0) == [1, 3]
+    assert sorted_index.range(7.5) == [2, 4]
+    assert sorted_index.range(None, 7.0) == [5, 1, 3]
+    assert sorted_index.range(9.5) == []
+
+
+def test_sorted_index_replaces_and_removes_values(sorted_index):
+    sorted_index.add(4, 1.0)
+    sorted_index.remove(2)
+    sorted_index.remove(99)
+
+    assert len(sorted_index) == 4
+    assert sorted_index.top(1) == [3]
+    assert sorted_index.range(None, 1.0) == [4]
+
+
+def test_prefix_index_bulk_add_matches_single_adds(prefix_index):
+    index = PrefixIndex()
+    index.add_many([('Gravity', 4), ('The Grand Budapest Hotel', 3), ('Guardians of the Galaxy', 1),
+                    ('The Great Wall', 2)])
+    weights = {1: 757074, 2: 56036, 3: 530881, 4: 622089}
+
+    for prefix in ('gra', 'the g', 'galaxy', 'g'):
+        assert index.complete(prefix, weights.get) == prefix_index.complete(prefix, weights.get)
+
+
+def test_sorted_index_bulk_add_matches_single_adds(sorted_index):
+    index = SortedIndex()
+    index.add_many([(5, 6.5), (4, 1.0), (3, 7.0)])
+    index.add_many([(4, 9.1), (2, 8.0), (1, 7.0)])
+
+    assert len(index) == len(sorted_index)
+    assert index.top(10) == sorted_index.top(10)
+    assert index.range(7.0, 8.0) == sorted_index.range(7.0, 8.0)
+
+
+def test_bm25_index_can_remove_a_document(bm25_index):
+    bm25_index.remove(2, (('Prometheus', 3), ('A team finds a structure on a distant moon.', 1)))
+
+    assert len(bm25_index) == 2
+    assert bm25_index.search('distant moon') == []
+    assert [key for key, score in bm25_index.search('passengers')] == [3]
+
+
+def test_prefix_index_can_remove_a_value(prefix_index):
+    prefix_index.remove('The Grand Budapest Hotel', 3)
+
+    assert len(prefix_index) == 8
+    assert prefix_index.complete('gra', lambda value: value) == [4]
+    assert prefix_index.complete('hotel', lambda value: value) == []
@@ -0,0 +1,167 @@
+import os
+import shutil
+import threading
+from datetime import datetime
+
+import pytest
+from werkzeug.security import check_password_hash
+
+from movie_web_app.adapters.journal import Journal, compact_journal, read_journal, replay_journal
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate, read_csv_headers
+from movie_web_app.adapters.snapshot import read_snapshot, write_snapshot
+from movie_web_app.domainmodel.model import User, make_review
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(TEST_DATA_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def journal_path(tmp_path):
+    return str(tmp_path / 'repository.journal')
+
+
+def load(data_path: str, journal_path: str) -> MemoryRepository:
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    repo.attach_journal(Journal(journal_path, replay_journal(journal_path, repo)))
+    return repo
+
+
+def add_user_and_review(repo: MemoryRepository):
+    repo.add_user(User('gmichael', 'hashed password'))
+    repo.add_review(make_review('Careless', repo.get_user('gmichael'), repo.get_movie_by_id(2), 4,
+                                datetime(2020, 10, 15, 20, 26)))
+
+
+def test_users_and_reviews_are_replayed_from_the_journal(data_path, journal_path, in_memory_repo):
+    add_user_and_review(load(data_path, journal_path))
+
+    repo = load(data_path, journal_path)
+    movie = repo.get_movie_by_id(2)
+
+    assert repo.get_user('gmichael').password == 'hashed password'
+    assert [(review.user.username, review.review_text, review.rating, review.timestamp)
+            for review in repo.get_reviews_for_movie(2)] == [('gmichael', 'Careless', 4, datetime(2020, 10, 15, 20, 26))]
+    assert movie.votes == in_memory_repo.get_movie_by_id(2).votes + 1
+    # Replaying doesn't journal the changes again.
+    assert len(list(read_journal(journal_path))) == 2
+
+
+def test_loading_users_and_reviews_from_the_data_files_is_not_journaled(data_path, journal_path):
+    load(data_path, journal_path)
+
+    assert os.path.getsize(journal_path) == 0
+
+
+def test_a_record_cut_short_is_dropped(data_path, journal_path):
+    add_user_and_review(load(data_path, journal_path))
+    size = os.path.getsize(journal_path)
+    with open(journal_path, 'ab') as outfile:
+        outfile.write(b'1234abcd ["user","fmer')
+
+    repo = load(data_path, journal_path)
+    repo.add_user(User('fmercury2', 'hashed password'))
+
+    assert repo.get_user('gmichael') is not None
+    assert [record[1] for record, offset in read_journal(journal_path)] == ['gmichael', 2, 'fmercury2']
+    assert os.path.getsize(journal_path) > size
+
+
+def test_concurrent_appends_share_fsyncs(journal_path):
+    journal = Journal(journal_path, commit_delay=0.01)
+
+    def append_users(thread_number):
+        for user_number in range(20):
+            journal.append_user(f'user{thread_number}-{user_number}', 'hashed password')
+
+    threads = [threading.Thread(target=append_users, args=(thread_number,)) for thread_number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    journal.close()
+
+    assert journal.records == 160
+    assert journal.commits < journal.records
+    assert len(list(read_journal(journal_path))) == 160
+
+
+def test_a_snapshot_is_only_brought_up_to_date_with_later_records(tmp_path, data_path, journal_path):
+    repo = load(data_path, journal_path)
+    add_user_and_review(repo)
+    snapshot_path = str(tmp_path / 'repository.snapshot')
+    write_snapshot(repo, snapshot_path, data_path)
+    repo.add_review(make_review('Again', repo.get_user('gmichael'), repo.get_movie_by_id(2), 6))
+
+    snapshot_repo = read_snapshot(snapshot_path, data_path)
+    replay_journal(journal_path, snapshot_repo, snapshot_repo.journal_position)
+
+    assert [review.review_text for review in snapshot_repo.get_reviews_for_movie(2)] == ['Careless', 'Again']
+
+
+def test_compaction_folds_the_journal_into_the_data_files(data_path, journal_path):
+    repo = load(data_path, journal_path)
+    repo.add_user(User('gmichael', 'pbkdf2:sha256:260000$salt$hash'))
+    add_user_and_review(repo)
+
+    assert compact_journal(journal_path, data_path) == (1, 1)
+
+    compacted_repo = MemoryRepository()
+    populate(data_path, compacted_repo)
+    assert os.path.getsize(journal_path) == 0
+    assert read_csv_headers(os.path.join(data_path, 'users.csv'))[2] == 'password_hash'
+    assert check_password_hash(compacted_repo.get_user('thorke').password, 'cLQ^C#oFXloS')
+    assert compacted_repo.get_user('gmichael').password == 'pbkdf2:sha256:260000$salt$hash'
+    assert [(review.user.username, review.review_text, review.timestamp)
+            for review in compacted_repo.get_reviews_for_movie(2)] == [
+        ('gmichael', 'Careless', datetime(2020, 10, 15, 20, 26))]
+    assert len(compacted_repo.get_reviews()) == len(repo.get_reviews())
+
+
+
+def load_shared(data_path: str, journal_path: str) -> (MemoryRepository, Journal):
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    journal = Journal(journal_path, replay_journal(journal_path, repo), shared=True)
+    repo.attach_journal(journal)
+    return repo, journal
+
+
+def test_repositories_sharing_a_journal_apply_each_others_changes(data_path, journal_path):
+    first, first_journal = load_shared(data_path, journal_path)
+    second, second_journal = load_shared(data_path, journal_path)
+
+    add_user_and_review(first)
+    assert second.get_user('gmichael') is None
+    second_journal.catch_up()
+    assert second.get_user('gmichael').password == 'hashed password'
+    assert [review.review_text for review in second.get_reviews_for_movie(2)] == ['Careless']
+
+    first.add_review_for(2, 'gmichael', 'Faith', 7, datetime(2020, 10, 16))
+    review = second.add_review_for(2, 'thorke', 'Freedom', 6, datetime(2020, 10, 17))
+
+    # The second repository applied the review of the first before journaling its own, and the first applies it next.
+    assert review.review_text == 'Freedom'
+    assert [review.review_text for review in second.get_reviews_for_movie(2)] == ['Careless', 'Faith', 'Freedom']
+    first_journal.catch_up()
+    assert [review.review_text for review in first.get_reviews_for_movie(2)] == ['Careless', 'Faith', 'Freedom']
+    assert first.get_movie_by_id(2).votes == second.get_movie_by_id(2).votes
+    assert first.journal_position == second.journal_position == os.path.getsize(journal_path)
+    assert len(list(read_journal(journal_path))) == 4
+
+
+def test_a_username_taken_through_another_process_keeps_its_first_user(data_path, journal_path):
+    first, first_journal = load_shared(data_path, journal_path)
+    second, second_journal = load_shared(data_path, journal_path)
+
+    first.add_user(User('gmichael', 'first password hash'))
+    second.add_user(User('gmichael', 'second password hash'))
+
+    assert second.get_user('gmichael').password == 'first password hash'
+    assert load(data_path, journal_path).get_user('gmichael').password == 'first password hash'
@@ -0,0 +1,202 @@
+import os
+import sys
+import threading
+from datetime import datetime
+
+import pytest
+
+from movie_web_app.adapters.journal import Journal, read_journal
+from movie_web_app.adapters.locking import ReadWriteLock
+from movie_web_app.adapters.memory_repository import MemoryRepository, apply_movie_changes, parse_movie_row, populate
+from movie_web_app.adapters.reloader import movie_rows_by_id
+from movie_web_app.domainmodel.model import User, make_review
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+def test_readers_hold_the_lock_together():
+    lock = ReadWriteLock()
+    readers = threading.Barrier(3, timeout=5)
+
+    def read():
+        with lock.reading():
+            # Every reader has to be inside at once for the barrier to let them through.
+            readers.wait()
+
+    threads = [threading.Thread(target=read) for thread_number in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert not readers.broken
+
+
+def test_a_writer_waits_for_readers_and_holds_back_later_readers():
+    lock = ReadWriteLock()
+    events = list()
+    writer_waiting = threading.Event()
+
+    def write():
+        writer_waiting.set()
+        with lock.writing():
+            events.append('write')
+
+    def read():
+        with lock.reading():
+            events.append('late read')
+
+    with lock.reading():
+        writer = threading.Thread(target=write)
+        writer.start()
+        writer_waiting.wait()
+        writer.join(0.05)
+        assert events == []
+        late_reader = threading.Thread(target=read)
+        late_reader.start()
+        late_reader.join(0.05)
+        assert events == []
+    writer.join()
+    late_reader.join()
+
+    assert events == ['write', 'late read']
+
+
+def test_the_writer_can_take_the_lock_again():
+    lock = ReadWriteLock()
+
+    with lock.writing():
+        with lock.writing():
+            with lock.reading():
+                pass
+    with lock.reading():
+        pass
+
+
+@pytest.fixture
+def repo():
+    repo = MemoryRepository()
+    populate(TEST_DATA_PATH, repo)
+    repo.make_thread_safe()
+    return repo
+
+
+def race(read, writes):
+    """ Runs writes, each on its own thread, alongside 4 threads calling read until they are done. """
+    writing = threading.Event()
+
+    def keep_reading():
+        while writing.is_set():
+            read()
+
+    # Switching threads as often as possible makes a read landing in the middle of a change likely without the lock.
+    switch_interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)
+    writing.set()
+    readers = [threading.Thread(target=keep_reading) for reader_number in range(4)]
+    writers = [threading.Thread(target=write) for write in writes]
+    try:
+        for thread in readers + writers:
+            thread.start()
+        for thread in writers:
+            thread.join()
+    finally:
+        writing.clear()
+        for thread in readers:
+            thread.join()
+        sys.setswitchinterval(switch_interval)
+
+
+def test_reads_alongside_reviews_never_see_a_change_half_made(repo):
+    movie_ids = [movie.id for movie in repo.get_movies_by_id(range(1, 11))]
+    ranked_movies = repo.get_number_of_ranked_movies('rating')
+    votes = sum(repo.get_movie_by_id(movie_id).votes for movie_id in movie_ids)
+    user = repo.get_user('thorke')
+    failures = list()
+
+    def write_reviews(writer_number):
+        for review_number in range(500):
+            movie = repo.get_movie_by_id(movie_ids[review_number % len(movie_ids)])
+            review = make_review(f'Review {writer_number}-{review_number}', user, movie, review_number % 10 + 1,
+                                 datetime(2020, 10, 15))
+            repo.add_review(review)
+
+    def read():
+        try:
+            # A movie being re-ranked is briefly out of the ranking while its rating changes.
+            if repo.get_number_of_ranked_movies('rating') != ranked_movies:
+                failures.append('ranking')
+            if len(repo.get_top_movie_ids('rating', ranked_movies)) != ranked_movies:
+                failures.append('top movies')
+            repo.get_movies_by_facets({'rating': (5, 9)})
+        except Exception as exception:
+            failures.append(repr(exception))
+
+    race(read, [lambda writer_number=writer_number: write_reviews(writer_number) for writer_number in range(4)])
+
+    assert failures == []
+    assert sum(repo.get_movie_by_id(movie_id).votes for movie_id in movie_ids) == votes + 2000
+    assert repo.get_number_of_ranked_movies('rating') == ranked_movies
+    assert len(repo.get_reviews()) == 3 + 2000
+
+
+def test_reviews_are_linked_to_their_movie_and_user_under_the_lock(repo):
+    user = repo.get_user('thorke')
+    reviews = len(user.reviews)
+    failures = list()
+
+    def write_reviews(writer_number):
+        for review_number in range(500):
+            repo.add_review_for(review_number % 10 + 1, 'thorke', f'Review {writer_number}-{review_number}',
+                                review_number % 10 + 1)
+
+    def read():
+        try:
+            # Iterating over the reviews of the user fails if a review is added to them meanwhile.
+            repo.user_recommendations_by_genre('thorke')
+        except Exception as exception:
+            failures.append(repr(exception))
+
+    race(read, [lambda writer_number=writer_number: write_reviews(writer_number) for writer_number in range(4)])
+
+    assert failures == []
+    assert len(user.reviews) == reviews + 2000
+    assert len(repo.get_reviews()) == 3 + 2000
+
+
+def test_only_the_first_of_users_added_under_one_name_at_once_is_journaled(tmp_path, repo):
+    journal_path = str(tmp_path / 'journal')
+    repo.attach_journal(Journal(journal_path, commit_delay=0.01))
+    adding = threading.Barrier(8, timeout=5)
+
+    def add_user(thread_number):
+        adding.wait()
+        repo.add_user(User('gmichael', f'password hash {thread_number}'))
+
+    threads = [threading.Thread(target=add_user, args=(thread_number,)) for thread_number in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    records = [record for record, offset in read_journal(journal_path)]
+    assert records == [['user', 'gmichael', repo.get_user('gmichael').password]]
+
+
+def test_lookups_alongside_a_reload_always_find_a_replaced_movie(repo):
+    rows = movie_rows_by_id(os.path.join(TEST_DATA_PATH, 'Data1000Movies.csv'))
+    failures = list()
+
+    def reload():
+        for reload_number in range(100):
+            apply_movie_changes({movie_id: parse_movie_row(list(rows[movie_id])) for movie_id in range(1, 11)}, repo)
+
+    def read():
+        for movie_id in range(1, 11):
+            if repo.get_movie_by_id(movie_id) is None:
+                failures.append(movie_id)
+
+    race(read, [reload])
+
+    assert failures == []
+    assert repo.get_number_of_movies() == 50
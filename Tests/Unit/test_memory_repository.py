@@ -0,0 +1,283 @@
+import pickle
+
+import pytest
+
+from movie_web_app.adapters.memory_repository import MemoryRepository, csv_chunks, load_movies, populate
+from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, make_director_association, make_review
+
+
+def test_repository_can_add_and_retrieve_a_user(in_memory_repo):
+    user = User('dave', '123456789')
+    in_memory_repo.add_user(user)
+
+    assert in_memory_repo.get_user('dave') is user
+
+
+def test_repository_does_not_retrieve_a_non_existent_user(repository):
+    assert repository.get_user('prince') is None
+
+
+def test_repository_keeps_the_first_user_added_with_a_username(in_memory_repo):
+    user = in_memory_repo.get_user('thorke')
+    in_memory_repo.add_user(User('thorke', 'another password'))
+
+    assert in_memory_repo.get_user('thorke') is user
+
+
+def test_repository_can_retrieve_actors_and_directors_by_name(repository):
+    assert repository.get_actor('Chris Pratt') == Actor('Chris Pratt')
+    assert repository.get_director('James Gunn') == Director('James Gunn')
+    assert repository.get_actor('Nobody') is None
+    assert repository.get_director('Nobody') is None
+
+
+def test_repository_can_add_a_genre(repository):
+    genre = Genre('Documentary')
+    repository.add_genre(genre)
+
+    assert genre in repository.get_genres()
+    assert repository.get_movies_by_genre('Documentary') == []
+
+
+def test_repository_can_retrieve_movie_ids_for_a_genre(repository):
+    movie_ids = repository.get_movies_by_genre('Horror')
+
+    assert 1 not in movie_ids
+    assert all('Horror' in [genre.genre_full_name for genre in repository.get_movie_by_id(movie_id).genres]
+               for movie_id in movie_ids)
+    assert repository.get_movies_by_genre('Nonexistent') == []
+
+
+def test_repository_can_retrieve_movies_by_actor_regardless_of_case_and_spacing(repository):
+    movies = repository.get_movies_by_actor('  chris   PRATT ')
+
+    assert 'Guardians of the Galaxy' in [movie.title for movie in movies]
+    assert repository.get_movies_by_actor('Chris Pratt') == movies
+
+
+def test_repository_can_retrieve_movies_by_director_regardless_of_accents(in_memory_repo):
+    movie = Movie('Birdman', 2014)
+    director = Director('Alejandro González Iñárritu')
+    make_director_association(movie, director)
+    in_memory_repo.add_director(director)
+
+    assert in_memory_repo.get_movies_by_director('alejandro gonzalez inarritu') == [movie]
+    assert in_memory_repo.get_movies_by_director('david ayer') == in_memory_repo.get_movies_by_director('David Ayer')
+    assert len(in_memory_repo.get_movies_by_director('David Ayer')) > 0
+
+
+def test_repository_returns_no_movies_for_an_unknown_actor(repository):
+    assert repository.get_movies_by_actor('Nobody At All') == []
+
+
+def test_repository_can_retrieve_movies_by_release_year(repository):
+    movies = repository.get_movies_by_release_year(2014)
+
+    assert 'Guardians of the Galaxy' in [movie.title for movie in movies]
+    assert all(movie.release_year == 2014 for movie in movies)
+    assert movies == sorted(movies)
+    assert repository.get_movies_by_release_year(1850) == []
+
+
+def test_repository_can_retrieve_newest_and_oldest_movies(repository):
+    newest = repository.get_newest_movie()
+    oldest = repository.get_oldest_movie()
+
+    assert newest.release_year == 2016
+    assert oldest.release_year == min(movie.release_year for movie in repository.get_movies_by_id(range(1, 51)))
+
+
+def test_repository_does_not_reorder_movies_when_retrieving_newest_and_oldest(in_memory_repo):
+    movie = in_memory_repo.get_movie_by_id(1)
+    index = in_memory_repo.movie_index(movie)
+    in_memory_repo.get_newest_movie()
+    in_memory_repo.get_oldest_movie()
+
+    assert in_memory_repo.movie_index(movie) == index
+    assert in_memory_repo.get_release_year_of_previous_movie(movie) == 2012
+    assert in_memory_repo.get_release_year_of_next_movie(movie) == 2015
+
+
+def test_repository_returns_no_adjacent_years_at_the_ends_of_the_catalog(repository):
+    assert repository.get_release_year_of_next_movie(repository.get_newest_movie()) is None
+    assert repository.get_release_year_of_previous_movie(repository.get_oldest_movie()) is None
+
+
+def test_repository_can_search_movies_by_title(repository):
+    movies = repository.search_movie_by_title('the')
+
+    assert 'Guardians of the Galaxy' in [movie.title for movie in movies]
+    assert all('the' in movie.title.lower() for movie in movies)
+    assert movies == sorted(movies)
+    assert repository.search_movie_by_title('no such title') == []
+
+
+def test_repository_can_search_a_movie_added_after_populating(repository):
+    movie = Movie('Brand New Release', 2020)
+    movie.id = 1001
+    repository.add_movie(movie)
+
+    assert repository.search_movie_by_title('new rel') == [movie]
+
+
+def test_repository_can_search_movies_by_description(repository):
+    movies = repository.search_movies_by_text('intergalactic criminals')
+
+    assert movies[0].title == 'Guardians of the Galaxy'
+    assert len(repository.search_movies_by_text('the', limit=3)) == 3
+    assert repository.search_movies_by_text('xyzzy') == []
+
+
+def test_repository_suggests_similar_actor_and_director_names(repository):
+    assert repository.get_similar_actor_names('Chris Prat')[0] == 'Chris Pratt'
+    assert repository.get_similar_director_names('david ayre') == ['David Ayer']
+    assert repository.get_similar_actor_names('Nobody At All') == []
+
+
+def test_repository_autocompletes_titles_and_names_by_votes(repository):
+    assert repository.autocomplete('guard', 'title') == ['Guardians of the Galaxy']
+    assert repository.autocomplete('galaxy', 'title') == ['Guardians of the Galaxy']
+    assert 'Chris Pratt' in repository.autocomplete('chris', 'actor')
+    assert repository.autocomplete('ridley', 'director') == ['Ridley Scott']
+    assert len(repository.autocomplete('the', 'title', limit=3)) <= 3
+
+
+def test_repository_can_combine_genres(repository):
+    action = set(repository.get_movies_by_genre('Action'))
+    sci_fi = set(repository.get_movies_by_genre('Sci-Fi'))
+    horror = set(repository.get_movies_by_genre('Horror'))
+
+    movie_ids = repository.get_movies_by_genres(['Action', 'Sci-Fi'], ['Horror'])
+
+    assert 1 in movie_ids
+    assert movie_ids == sorted((action & sci_fi) - horror)
+    assert repository.get_movies_by_genres(['Action', 'Nonexistent']) == []
+    assert repository.get_movies_by_genres(['Action'], ['Nonexistent']) == sorted(action)
+    assert repository.get_movies_by_genres([]) == []
+
+
+def test_repository_can_filter_movies_by_facets(repository):
+    movie_ids = repository.get_movies_by_facets({'release_year': (2014, 2014), 'rating': (8.0, None)})
+
+    assert 1 in movie_ids
+    for movie in repository.get_movies_by_id(movie_ids):
+        assert movie.release_year == 2014 and movie.rating >= 8.0
+    assert repository.get_movies_by_facets({'runtime_minutes': (1000, None)}) == []
+
+
+def test_repository_ranks_movies_by_attribute(repository):
+    movies = repository.get_movies_by_id(repository.get_top_movie_ids('votes', 5))
+    votes = [movie.votes for movie in movies]
+
+    assert len(movies) == 5
+    assert votes == sorted(votes, reverse=True)
+    assert repository.get_top_movie_ids('votes', 5, offset=1)[0] == repository.get_top_movie_ids('votes', 2)[1]
+
+
+def test_repository_does_not_rank_unavailable_revenues(repository):
+    revenues = [movie.revenue for movie in repository.get_movies_by_id(range(1, 51))]
+
+    assert repository.get_number_of_ranked_movies('revenue') == len([r for r in revenues if r != 'Not Available'])
+
+
+def test_repository_can_retrieve_movies_within_a_range_of_an_attribute(repository):
+    movie_ids = repository.get_movie_ids_by_range('rating', 7.0, 8.0)
+    ratings = [movie.rating for movie in repository.get_movies_by_id(movie_ids)]
+
+    assert len(movie_ids) > 0
+    assert ratings == sorted(ratings)
+    assert all(7.0 <= rating <= 8.0 for rating in ratings)
+
+
+def test_repository_re_ranks_a_movie_after_a_review(repository):
+    movie = repository.get_movie_by_id(repository.get_top_movie_ids('votes', 1, offset=49)[0])
+    votes = movie.votes
+    review = make_review('A review', repository.get_user('thorke'), movie, 10)
+    repository.add_review(review)
+
+    assert movie.votes == votes + 1
+    assert movie.id in repository.get_movie_ids_by_range('votes', votes + 1, votes + 1)
+
+
+def test_repository_bulk_add_matches_single_adds(in_memory_repo):
+    movies = in_memory_repo.get_movies_by_id(range(1, 51))
+    actors = [in_memory_repo.get_actor(actor.actor_full_name) for movie in movies for actor in movie.actors]
+    genres = in_memory_repo.get_genres()
+    directors = [in_memory_repo.get_director(movie.director) for movie in movies]
+    repo = MemoryRepository()
+    repo.add_movies_bulk(reversed(movies), actors, directors, genres)
+
+    assert repo.get_number_of_movies() == 50
+    assert repo.get_oldest_movie() is in_memory_repo.get_oldest_movie()
+    assert repo.get_newest_movie() is in_memory_repo.get_newest_movie()
+    assert repo.get_movies_by_release_year(2016) == in_memory_repo.get_movies_by_release_year(2016)
+    assert repo.get_release_year_of_next_movie(movies[0]) == in_memory_repo.get_release_year_of_next_movie(movies[0])
+    assert repo.search_movie_by_title('the') == in_memory_repo.search_movie_by_title('the')
+    assert repo.get_top_movie_ids('votes', 50) == in_memory_repo.get_top_movie_ids('votes', 50)
+    assert repo.get_movies_by_facets({'rating': (7.0, None)}) == in_memory_repo.get_movies_by_facets({'rating': (7.0, None)})
+    assert repo.get_movies_by_genre('Action') == in_memory_repo.get_movies_by_genre('Action')
+    assert repo.get_actor('Chris Pratt') is in_memory_repo.get_actor('Chris Pratt')
+    assert repo.get_similar_director_names('james gun') == ['James Gunn']
+    assert repo.autocomplete('chris', 'actor') == in_memory_repo.autocomplete('chris', 'actor')
+    assert repo.autocomplete('gu', 'title') == in_memory_repo.autocomplete('gu', 'title')
+
+
+def test_csv_chunks_end_on_record_boundaries(tmp_path):
+    path = tmp_path / 'movies.csv'
+    path.write_bytes(b'Rank,Title,Description\n1,A,"Two\nlines"\n2,B,"Quoted ""x"" text"\n3,C,Plain\n')
+
+    for chunk_count in range(1, 10):
+        chunks = csv_chunks(str(path), chunk_count)
+        records = [path.read_bytes()[start:end] for start, end in chunks]
+
+        assert 1 <= len(chunks) <= min(chunk_count, 3)
+        assert b''.join(records) == path.read_bytes()[len(b'Rank,Title,Description\n'):]
+        assert all(record[:1].isdigit() and record.count(b'"') % 2 == 0 for record in records)
+
+
+def test_parallel_loading_matches_serial_loading(monkeypatch):
+    serial_repo = MemoryRepository()
+    load_movies('Tests/data/', serial_repo)
+    monkeypatch.setattr('movie_web_app.adapters.memory_repository.MIN_CHUNK_BYTES', 1)
+    repo = MemoryRepository()
+    load_movies('Tests/data/', repo, workers=3)
+
+    assert repo.get_number_of_movies() == 50
+    assert repo.get_movies_by_id(range(1, 51)) == serial_repo.get_movies_by_id(range(1, 51))
+    for movie_id in range(1, 51):
+        movie, expected = repo.get_movie_by_id(movie_id), serial_repo.get_movie_by_id(movie_id)
+        assert movie.__getstate__() == expected.__getstate__()
+        assert (movie.actors, movie.genres) == (expected.actors, expected.genres)
+    assert repo.get_movies_by_genre('Action') == serial_repo.get_movies_by_genre('Action')
+    assert repo.autocomplete('chris', 'actor') == serial_repo.autocomplete('chris', 'actor')
+
+
+def test_streamed_reviews_match_loaded_reviews(in_memory_repo, tmp_path, monkeypatch):
+    monkeypatch.setattr('movie_web_app.adapters.memory_repository.RECENT_REVIEW_COUNT', 2)
+    repo = MemoryRepository()
+    populate('Tests/data/', repo, review_store_path=str(tmp_path / 'reviews.store'))
+
+    movie = repo.get_movie_by_id(1)
+    expected_movie = in_memory_repo.get_movie_by_id(1)
+    assert movie.review_count == expected_movie.review_count == 3
+    assert [review.review_text for review in movie.reviews] == \
+           [review.review_text for review in expected_movie.reviews][1:]
+    assert movie.rating == pytest.approx(expected_movie.rating)
+    assert movie.votes == expected_movie.votes
+    assert repo.get_top_movie_ids('rating', 5) == in_memory_repo.get_top_movie_ids('rating', 5)
+    assert [(review.user.username, review.review_text, review.rating, review.timestamp)
+            for review in repo.get_reviews_for_movie(1)] == \
+           [(review.user.username, review.review_text, review.rating, review.timestamp)
+            for review in in_memory_repo.get_reviews_for_movie(1)]
+
+
+def test_reviews_added_after_streaming_are_kept_in_the_review_store(tmp_path):
+    repo = MemoryRepository()
+    populate('Tests/data/', repo, review_store_path=str(tmp_path / 'reviews.store'))
+    repo.add_review(make_review('Not bad', repo.get_user('thorke'), repo.get_movie_by_id(2), 6))
+
+    assert [review.review_text for review in repo.get_reviews_for_movie(2)] == ['Not bad']
+    assert len(repo.get_reviews_for_movie(1)) == 3
+    assert repo.get_reviews_for_movie(1000) == []
+    with pytest.raises(TypeError):
+        pickle.dumps(repo)
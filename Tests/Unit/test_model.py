@@ -0,0 +1,83 @@
+from datetime import datetime
+
+from movie_web_app.domainmodel.model import User, Movie, Actor, Director, Genre, WatchList, ModelException, \
+    make_actor_association, make_director_association, make_genre_association, make_review
+
+import pytest
+
+
+@pytest.fixture()
+def movies():
+    return [Movie(title, 2016) for title in ('Split', 'Sing', 'Moana', 'Arrival')]
+
+
+def test_movie_hash_and_ordering():
+    assert hash(Movie('Moana', 2016)) == hash(Movie('Moana', 2016))
+    assert Movie('Moana', 2016) == Movie('Moana', 2016)
+    assert Movie('Moana', 2015) < Movie('Moana', 2016) < Movie('Sing', 2010)
+    assert not Movie('Moana', 2016) < Movie('Moana', 2016)
+
+
+def test_entities_have_no_instance_dict():
+    for entity in (Movie('Moana', 2016), Actor('Dwayne Johnson'), Director('Ron Clements'), Genre('Animation'),
+                   User('dbowie', '1234567890'), WatchList()):
+        assert not hasattr(entity, '__dict__')
+
+
+def test_associations_keep_the_order_movies_were_added_in(movies):
+    actor = Actor('Dwayne Johnson')
+    director = Director('Ron Clements')
+    genre = Genre('Animation')
+    for movie in movies:
+        make_actor_association(movie, actor)
+        make_director_association(movie, director)
+        make_genre_association(movie, genre)
+
+    assert list(actor.tagged_movies) == movies
+    assert list(director.tagged_movies) == movies
+    assert list(genre.movie_genres) == movies
+    assert genre.number_of_unique_movies == 4
+
+
+def test_associations_cannot_be_made_twice(movies):
+    actor = Actor('Dwayne Johnson')
+    make_actor_association(movies[0], actor)
+
+    assert actor.is_applied_to(movies[0])
+    assert not actor.is_applied_to(movies[1])
+    with pytest.raises(ModelException):
+        make_actor_association(movies[0], actor)
+
+
+def test_user_reviews_and_watched_movies_are_unique(movies):
+    user = User('dbowie', '1234567890')
+    timestamp = datetime(2020, 10, 15)
+    review = make_review('What a great movie!', user, movies[0], 9, timestamp)
+    user.add_review(review)
+    for movie in movies + movies:
+        user.watch_movie(movie)
+
+    assert list(user.reviews) == [review]
+    assert review in user.reviews
+    assert list(user.watched_movies) == movies
+
+
+def test_actor_colleagues():
+    actor = Actor('Dwayne Johnson')
+    colleague = Actor("Auli'i Cravalho")
+    actor.add_actor_colleague(colleague)
+    actor.add_actor_colleague(colleague)
+
+    assert actor.check_if_this_actor_worked_with(colleague)
+    assert list(actor.actor_colleague) == [colleague]
+
+
+def test_watchlist_keeps_unique_movies_in_order(movies):
+    watchlist = WatchList()
+    for movie in movies + movies:
+        watchlist.add_movie(movie)
+    watchlist.remove_movie(movies[1])
+
+    assert watchlist.size() == 3
+    assert list(watchlist) == [movies[0], movies[2], movies[3]]
+    assert watchlist.select_movie_to_watch(1) == movies[2]
@@ -0,0 +1,74 @@
+import math
+
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.domainmodel.model import Movie
+
+import pytest
+
+
+def make_movie(movie_id: int, year: int, runtime: int, rating: float, revenue=None) -> Movie:
+    movie = Movie(f'Movie {movie_id}', year)
+    movie.id = movie_id
+    movie.runtime_minutes = runtime
+    movie.rating = rating
+    movie.votes = movie_id * 1000
+    if revenue is not None:
+        movie.revenue = revenue
+    return movie
+
+
+@pytest.fixture()
+def columns():
+    columns = MovieColumns()
+    columns.add(make_movie(1, 2014, 121, 8.1, 333.13))
+    columns.add(make_movie(2, 2012, 124, 7.0, 126.46))
+    columns.add(make_movie(3, 2016, 117, 7.3))
+    return columns
+
+
+def test_movie_columns_store_movie_attributes(columns):
+    assert len(columns) == 3
+    assert columns.column('id').tolist() == [1, 2, 3]
+    assert columns.column('release_year').tolist() == [2014, 2012, 2016]
+    assert math.isnan(columns.column('revenue')[2])
+
+
+def test_movie_columns_filter_by_ranges(columns):
+    assert columns.filter({}).tolist() == [1, 2, 3]
+    assert columns.filter({'release_year': (2013, None)}).tolist() == [1, 3]
+    assert columns.filter({'release_year': (2013, None), 'runtime_minutes': (None, 120)}).tolist() == [3]
+    assert columns.filter({'rating': (7.0, 7.3)}).tolist() == [2, 3]
+
+
+def test_movie_columns_never_match_unavailable_values(columns):
+    assert columns.filter({'revenue': (0, None)}).tolist() == [1, 2]
+
+
+def test_movie_columns_grow_and_refresh_rows():
+    columns = MovieColumns()
+    for movie_id in range(MovieColumns.INITIAL_CAPACITY * 2 + 1):
+        columns.add(make_movie(movie_id, 2000, 90, 5.0))
+
+    movie = make_movie(7, 2000, 90, 9.5)
+    columns.add(movie)
+
+    assert len(columns) == MovieColumns.INITIAL_CAPACITY * 2 + 1
+    assert columns.filter({'rating': (9.0, None)}).tolist() == [7]
+
+
+def test_movie_columns_bulk_add_grows_once_and_skips_stored_movies(columns):
+    columns.add_many([make_movie(movie_id, 2000, 90, 5.0) for movie_id in range(1, MovieColumns.INITIAL_CAPACITY * 3 + 1)])
+
+    assert len(columns) == MovieColumns.INITIAL_CAPACITY * 3
+    assert columns.column('id').tolist()[:4] == [1, 2, 3, 4]
+    assert columns.filter({'release_year': (2000, 2000)}).tolist() == list(range(4, MovieColumns.INITIAL_CAPACITY * 3 + 1))
+
+
+def test_movie_columns_can_remove_a_movie(columns):
+    columns.remove(1)
+    columns.remove(1)
+
+    assert len(columns) == 2
+    assert columns.filter({}).tolist() == [2, 3]
+    columns.update(make_movie(3, 2016, 90, 7.3))
+    assert columns.filter({'runtime_minutes': (None, 100)}).tolist() == [3]
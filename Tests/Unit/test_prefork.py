@@ -0,0 +1,75 @@
+import gc
+import os
+
+import pytest
+
+from config import Config
+from movie_web_app import create_app
+from prefork import configuration_error, prepare_for_fork, start_worker
+
+from Tests.conftest import AuthenticationManager, TEST_DATA_PATH
+
+
+def test_prefork_needs_a_journal_to_share_changes_to_a_memory_repository(monkeypatch):
+    monkeypatch.setattr(Config, 'REPOSITORY', 'memory')
+    monkeypatch.setattr(Config, 'JOURNAL_PATH', None)
+    monkeypatch.setattr(Config, 'REVIEW_STORE_PATH', None)
+    assert 'JOURNAL_PATH' in configuration_error(Config)
+
+    monkeypatch.setattr(Config, 'JOURNAL_PATH', 'repository.journal')
+    assert configuration_error(Config) is None
+
+    monkeypatch.setattr(Config, 'REVIEW_STORE_PATH', 'reviews.store')
+    assert 'REVIEW_STORE_PATH' in configuration_error(Config)
+
+    monkeypatch.setattr(Config, 'REPOSITORY', 'sqlite')
+    assert configuration_error(Config) is None
+
+
+def fork_worker(app, work) -> int:
+    # Runs work with a client of the application in a forked worker, which exits with 1 if work fails.
+    pid = os.fork()
+    if pid == 0:
+        status = 1
+        try:
+            start_worker(app)
+            work(app.test_client())
+            status = 0
+        finally:
+            os._exit(status)
+    return pid
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='Workers are forked')
+def test_forked_workers_see_the_users_and_reviews_added_through_each_other(tmp_path):
+    app = create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': TEST_DATA_PATH,
+        'WTF_CSRF_ENABLED': False,
+        'JOURNAL_PATH': str(tmp_path / 'repository.journal'),
+    })
+    prepare_for_fork(app)
+    gc.unfreeze()
+    read_end, write_end = os.pipe()
+
+    def register_and_review(client):
+        client.post('/authentication/register',
+                    data={'username': 'gmichael', 'password': 'CarelessWhisper1984', 'confirm': 'CarelessWhisper1984'})
+        AuthenticationManager(client).login('gmichael', 'CarelessWhisper1984')
+        response = client.post('/review', data={'review': 'Guilty feet have got no rhythm', 'movie_id': 1, 'rating': 9})
+        assert response.status_code == 302
+        os.write(write_end, b'x')
+
+    def see_review(client):
+        assert os.read(read_end, 1) == b'x'
+        response = AuthenticationManager(client).login('gmichael', 'CarelessWhisper1984')
+        assert response.headers['Location'] == 'http://localhost/suggest'
+        response = client.get('/sidebar_movies_by_title?title=Guardians+of+the+Galaxy&view_reviews_for=1')
+        assert b'Guilty feet have got no rhythm' in response.data
+
+    workers = [fork_worker(app, register_and_review), fork_worker(app, see_review)]
+    statuses = [os.waitpid(pid, 0)[1] for pid in workers]
+    os.close(read_end)
+    os.close(write_end)
+
+    assert statuses == [0, 0]
@@ -0,0 +1,97 @@
+import csv
+import os
+import pickle
+import shutil
+
+import pytest
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app import create_app
+from movie_web_app.adapters.memory_repository import MemoryRepository, LoadProgress, populate
+from movie_web_app.adapters.reloader import CatalogReloader
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(TEST_DATA_PATH, path)
+    return str(path)
+
+
+def edit_movies(data_path: str, edit):
+    filename = os.path.join(data_path, 'Data1000Movies.csv')
+    with open(filename, encoding='utf-8-sig') as infile:
+        rows = list(csv.reader(infile))
+    rows = rows[:1] + edit(rows[1:])
+    with open(filename, 'w', newline='', encoding='utf-8') as outfile:
+        csv.writer(outfile).writerows(rows)
+    # The modification time may not change within the resolution of the file system's timestamps.
+    modified = os.stat(filename).st_mtime_ns + 1_000_000_000
+    os.utime(filename, ns=(modified, modified))
+
+
+def change_catalog(rows):
+    # Movie 1 gets a new description, movie 50 is removed and a movie 51 is added.
+    rows[0][3] = 'A band of misfits saves the galaxy.'
+    new_row = ['51', 'Galaxy Quest', 'Comedy,Sci-Fi', 'Actors of a science fiction show meet real aliens.',
+               'Dean Parisot', 'Tim Allen, Sigourney Weaver, Chris Pratt', '1999', '102', '7.3', '150000', '71.42', '70']
+    return rows[:-1] + [new_row]
+
+
+@pytest.fixture
+def reloader(data_path, monkeypatch):
+    monkeypatch.setattr(repo, 'repo_instance', MemoryRepository())
+    populate(data_path, repo.repo_instance)
+    progress = LoadProgress()
+    progress.finish()
+    reloader = CatalogReloader(data_path, 1, progress)
+    assert not reloader.check()
+    return reloader
+
+
+def test_reloader_applies_changed_new_and_removed_movies(reloader, data_path):
+    edit_movies(data_path, change_catalog)
+    assert reloader.check()
+    assert not reloader.check()
+    reloader.apply()
+    repository = repo.repo_instance
+
+    expected = MemoryRepository()
+    populate(data_path, expected)
+    movie = repository.get_movie_by_id(1)
+    assert movie.description == 'A band of misfits saves the galaxy.'
+    assert movie.review_count == 3
+    assert movie.__getstate__() == expected.get_movie_by_id(1).__getstate__()
+    assert len(repository.get_user('thorke').reviews) == 1
+    assert next(iter(repository.get_user('thorke').reviews)).movie is movie
+
+    assert repository.get_movie_by_id(50) is None
+    assert repository.get_number_of_movies() == 50
+    assert repository.get_movies_by_id(range(1, 52)) == expected.get_movies_by_id(range(1, 52))
+    assert repository.search_movie_by_title('last face') == []
+    assert repository.search_movie_by_title('galaxy') == expected.search_movie_by_title('galaxy')
+    assert repository.search_movies_by_text('misfits') == [movie]
+    assert repository.get_movies_by_genre('Comedy') == expected.get_movies_by_genre('Comedy')
+    assert repository.get_movies_by_facets({'release_year': (None, 2000)}) == [51]
+    assert repository.get_top_movie_ids('votes', 50) == expected.get_top_movie_ids('votes', 50)
+    assert repository.get_movies_by_actor('Charlize Theron') == expected.get_movies_by_actor('Charlize Theron')
+    assert repository.get_movies_by_actor('Chris Pratt') == expected.get_movies_by_actor('Chris Pratt')
+    assert repository.autocomplete('galaxy q', 'title') == ['Galaxy Quest']
+    assert repository.get_oldest_movie().id == 51
+    # The entity graph stays consistent enough to be pickled.
+    pickle.dumps(repository)
+
+
+def test_reloader_applies_changes_before_the_next_request(data_path):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': data_path, 'RELOAD_INTERVAL_SECONDS': 3600})
+    reloader = app.extensions['catalog_reloader']
+    reloader.check()
+    edit_movies(data_path, change_catalog)
+    # The reloader's own thread may find the change first.
+    reloader.check()
+
+    response = app.test_client().get('/sidebar_movies_by_title?title=Galaxy+Quest')
+    assert response.status_code == 200
+    assert b'Galaxy Quest' in response.data
@@ -0,0 +1,104 @@
+import os
+import shutil
+
+import pytest
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app import create_app
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.snapshot import HEADER, MAGIC, VERSION, SnapshotException, load_snapshot, read_snapshot, \
+    write_snapshot
+from movie_web_app.domainmodel.model import make_review
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+@pytest.fixture
+def data_path(tmp_path):
+    path = tmp_path / 'data'
+    shutil.copytree(TEST_DATA_PATH, path)
+    return str(path)
+
+
+@pytest.fixture
+def snapshot_path(tmp_path, data_path):
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    # A review changes the movie's rating, which has to survive the snapshot unrounded.
+    repo.add_review(make_review('Great', repo.get_user('thorke'), repo.get_movie_by_id(1), 3))
+    path = str(tmp_path / 'repository.snapshot')
+    write_snapshot(repo, path, data_path)
+    return path
+
+
+def test_snapshot_restores_entities_and_indexes(snapshot_path, data_path, in_memory_repo):
+    repo = load_snapshot(snapshot_path, data_path)
+    movie = repo.get_movie_by_id(1)
+
+    assert repo.get_number_of_movies() == in_memory_repo.get_number_of_movies()
+    assert movie.title == 'Guardians of the Galaxy'
+    assert movie.votes == in_memory_repo.get_movie_by_id(1).votes + 1
+    assert repo.get_movie('Guardians of the Galaxy', 2014) is movie
+    assert movie in repo.get_movies_by_actor('chris pratt')
+    assert movie in repo.get_movies_by_director('James Gunn')
+    assert repo.get_movies_by_genre('Action') == in_memory_repo.get_movies_by_genre('Action')
+    assert [actor.actor_full_name for actor in movie.actors] == \
+           [actor.actor_full_name for actor in in_memory_repo.get_movie_by_id(1).actors]
+    assert repo.get_oldest_movie() == in_memory_repo.get_oldest_movie()
+    assert repo.get_movies_by_release_year(2016) == in_memory_repo.get_movies_by_release_year(2016)
+    assert repo.search_movie_by_title('the') == in_memory_repo.search_movie_by_title('the')
+    assert repo.search_movies_by_text('galaxy')[0] is movie
+    assert repo.get_similar_actor_names('chris prat') == ['Chris Pratt']
+    assert repo.autocomplete('gu', 'title') == ['Guardians of the Galaxy']
+    assert repo.get_movies_by_facets({'release_year': (2014, 2014)}) == \
+           in_memory_repo.get_movies_by_facets({'release_year': (2014, 2014)})
+    assert repo.get_top_movie_ids('votes', 3) == in_memory_repo.get_top_movie_ids('votes', 3)
+    assert len(repo.get_reviews()) == len(in_memory_repo.get_reviews()) + 1
+    assert repo.get_user('thorke').password == in_memory_repo.get_user('thorke').password
+    assert len(repo.get_user('thorke').reviews) == len(in_memory_repo.get_user('thorke').reviews) + 1
+
+
+def test_snapshot_keeps_unrounded_ratings(tmp_path, data_path):
+    repo = MemoryRepository()
+    populate(data_path, repo)
+    movie = repo.get_movie_by_id(2)
+    movie.rating = 7.04
+    write_snapshot(repo, str(tmp_path / 'repository.snapshot'), data_path)
+
+    restored = load_snapshot(str(tmp_path / 'repository.snapshot'), data_path).get_movie_by_id(2)
+
+    assert restored.rating == 7.0
+    assert restored.__getstate__() == movie.__getstate__()
+
+
+def test_snapshot_is_not_loaded_once_the_data_files_change(snapshot_path, data_path):
+    reviews_path = os.path.join(data_path, 'reviews.csv')
+    stat = os.stat(reviews_path)
+    os.utime(reviews_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert load_snapshot(snapshot_path, data_path) is None
+    with pytest.raises(SnapshotException):
+        read_snapshot(snapshot_path, data_path)
+    assert read_snapshot(snapshot_path).get_number_of_movies() == 50
+
+
+def test_snapshot_of_another_version_is_not_loaded(snapshot_path, data_path):
+    with open(snapshot_path, 'r+b') as snapshot:
+        magic, version, mtime = HEADER.unpack(snapshot.read(HEADER.size))
+        snapshot.seek(0)
+        snapshot.write(HEADER.pack(MAGIC, VERSION + 1, mtime))
+
+    assert load_snapshot(snapshot_path, data_path) is None
+    assert load_snapshot(snapshot_path + '.missing', data_path) is None
+
+
+def test_app_starts_from_a_snapshot_written_by_the_cli(tmp_path, data_path, monkeypatch):
+    config = {'TESTING': True, 'TEST_DATA_PATH': data_path, 'SNAPSHOT_PATH': str(tmp_path / 'app.snapshot')}
+    result = create_app(config).test_cli_runner().invoke(args=['write-snapshot'])
+
+    assert result.exit_code == 0
+    assert os.path.exists(config['SNAPSHOT_PATH'])
+    monkeypatch.setattr('movie_web_app.populate', None)
+    create_app(config)
+    assert repo.repo_instance.get_number_of_movies() == 50
+    assert read_snapshot(config['SNAPSHOT_PATH'], data_path).get_number_of_movies() == 50
@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+from movie_web_app.adapters.memory_repository import populate
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+from movie_web_app.authentication.services import authenticate_user
+from movie_web_app.domainmodel.model import PLAINTEXT_PASSWORD_PREFIX, User, make_review
+
+from Tests.conftest import TEST_DATA_PATH
+
+
+def test_database_keeps_users_and_reviews_after_reopening(tmp_path):
+    path = str(tmp_path / 'movies.sqlite3')
+    repo = SqliteRepository(path)
+    populate(TEST_DATA_PATH, repo)
+    repo.add_user(User('dave', '123456789'))
+    repo.add_review(make_review('Not bad', repo.get_user('dave'), repo.get_movie_by_id(2), 6))
+    rating = repo.get_movie_by_id(2).rating
+    repo.close()
+
+    repo = SqliteRepository(path)
+    assert repo.get_number_of_movies() == 50
+    assert repo.get_user('dave').password == '123456789'
+    assert [review.review_text for review in repo.get_reviews_for_movie(2)] == ['Not bad']
+    assert repo.get_movie_by_id(2).rating == rating
+    assert len(repo.get_reviews()) == 4
+    repo.close()
+
+
+def test_plaintext_password_is_stored_hashed_after_first_login(tmp_path):
+    repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    populate(TEST_DATA_PATH, repo)
+    assert repo.get_user('thorke').password.startswith(PLAINTEXT_PASSWORD_PREFIX)
+
+    authenticate_user('thorke', 'cLQ^C#oFXloS', repo)
+    assert repo.get_user('thorke').password.startswith('pbkdf2')
+    authenticate_user('thorke', 'cLQ^C#oFXloS', repo)
+    repo.close()
+
+
+def test_database_is_in_wal_mode(tmp_path):
+    path = str(tmp_path / 'movies.sqlite3')
+    SqliteRepository(path).close()
+
+    connection = sqlite3.connect(path)
+    assert connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+    connection.close()
+
+
+def test_repository_can_be_used_from_many_threads(tmp_path):
+    repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    populate(TEST_DATA_PATH, repo)
+    votes = repo.get_movie_by_id(2).votes
+    errors = list()
+
+    def review(thread_number):
+        try:
+            for i in range(5):
+                movie = repo.get_movie_by_id(2)
+                repo.add_review(make_review(f'Review {thread_number}.{i}', repo.get_user('thorke'), movie, 5))
+                assert repo.search_movie_by_title('the') != []
+        except Exception as exception:
+            errors.append(exception)
+
+    threads = [threading.Thread(target=review, args=(thread_number,)) for thread_number in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert errors == []
+    assert len(repo.get_reviews_for_movie(2)) == 20
+    assert repo.get_movie_by_id(2).votes == votes + 20
+    repo.close()
@@ -3,9 +3,13 @@ import os
 
 from movie_web_app import create_app
 from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
 
 TEST_DATA_PATH = "Tests/data/"
 
+# Values of REPOSITORY that the repository and client fixtures are run with.
+REPOSITORIES = ('memory', 'sqlite')
+
 @pytest.fixture
 def in_memory_repo():
     repo = MemoryRepository()
@@ -13,12 +17,26 @@ def in_memory_repo():
     return repo
 
 
-@pytest.fixture
-def client():
+@pytest.fixture(params=REPOSITORIES)
+def repository(request, tmp_path):
+    if request.param == 'sqlite':
+        repo = SqliteRepository(str(tmp_path / 'movies.sqlite3'))
+    else:
+        repo = MemoryRepository()
+    populate(TEST_DATA_PATH, repo)
+    yield repo
+    if request.param == 'sqlite':
+        repo.close()
+
+
+@pytest.fixture(params=REPOSITORIES)
+def client(request, tmp_path):
     my_app = create_app({
         'TESTING': True,                          # Set to True during testing
         'TEST_DATA_PATH': TEST_DATA_PATH,         # Path for loading test data into the repository
-        'WTF_CSRF_ENABLED': False                 # test_client will not send a CSRF token, so disable validation
+        'WTF_CSRF_ENABLED': False,                # test_client will not send a CSRF token, so disable validation
+        'REPOSITORY': request.param,
+        'SQLITE_DATABASE_PATH': str(tmp_path / 'movies.sqlite3'),
     })
     return my_app.test_client()
 
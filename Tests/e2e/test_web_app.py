@@ -1,7 +1,12 @@
+import threading
+
 import pytest
 
 from flask import session
 
+import movie_web_app
+from movie_web_app import create_app
+
 
 def test_register(client):
     # Check that we retrieve the register page.
@@ -122,6 +127,16 @@ def test_movies_with_date(client):
     assert b'Prisoners' not in response.data
 
 
+def test_movies_with_date_link_to_adjacent_years_with_movies(client):
+    # Check that the navigation buttons skip years without any movies.
+    response = client.get('/movies_by_release_year?year=2012')
+    assert response.status_code == 200
+
+    assert b'/movies_by_release_year?year=2011' in response.data
+    assert b'/movies_by_release_year?year=2014' in response.data
+    assert b'/movies_by_release_year?year=2013' not in response.data
+
+
 def test_movies_with_review(client):
     # Check that we can retrieve the movies page:
     response = client.get('/movies_by_release_year?year=2014&view_reviews_for=1')
@@ -143,6 +158,40 @@ def test_movies_with_genre(client):
     assert b"Guardians of the Galaxy" not in response.data
 
 
+def test_movies_with_several_genres(client):
+    # Check that movies must be classified by every requested genre and by no excluded genre
+    response = client.get('/movies_by_genre?genre=Action&genre=Sci-Fi&exclude=Horror')
+    assert response.status_code == 200
+    assert b'Action and Sci-Fi but not Horror Movies' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+
+    response = client.get('/movies_by_genre?genre=Action&exclude=Sci-Fi')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' not in response.data
+
+
+def test_movies_with_facets(client):
+    response = client.get('/movies_by_facets?min_year=2014&max_year=2014&min_rating=8')
+    assert response.status_code == 200
+    assert b'Movies with year 2014 to 2014, rating at least 8' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'Prometheus' not in response.data
+
+
+def test_top_movies(client):
+    response = client.get('/top_movies?by=votes')
+    assert response.status_code == 200
+    assert b'Top Movies by votes - (10 of 50 results)' in response.data
+    assert b'Guardians of the Galaxy' in response.data
+    assert b'/top_movies?by=votes&amp;cursor=10' in response.data
+
+    response = client.get('/top_movies?by=rating&min=8.1&max=8.1')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+
+    assert client.get('/top_movies?by=title').status_code == 404
+
+
 def test_search_by_actor_fullname(client):
     # Check that we can search the movie page
     response = client.post('/sidebar', data={'actor': "Chris Pratt"})
@@ -154,6 +203,13 @@ def test_search_by_actor_fullname(client):
     assert b'Guardians of the Galaxy' in response.data
 
 
+def test_search_by_misspelled_actor_fullname_suggests_names(client):
+    response = client.get('/search_movies_by_actor_or_director?actor=Chris+Prat&director=')
+    assert response.status_code == 200
+    assert b'Did you mean' in response.data
+    assert b'/search_movies_by_actor_or_director?actor=Chris+Pratt&amp;director=' in response.data
+
+
 def test_search_by_director_fullname(client):
     # Check that we can search the movie page
     response = client.post('/sidebar', data={'director': 'David Ayer'})
@@ -175,6 +231,33 @@ def test_search_by_movie_title(client):
     assert b'Passengers' in response.data
     assert b'2016' in response.data
 
+def test_search_by_movie_description(client):
+    # Check that we can search movies by words from their descriptions
+    response = client.get('/search_movies_by_description?query=intergalactic+criminals')
+    assert response.status_code == 200
+    assert b'Guardians of the Galaxy' in response.data
+
+    response = client.get('/search_movies_by_description?query=xyzzy')
+    assert response.status_code == 200
+    assert b'(0 results)' in response.data
+
+
+def test_autocomplete(client):
+    response = client.get('/autocomplete?q=guard&kind=title')
+    assert response.status_code == 200
+    assert response.get_json() == {'query': 'guard', 'kind': 'title', 'completions': ['Guardians of the Galaxy']}
+
+    response = client.get('/autocomplete?q=david&kind=director')
+    assert 'David Ayer' in response.get_json()['completions']
+
+    assert client.get('/autocomplete?q=david&kind=studio').status_code == 400
+
+
+def test_autocomplete_limit_is_bounded(client):
+    assert len(client.get('/autocomplete?q=a&kind=actor&limit=-1').get_json()['completions']) == 1
+    assert len(client.get('/autocomplete?q=a&kind=actor&limit=1000').get_json()['completions']) <= 50
+
+
 def test_can_suggest_movies_to_a_logged_in_user(client, auth):
     # Login a user
     auth.login()
@@ -185,3 +268,93 @@ def test_can_suggest_movies_to_a_logged_in_user(client, auth):
 
     # Check that a desired movie is returned
     assert b'Rogue One' in response.data
+
+
+def test_ready(client):
+    response = client.get('/ready')
+    assert response.status_code == 200
+    assert response.get_json()['ready']
+    assert response.get_json()['movies_indexed'] == 50
+
+
+def test_requests_are_held_back_while_the_repository_loads_lazily(monkeypatch):
+    loading = threading.Event()
+    populate = movie_web_app.populate
+
+    def blocked_populate(*args):
+        loading.wait()
+        populate(*args)
+
+    monkeypatch.setattr('movie_web_app.populate', blocked_populate)
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': 'Tests/data/', 'LAZY_POPULATE': True})
+    client = app.test_client()
+
+    response = client.get('/')
+    assert response.status_code == 503
+    assert response.headers['Retry-After'] == '5'
+    response = client.get('/ready')
+    assert response.status_code == 503
+    assert response.get_json()['stage'] == 'parsing movies'
+
+    loading.set()
+    assert app.extensions['load_progress'].wait(10)
+    assert client.get('/ready').get_json()['ready']
+    assert client.get('/').status_code == 200
+
+
+def test_movies_with_reviews_from_a_review_store(tmp_path):
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': 'Tests/data/',
+                      'REVIEW_STORE_PATH': str(tmp_path / 'reviews.store')})
+    response = app.test_client().get('/movies_by_release_year?year=2014&view_reviews_for=1')
+    assert response.status_code == 200
+    assert b'Wonderful movie' in response.data
+    assert b'Came to watch with my kids, they really enjoyed it!' in response.data
+
+    response = app.test_client().get('/movies_by_release_year?year=2014')
+    assert b'Show 3 reviews' in response.data
+
+
+def test_registered_users_are_kept_in_a_sqlite_database_across_restarts(tmp_path):
+    config = {'TESTING': True, 'TEST_DATA_PATH': 'Tests/data/', 'WTF_CSRF_ENABLED': False, 'REPOSITORY': 'sqlite',
+              'SQLITE_DATABASE_PATH': str(tmp_path / 'movies.sqlite3')}
+    create_app(config).test_client().post(
+        '/authentication/register',
+        data={'username': 'gmichael', 'password': 'CarelessWhisper1984', 'confirm': 'CarelessWhisper1984'}
+    )
+
+    response = create_app(config).test_client().post(
+        '/authentication/login',
+        data={'username': 'gmichael', 'password': 'CarelessWhisper1984'}
+    )
+    assert response.headers['Location'] == 'http://localhost/suggest'
+
+
+def test_ready_reports_repository_cache_hit_rates():
+    app = create_app({'TESTING': True, 'TEST_DATA_PATH': 'Tests/data/', 'REPOSITORY_CACHE_SIZE': 100})
+    client = app.test_client()
+    client.get('/movies_by_release_year?year=2014')
+    client.get('/movies_by_release_year?year=2014')
+
+    cache = client.get('/ready').get_json()['cache']
+    assert cache['methods']['get_movies_by_release_year'] == {'hits': 1, 'misses': 1, 'hit_rate': 0.5}
+
+
+def test_registered_users_and_reviews_are_replayed_from_the_journal_after_a_restart(tmp_path):
+    config = {'TESTING': True, 'TEST_DATA_PATH': 'Tests/data/', 'WTF_CSRF_ENABLED': False,
+              'JOURNAL_PATH': str(tmp_path / 'repository.journal')}
+    client = create_app(config).test_client()
+    client.post(
+        '/authentication/register',
+        data={'username': 'gmichael', 'password': 'CarelessWhisper1984', 'confirm': 'CarelessWhisper1984'}
+    )
+    client.post('/authentication/login', data={'username': 'gmichael', 'password': 'CarelessWhisper1984'})
+    client.post('/review', data={'review': 'Never gonna dance again', 'rating': 2, 'movie_id': 2})
+
+    client = create_app(config).test_client()
+    response = client.post(
+        '/authentication/login',
+        data={'username': 'gmichael', 'password': 'CarelessWhisper1984'}
+    )
+    assert response.headers['Location'] == 'http://localhost/suggest'
+    reviews = movie_web_app.adapters.repository.repo_instance.get_reviews_for_movie(2)
+    assert 'Never gonna dance again' in [review.review_text for review in reviews]
@@ -0,0 +1,66 @@
+"""
+Measures the memory-mapped catalog file: the time to open it, to materialize a movie from it and to filter its columns,
+against its number of movies.
+
+Run from the project root:
+
+    $ python -m benchmarks.catalog_file_benchmark
+
+Opening a catalog file only maps it, so the open time and the memory it takes should stay flat as the catalog grows,
+while the file itself is shared through the page cache by every process that maps it.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+
+from movie_web_app.adapters.catalog_file import CatalogFile, write_catalog_file
+from movie_web_app.domainmodel.model import Movie, Actor, Genre
+
+SIZES = (10_000, 100_000, 1_000_000)
+LOOKUPS = 10_000
+
+
+def make_movies(size: int):
+    rng = random.Random(size)
+    genres = [Genre(f'Genre {i}') for i in range(20)]
+    for movie_id in range(1, size + 1):
+        movie = Movie(f'Movie {movie_id}', rng.randrange(1950, 2021))
+        movie.id = movie_id
+        movie.description = 'A synthetic movie description of about the usual length, ' * 3
+        movie.director = f'Director {rng.randrange(size // 16 + 1)}'
+        movie.runtime_minutes = rng.randrange(60, 200)
+        movie.rating = round(rng.uniform(1, 10), 1)
+        movie.votes = rng.randrange(1, 1_000_000)
+        movie.revenue = round(rng.uniform(0, 900), 2)
+        for i in range(4):
+            movie.add_actor(Actor(f'Actor {rng.randrange(size // 4 + 1)}'))
+        for genre in rng.sample(genres, 3):
+            movie.add_genre(genre)
+        yield movie
+
+
+def main(sizes=SIZES):
+    print(f"{'movies':>10} {'size (MB)':>10} {'open (ms)':>10} {'movie (us)':>11} {'filter (ms)':>12}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'movies.catalog')
+            write_catalog_file(make_movies(size), path)
+
+            start = time.perf_counter()
+            catalog = CatalogFile(path)
+            opened = time.perf_counter()
+            movie_ids = [random.randrange(1, size + 1) for _ in range(LOOKUPS)]
+            for movie_id in movie_ids:
+                catalog.movie(movie_id)
+            materialized = time.perf_counter()
+            catalog.filter({'release_year': (2000, 2010), 'rating': (7.0, None)})
+            filtered = time.perf_counter()
+
+            print(f"{size:>10} {os.path.getsize(path) / 1_000_000:>10.1f} {(opened - start) * 1000:>10.2f} "
+                  f"{(materialized - opened) / LOOKUPS * 1_000_000:>11.1f} {(filtered - materialized) * 1000:>12.2f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
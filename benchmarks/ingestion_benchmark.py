@@ -0,0 +1,39 @@
+"""
+Compares loading a synthetic movie catalog with one process against splitting it into chunks parsed by a pool of
+worker processes.
+
+Run from the project root, optionally giving the number of workers and the catalog sizes:
+
+    $ python -m benchmarks.ingestion_benchmark [workers] [sizes...]
+
+Only parsing and converting rows is spread over the workers; building the repository from the parsed rows stays in the
+main process, so the speed-up is bounded by the share of the load time spent parsing.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.startup_benchmark import write_catalog
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_movies
+
+SIZES = (100_000, 1_000_000)
+
+
+def time_load(data_path: str, workers: int) -> float:
+    start = time.perf_counter()
+    load_movies(data_path, MemoryRepository(), workers)
+    return time.perf_counter() - start
+
+
+def main(workers: int, sizes=SIZES):
+    print(f"{'movies':>10} {'1 worker (s)':>13} {f'{workers} workers (s)':>16}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_catalog(data_path, size)
+            print(f"{size:>10} {time_load(data_path, 1):>13.2f} {time_load(data_path, workers):>16.2f}")
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else os.cpu_count(),
+         [int(size) for size in sys.argv[2:]] or SIZES)
@@ -0,0 +1,55 @@
+"""
+Measures the write throughput of the journal as the number of concurrent writers grows, and the number of records
+each fsync covers thanks to group commit.
+
+Run from the project root:
+
+    $ python -m benchmarks.journal_benchmark
+
+Each writer thread appends reviews to a journal in a temporary directory, every append returning once its record is on
+disk. A single writer pays for one fsync per record; concurrent writers share fsyncs.
+"""
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+from movie_web_app.adapters.journal import Journal
+
+WRITER_COUNTS = (1, 4, 16, 64)
+APPENDS = 2_000
+
+
+def measure(writers: int, commit_delay: float) -> (float, float):
+    with tempfile.TemporaryDirectory() as directory:
+        journal = Journal(os.path.join(directory, 'benchmark.journal'), commit_delay=commit_delay)
+        timestamp = datetime.now()
+
+        def append_reviews(writer: int):
+            for review_number in range(APPENDS // writers):
+                journal.append_review(review_number % 1000 + 1, f'user{writer}', 'A review written for the benchmark',
+                                      7, timestamp)
+
+        threads = [threading.Thread(target=append_reviews, args=(writer,)) for writer in range(writers)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - start
+        journal.close()
+        return journal.records / elapsed, journal.records / journal.commits
+
+
+def main(writer_counts=WRITER_COUNTS):
+    print(f"{'writers':>8} {'delay (ms)':>11} {'appends/s':>10} {'records/fsync':>14}")
+    for writers in writer_counts:
+        for commit_delay in (0.0, 0.001):
+            throughput, records_per_commit = measure(writers, commit_delay)
+            print(f"{writers:>8} {commit_delay * 1000:>11.0f} {throughput:>10.0f} {records_per_commit:>14.1f}")
+
+
+if __name__ == '__main__':
+    main([int(writers) for writers in sys.argv[1:]] or WRITER_COUNTS)
@@ -0,0 +1,51 @@
+"""
+Measures MemoryRepository lookup latency by name as the number of stored entities grows.
+
+Run from the project root:
+
+    $ python -m benchmarks.lookup_benchmark
+
+Every lookup is backed by a dict keyed on name, so the reported per-lookup latency should stay roughly flat from 1k to
+1M entities.
+"""
+import random
+import sys
+import timeit
+
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.domainmodel.model import User, Actor, Director, Genre
+
+SIZES = (1_000, 10_000, 100_000, 1_000_000)
+LOOKUPS = 10_000
+
+
+def build_repository(size: int) -> MemoryRepository:
+    repo = MemoryRepository()
+    for i in range(size):
+        repo.add_user(User(f'user{i}', 'password'))
+        repo.add_actor(Actor(f'Actor {i}'))
+        repo.add_director(Director(f'Director {i}'))
+        repo.add_genre(Genre(f'Genre {i}'))
+    return repo
+
+
+def time_lookups(lookup, names) -> float:
+    """ Returns the mean latency of a single lookup in microseconds. """
+    elapsed = timeit.timeit(lambda: [lookup(name) for name in names], number=1)
+    return elapsed / len(names) * 1_000_000
+
+
+def main(sizes=SIZES):
+    print(f"{'entities':>10} {'get_user':>10} {'get_actor':>10} {'get_director':>13} {'by_genre':>10}  (us/lookup)")
+    for size in sizes:
+        repo = build_repository(size)
+        indexes = [random.randrange(size) for _ in range(LOOKUPS)]
+        print(f"{size:>10} "
+              f"{time_lookups(repo.get_user, [f'user{i}' for i in indexes]):>10.3f} "
+              f"{time_lookups(repo.get_actor, [f'Actor {i}' for i in indexes]):>10.3f} "
+              f"{time_lookups(repo.get_director, [f'Director {i}' for i in indexes]):>13.3f} "
+              f"{time_lookups(repo.get_movies_by_genre, [f'Genre {i}' for i in indexes]):>10.3f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
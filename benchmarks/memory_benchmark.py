@@ -0,0 +1,162 @@
+"""
+Measures the memory taken by Movie objects, as loaded by load_movies, and the cost of hashing them, against
+BaselineMovie, a copy of Movie as it was before it declared __slots__ and cached its hash.
+
+Run from the project root:
+
+    $ python -m benchmarks.memory_benchmark [number of movies]
+"""
+import sys
+import timeit
+import tracemalloc
+from typing import List
+
+from movie_web_app.domainmodel.model import Movie
+
+DEFAULT_SIZE = 1_000_000
+
+
+class BaselineMovie:
+    """ Movie before __slots__, limited to what build_movies sets and hashing uses. """
+
+    def __init__(self, movie_full_name: str, movie_release_year: int):
+        if movie_full_name == "" or type(movie_full_name) is not str:
+            self.__movie_full_name = None
+        else:
+            self.__movie_full_name = movie_full_name.strip()
+
+        if movie_release_year == "" or type(movie_release_year) is not int or movie_release_year < 1900:
+            self.__movie_release_year = None
+        else:
+            self.__movie_release_year = movie_release_year
+        self.__id: int = None
+        self.__title: str = None
+        self.__description: str = ""
+        self.__director = None
+        self.__actors: List = list()
+        self.__genres: List = list()
+        self.__reviews: List = list()
+        self.__runtime_minutes: int = 0
+        self.__rating = 0
+        self.__votes = 0
+        self.__revenue = 'Not Available'
+        self.__metascore = 'Not Available'
+
+    @property
+    def id(self):
+        return self.__id
+
+    @id.setter
+    def id(self, id: int):
+        self.__id = id
+
+    @property
+    def description(self):
+        return self.__description
+
+    @description.setter
+    def description(self, movie_description: str):
+        if movie_description == "" or type(movie_description) is not str:
+            self.__description = None
+        else:
+            self.__description = movie_description.strip()
+
+    @property
+    def director(self):
+        return self.__director
+
+    @director.setter
+    def director(self, movie_director):
+        self.__director = movie_director
+
+    @property
+    def runtime_minutes(self):
+        return self.__runtime_minutes
+
+    @runtime_minutes.setter
+    def runtime_minutes(self, minutes: int):
+        if minutes < 0 or type(minutes) is not int:
+            raise ValueError
+        self.__runtime_minutes = minutes
+
+    @property
+    def rating(self):
+        return round(self.__rating, 1)
+
+    @rating.setter
+    def rating(self, movie_rating: float):
+        self.__rating = movie_rating
+
+    @property
+    def votes(self):
+        return self.__votes
+
+    @votes.setter
+    def votes(self, total_votes: int):
+        self.__votes = total_votes
+
+    @property
+    def revenue(self):
+        return self.__revenue
+
+    @revenue.setter
+    def revenue(self, total_revenue):
+        if type(total_revenue) is float:
+            self.__revenue = total_revenue
+
+    @property
+    def metascore(self):
+        return self.__metascore
+
+    @metascore.setter
+    def metascore(self, current_metascore: float):
+        if type(current_metascore) is float:
+            self.__metascore = current_metascore
+
+    def __eq__(self, other):
+        return (self.__movie_full_name == other.__movie_full_name
+                and self.__movie_release_year == other.__movie_release_year)
+
+    def __hash__(self):
+        return hash(self.__movie_full_name + str(self.__movie_release_year))
+
+
+def build_movies(movie_class, size: int) -> list:
+    movies = list()
+    for i in range(size):
+        movie = movie_class(f'Synthetic Movie {i}', 1950 + i % 70)
+        movie.id = i
+        movie.description = 'A group of intergalactic criminals are forced to work together.'
+        movie.director = 'James Gunn'
+        movie.runtime_minutes = 90 + i % 60
+        movie.rating = 5.0 + i % 50 / 10
+        movie.votes = i
+        movie.revenue = float(i % 500)
+        movie.metascore = float(i % 100)
+        movies.append(movie)
+    return movies
+
+
+def measure(movie_class, size: int) -> tuple:
+    """ Returns the bytes taken by each of size movies of movie_class and the nanoseconds taken to hash one. """
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    movies = build_movies(movie_class, size)
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    # Discount the list holding the movies; titles and descriptions are counted, as loading also allocates them.
+    bytes_per_movie = (after - before - sys.getsizeof(movies)) / size
+    hash_seconds = timeit.timeit(lambda: [hash(movie) for movie in movies[:100_000]], number=1)
+    return bytes_per_movie, hash_seconds / min(size, 100_000) * 1_000_000_000
+
+
+def main(size: int = DEFAULT_SIZE):
+    print(f'{size} movies')
+    for name, movie_class in (('before', BaselineMovie), ('after', Movie)):
+        bytes_per_movie, hash_nanoseconds = measure(movie_class, size)
+        print(f'  {name + ":":<8}{bytes_per_movie:.0f} bytes per movie, {hash_nanoseconds:.0f} ns per hash')
+
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_SIZE)
@@ -0,0 +1,113 @@
+"""
+Reports the memory unique to each worker process serving the application as prefork.py does, against workers that
+each create the application and load their own repository, and against workers forked without freezing the loaded
+objects first.
+
+Run from the project root, on Linux:
+
+    $ python -m benchmarks.prefork_benchmark
+
+The catalog is synthetic, written by the snapshot benchmark, and served from a memory repository with a journal, as
+prefork.py requires. The application is prepared with prefork.prepare_for_fork and each worker is started with
+prefork.start_worker, so that they are set up exactly as prefork.py sets them up. Each worker then serves the same
+requests through the application, registering a user that the other workers pick up from the journal, and runs a full
+garbage collection, as a long running worker eventually would, before reporting its unique set size (the pages no
+other process maps) read from /proc/self/smaps_rollup.
+"""
+import gc
+import os
+import sys
+import tempfile
+
+from benchmarks.snapshot_benchmark import write_data_files
+from movie_web_app import create_app
+from prefork import prepare_for_fork, start_worker
+
+SIZE = 100_000
+WORKERS = 4
+
+
+def unique_set_size() -> int:
+    """ Returns the bytes of private clean and dirty pages of this process. """
+    size = 0
+    with open('/proc/self/smaps_rollup') as infile:
+        for line in infile:
+            if line.startswith(('Private_Clean:', 'Private_Dirty:')):
+                size += int(line.split()[1]) * 1024
+    return size
+
+
+def make_app(data_path: str):
+    return create_app({
+        'TESTING': True,
+        'TEST_DATA_PATH': data_path,
+        'WTF_CSRF_ENABLED': False,
+        'JOURNAL_PATH': os.path.join(data_path, 'repository.journal'),
+    })
+
+
+def serve(app):
+    # Requests touching a share of the catalog, and a registration journaled for the other workers.
+    client = app.test_client()
+    for year in range(1950, 2021, 5):
+        client.get(f'/movies_by_release_year?year={year}')
+    client.get('/top_movies?by=rating')
+    client.get('/sidebar_movies_by_title?title=night')
+    client.get('/autocomplete?q=the')
+    client.post('/authentication/register', data={'username': f'worker{os.getpid()}', 'password': 'Prefork1234',
+                                                  'confirm': 'Prefork1234'})
+    gc.collect()
+
+
+def fork_workers(data_path: str, app=None) -> list:
+    """
+    Forks WORKERS workers, started as prefork.py starts them from the given application or else each creating its
+    own, and returns their unique set sizes.
+    """
+    pipes = list()
+    for worker_number in range(WORKERS):
+        read_end, write_end = os.pipe()
+        if os.fork() == 0:
+            os.close(read_end)
+            if app is None:
+                worker_app = make_app(data_path)
+            else:
+                worker_app = app
+                start_worker(worker_app)
+            serve(worker_app)
+            os.write(write_end, str(unique_set_size()).encode())
+            os._exit(0)
+        os.close(write_end)
+        pipes.append(read_end)
+    sizes = list()
+    for read_end in pipes:
+        with os.fdopen(read_end) as infile:
+            sizes.append(int(infile.read()))
+    for worker_number in range(WORKERS):
+        os.wait()
+    return sizes
+
+
+def main(size: int = SIZE):
+    with tempfile.TemporaryDirectory() as data_path:
+        write_data_files(data_path, size)
+        own = fork_workers(data_path)
+
+        # As in prefork.main, the collector is paused while the master creates the application.
+        gc.disable()
+        app = make_app(data_path)
+        prepare_for_fork(app)
+        frozen = fork_workers(data_path, app)
+        # The same, had the loaded objects not been frozen before forking.
+        gc.unfreeze()
+        unfrozen = fork_workers(data_path, app)
+
+    print(f'Unique memory of each of {WORKERS} workers serving {size} movies (MB)')
+    print(f"{'worker':>7} {'own application':>16} {'preloaded':>10} {'prefork.py':>11}")
+    for worker_number, sizes in enumerate(zip(own, unfrozen, frozen), 1):
+        print(f'{worker_number:>7} ' + ' '.join(f'{size / 1_000_000:>{width}.1f}'
+                                                for size, width in zip(sizes, (16, 10, 11))))
+
+
+if __name__ == '__main__':
+    main(*[int(size) for size in sys.argv[1:2]])
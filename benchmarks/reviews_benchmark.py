@@ -0,0 +1,69 @@
+"""
+Compares the peak memory and time of loading every review into memory with streaming reviews into a review store, as
+the number of reviews grows.
+
+Run from the project root:
+
+    $ python -m benchmarks.reviews_benchmark
+
+Each run loads a synthetic catalog of 10k movies written by the startup benchmark, 1k users and the given number of
+reviews spread over them. Peak memory is traced with tracemalloc, which slows both loaders down alike.
+"""
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.startup_benchmark import write_catalog
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_movies, load_users, load_reviews, \
+    stream_reviews
+
+SIZES = (100_000, 1_000_000)
+MOVIES = 10_000
+USERS = 1_000
+
+
+def write_data_files(data_path: str, size: int):
+    write_catalog(data_path, MOVIES)
+    with open(os.path.join(data_path, 'users.csv'), 'w') as outfile:
+        outfile.write('id,username,password\n')
+        for user_id in range(1, USERS + 1):
+            outfile.write(f'{user_id},user{user_id},password{user_id}\n')
+    rng = random.Random(size)
+    with open(os.path.join(data_path, 'reviews.csv'), 'w') as outfile:
+        outfile.write('id,user-id,movie-id,review-text,ratings,timestamp\n')
+        for review_id in range(1, size + 1):
+            outfile.write(f'{review_id},{rng.randint(1, USERS)},{rng.randint(1, MOVIES)},'
+                          f'"Review number {review_id}, written for the benchmark",{rng.randint(1, 10)},'
+                          f'2020-10-15#20:26:08.937881-06:00\n')
+
+
+def measure(load_reviews_into, data_path: str) -> (float, float):
+    repo = MemoryRepository()
+    load_movies(data_path, repo)
+    users = load_users(data_path, repo)
+    tracemalloc.start()
+    start = time.perf_counter()
+    load_reviews_into(repo, users)
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 1_000_000
+
+
+def main(sizes=SIZES):
+    print(f"{'reviews':>10} {'load (s)':>9} {'peak (MB)':>10} {'stream (s)':>11} {'peak (MB)':>10}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_data_files(data_path, size)
+            store_path = os.path.join(data_path, 'reviews.store')
+            loaded, loaded_peak = measure(lambda repo, users: load_reviews(data_path, repo, users), data_path)
+            streamed, streamed_peak = measure(lambda repo, users: stream_reviews(data_path, repo, users, store_path),
+                                              data_path)
+            print(f"{size:>10} {loaded:>9.2f} {loaded_peak:>10.1f} {streamed:>11.2f} {streamed_peak:>10.1f}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -0,0 +1,63 @@
+"""
+Compares populating a MemoryRepository from CSV data files with loading it from a binary snapshot, as the catalog grows.
+
+Run from the project root:
+
+    $ python -m benchmarks.snapshot_benchmark
+
+Each synthetic catalog is written by the startup benchmark, loaded once from its data files, written as a snapshot and
+then loaded back from the snapshot.
+
+Loading a snapshot still rebuilds every movie and index entry, so its time grows with the catalog, as populating does.
+The time projected for 1M movies from the largest catalog loaded is printed against the target of a start in under a
+second; at 100k movies, loading took about 3 s, which projects to about 30 s at 1M movies, short of that target.
+"""
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.startup_benchmark import write_catalog
+from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.snapshot import read_snapshot, write_snapshot
+
+SIZES = (10_000, 100_000, 1_000_000)
+PROJECTED_SIZE = 1_000_000
+TARGET = 1.0
+
+
+def write_data_files(data_path: str, size: int):
+    write_catalog(data_path, size)
+    with open(os.path.join(data_path, 'users.csv'), 'w') as outfile:
+        outfile.write('id,username,password\n')
+    with open(os.path.join(data_path, 'reviews.csv'), 'w') as outfile:
+        outfile.write('id,user-id,movie-id,review-text,ratings,timestamp\n')
+
+
+def main(sizes=SIZES):
+    print(f"{'movies':>10} {'populate (s)':>13} {'write (s)':>10} {'size (MB)':>10} {'load (s)':>9}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_data_files(data_path, size)
+            snapshot_path = os.path.join(data_path, 'repository.snapshot')
+
+            start = time.perf_counter()
+            repo = MemoryRepository()
+            populate(data_path, repo)
+            populated = time.perf_counter()
+            write_snapshot(repo, snapshot_path, data_path)
+            written = time.perf_counter()
+            del repo
+            start_load = time.perf_counter()
+            read_snapshot(snapshot_path, data_path)
+            loaded = time.perf_counter()
+
+            print(f"{size:>10} {populated - start:>13.2f} {written - populated:>10.2f} "
+                  f"{os.path.getsize(snapshot_path) / 1_000_000:>10.1f} {loaded - start_load:>9.2f}")
+    projected = (loaded - start_load) * PROJECTED_SIZE / size
+    print(f"Projected load of {PROJECTED_SIZE} movies: {projected:.1f} s, against a target of {TARGET:.1f} s "
+          f"({'met' if projected < TARGET else 'not met'})")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
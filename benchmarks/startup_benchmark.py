@@ -0,0 +1,89 @@
+"""
+Measures the time taken to load a synthetic movie catalog into a MemoryRepository as the catalog grows.
+
+Run from the project root:
+
+    $ python -m benchmarks.startup_benchmark
+
+Each catalog is written as a Data1000Movies.csv file in a temporary directory and loaded with load_movies, which adds
+the movies through add_movies_bulk. For comparison, catalogs of up to INCREMENTAL_LIMIT rows are also loaded one
+add_movie call at a time, whose sorted insertions make loading quadratic in the number of movies.
+"""
+import csv
+import os
+import random
+import sys
+import tempfile
+import time
+
+from movie_web_app.adapters.memory_repository import MemoryRepository, load_movies
+from movie_web_app.domainmodel.model import Movie
+
+SIZES = (10_000, 100_000, 1_000_000)
+INCREMENTAL_LIMIT = 100_000
+HEADERS = ['Rank', 'Title', 'Genre', 'Description', 'Director', 'Actors', 'Year', 'Runtime (Minutes)', 'Rating',
+           'Votes', 'Revenue (Millions)', 'Metascore']
+GENRES = ['Action', 'Adventure', 'Animation', 'Biography', 'Comedy', 'Crime', 'Drama', 'Family', 'Fantasy', 'History',
+          'Horror', 'Music', 'Musical', 'Mystery', 'Romance', 'Sci-Fi', 'Sport', 'Thriller', 'War', 'Western']
+WORDS = ['the', 'night', 'last', 'city', 'love', 'war', 'dark', 'star', 'king', 'lost', 'house', 'girl', 'man', 'road',
+         'river', 'story', 'secret', 'world', 'dream', 'fire']
+
+
+def write_catalog(data_path: str, size: int):
+    rng = random.Random(size)
+    people = max(size // 4, 1)
+    with open(os.path.join(data_path, 'Data1000Movies.csv'), 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(HEADERS)
+        for movie_id in range(1, size + 1):
+            writer.writerow([
+                movie_id,
+                ' '.join(rng.choices(WORDS, k=3)).title() + f' {movie_id}',
+                ','.join(rng.sample(GENRES, 3)),
+                ' '.join(rng.choices(WORDS, k=20)),
+                f'Director {rng.randrange(people // 4 + 1)}',
+                ', '.join(f'Actor {i}' for i in rng.sample(range(people), min(people, 4))),
+                rng.randrange(1950, 2021),
+                rng.randrange(60, 200),
+                round(rng.uniform(1, 10), 1),
+                rng.randrange(1, 1_000_000),
+                round(rng.uniform(0, 900), 2) if rng.random() < 0.8 else 'N/A',
+                rng.randrange(1, 101) if rng.random() < 0.8 else 'N/A',
+            ])
+
+
+def load_incrementally(data_path: str, repo: MemoryRepository):
+    # The per-row path that load_movies used to take, without the associations.
+    with open(os.path.join(data_path, 'Data1000Movies.csv'), encoding='utf-8') as infile:
+        reader = csv.reader(infile)
+        next(reader)
+        for row in reader:
+            movie = Movie(row[1], int(row[6]))
+            movie.id = int(row[0])
+            movie.description = row[3]
+            movie.runtime_minutes = int(row[7])
+            movie.rating = float(row[8])
+            movie.votes = int(row[9])
+            movie.revenue = float(row[10]) if row[10] != 'N/A' else 'Not Available'
+            movie.metascore = float(row[11]) if row[11] != 'N/A' else 'Not Available'
+            repo.add_movie(movie)
+
+
+def time_load(load, data_path: str) -> float:
+    start = time.perf_counter()
+    load(data_path, MemoryRepository())
+    return time.perf_counter() - start
+
+
+def main(sizes=SIZES):
+    print(f"{'movies':>10} {'bulk (s)':>10} {'incremental (s)':>16}")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_path:
+            write_catalog(data_path, size)
+            bulk = time_load(load_movies, data_path)
+            incremental = f'{time_load(load_incrementally, data_path):.2f}' if size <= INCREMENTAL_LIMIT else '-'
+        print(f"{size:>10} {bulk:>10.2f} {incremental:>16}")
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
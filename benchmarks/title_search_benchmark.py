@@ -0,0 +1,46 @@
+"""
+Measures substring title search latency of the TrigramIndex used by MemoryRepository.search_movie_by_title.
+
+Run from the project root:
+
+    $ python -m benchmarks.title_search_benchmark [catalog sizes...]
+
+Titles are synthesised from a fixed vocabulary so that runs are repeatable.
+"""
+import random
+import sys
+import time
+
+from movie_web_app.adapters.indexes import TrigramIndex
+
+SIZES = (10_000, 100_000, 1_000_000)
+QUERIES = ('galaxy', 'the last', 'shadow of', 'ghost', 'dark kni', 'xyzzy')
+WORDS = ('the', 'last', 'dark', 'knight', 'galaxy', 'guardians', 'shadow', 'of', 'return', 'ghost', 'city', 'love',
+         'night', 'war', 'star', 'island', 'secret', 'kingdom', 'lost', 'storm', 'river', 'summer', 'blood', 'fire',
+         'winter', 'empire', 'dream', 'hunter', 'iron', 'silent', 'golden', 'broken', 'wild', 'queen', 'machine')
+
+
+def synthetic_titles(size: int):
+    generator = random.Random(size)
+    for _ in range(size):
+        yield ' '.join(generator.choice(WORDS) for _ in range(generator.randint(1, 5))).title()
+
+
+def main(sizes=SIZES):
+    for size in sizes:
+        index = TrigramIndex()
+        started = time.perf_counter()
+        for key, title in enumerate(synthetic_titles(size)):
+            index.add(key, title)
+        build_seconds = time.perf_counter() - started
+
+        print(f'{size} titles indexed in {build_seconds:.2f}s')
+        for query in QUERIES:
+            started = time.perf_counter()
+            matches = index.search(query)
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            print(f'    {query!r:<12} {len(matches):>8} matches {elapsed_ms:>10.3f} ms')
+
+
+if __name__ == '__main__':
+    main([int(size) for size in sys.argv[1:]] or SIZES)
@@ -16,4 +16,45 @@ class Config:
     # Flask configuration
     SECRET_KEY = os.getenv('SECRET_KEY')
     FLASK_APP = environ.get('FLASK_APP')
-    FLASK_ENV = environ.get('FLASK_ENV')
\ No newline at end of file
+    FLASK_ENV = environ.get('FLASK_ENV')
+
+    # Number of worker processes forked by prefork.py to serve requests, sharing the repository loaded before forking.
+    PREFORK_WORKERS = int(environ.get('PREFORK_WORKERS', 4))
+
+    # Search configuration
+    AUTOCOMPLETE_TIME_BUDGET_MS = int(environ.get('AUTOCOMPLETE_TIME_BUDGET_MS', 20))
+
+    # Repository configuration
+    # 'memory' keeps the repository in process memory, populated from the data files at every start. 'sqlite' keeps it
+    # in the SQLite database at SQLITE_DATABASE_PATH, populated from the data files only while the database is empty, so
+    # that users and reviews added meanwhile are kept across restarts.
+    REPOSITORY = environ.get('REPOSITORY', 'memory')
+    SQLITE_DATABASE_PATH = environ.get('SQLITE_DATABASE_PATH', 'movie_web_app.sqlite3')
+    # Guard a 'memory' repository with a reader-writer lock, so that wsgi.py serves requests on several threads. A
+    # 'sqlite' repository is always safe to share between threads.
+    THREAD_SAFE_REPOSITORY = environ.get('THREAD_SAFE_REPOSITORY', 'False').lower() in ('1', 'true', 'yes')
+    # Number of results of movie lookups by id, genre and release year cached in front of the repository, or 0 to cache
+    # none, and the seconds each is kept for at most.
+    REPOSITORY_CACHE_SIZE = int(environ.get('REPOSITORY_CACHE_SIZE', 0))
+    REPOSITORY_CACHE_TTL_SECONDS = float(environ.get('REPOSITORY_CACHE_TTL_SECONDS', 60))
+    # A snapshot written by 'flask write-snapshot' is loaded at startup instead of the data files when it is up to date.
+    SNAPSHOT_PATH = environ.get('SNAPSHOT_PATH')
+    # Movies are loaded from a catalog file written by 'flask write-catalog' instead of the movies data file, their
+    # descriptions being read from the memory-mapped file rather than held in memory. Takes the place of SNAPSHOT_PATH.
+    CATALOG_PATH = environ.get('CATALOG_PATH')
+    # Number of processes that parse the movies data file; large files are split into chunks parsed in parallel.
+    LOAD_WORKERS = int(environ.get('LOAD_WORKERS', 1))
+    # Reviews are streamed into an append-only file at this path, only their counts and latest ones staying in memory.
+    REVIEW_STORE_PATH = environ.get('REVIEW_STORE_PATH')
+    # Users and reviews added while the application runs are recorded in an append-only journal at this path, replayed
+    # at startup. Writers wait up to JOURNAL_COMMIT_DELAY_MS for others to share an fsync with. Ignored with 'sqlite'.
+    JOURNAL_PATH = environ.get('JOURNAL_PATH')
+    JOURNAL_COMMIT_DELAY_MS = float(environ.get('JOURNAL_COMMIT_DELAY_MS', 0))
+    # Seconds between checks of the movies data file for changes, which are then applied to the running application, or
+    # 0 to never check. Ignored with a review store.
+    RELOAD_INTERVAL_SECONDS = float(environ.get('RELOAD_INTERVAL_SECONDS', 0))
+    # Load the repository in a background thread instead of before serving; requests needing it wait for up to
+    # LAZY_POPULATE_WAIT_SECONDS, then get a 503 asking them to retry after LAZY_POPULATE_RETRY_AFTER_SECONDS.
+    LAZY_POPULATE = environ.get('LAZY_POPULATE', 'False').lower() in ('1', 'true', 'yes')
+    LAZY_POPULATE_WAIT_SECONDS = float(environ.get('LAZY_POPULATE_WAIT_SECONDS', 0))
+    LAZY_POPULATE_RETRY_AFTER_SECONDS = int(environ.get('LAZY_POPULATE_RETRY_AFTER_SECONDS', 5))
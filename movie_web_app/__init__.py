@@ -1,9 +1,17 @@
 import os
+import threading
 
 from flask import Flask
 
 import movie_web_app.adapters.repository as repo
-from movie_web_app.adapters.memory_repository import MemoryRepository, populate
+from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.adapters.memory_repository import MemoryRepository, LoadProgress, populate
+from movie_web_app.adapters.caching_repository import CachingRepository
+from movie_web_app.adapters.catalog_file import CatalogFile, write_catalog_command
+from movie_web_app.adapters.journal import Journal, replay_journal, compact_journal_command
+from movie_web_app.adapters.reloader import CatalogReloader
+from movie_web_app.adapters.snapshot import load_snapshot, write_snapshot_command
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
 
 
 def create_app(test_config=None):
@@ -19,13 +27,42 @@ def create_app(test_config=None):
         app.config.from_mapping(test_config)
         data_path = app.config['TEST_DATA_PATH']
 
-    # Create the MemoryRepository implementation for a memory-based repository.
-    repo.repo_instance = MemoryRepository()
-    populate(data_path, repo.repo_instance)
+    app.config['DATA_PATH'] = data_path
+
+    # Create the repository chosen by REPOSITORY. A MemoryRepository is loaded from a snapshot when an up to date one
+    # has been written and populated from the data files otherwise, its movies coming from the catalog file at
+    # CATALOG_PATH when that is set, then brought up to date from its journal when
+    # JOURNAL_PATH is set; a SqliteRepository is only populated while its database is empty. Either is wrapped in a
+    # CachingRepository when REPOSITORY_CACHE_SIZE is set. With LAZY_POPULATE, it is loaded in a background thread and
+    # installed once complete, requests being held back until then.
+    progress = LoadProgress()
+    app.extensions['load_progress'] = progress
+    if app.config['LAZY_POPULATE']:
+        repo.repo_instance = None
+        threading.Thread(target=load_repository_in_background, args=(app, data_path, progress), name='populate',
+                         daemon=True).start()
+    else:
+        repo.repo_instance = load_repository(app, data_path, progress)
+        progress.finish()
+
+    # Changes to the movies data file are picked up while the application runs. Movies replaced by a reload would lose
+    # the reviews kept in a review store, so reloading is only available without one, and only in memory.
+    if app.config['RELOAD_INTERVAL_SECONDS'] > 0 and not app.config['REVIEW_STORE_PATH'] \
+            and app.config['REPOSITORY'] == 'memory':
+        reloader = CatalogReloader(data_path, app.config['RELOAD_INTERVAL_SECONDS'], progress)
+        app.extensions['catalog_reloader'] = reloader
+        app.before_request(reloader.apply)
+        reloader.start()
+    app.cli.add_command(write_snapshot_command)
+    app.cli.add_command(write_catalog_command)
+    app.cli.add_command(compact_journal_command)
 
     # Build the application and register blueprints
     with app.app_context():
 
+        from .readiness import readiness
+        app.register_blueprint(readiness.readiness_blueprint)
+
         from .home import home
         app.register_blueprint(home.home_blueprint)
 
@@ -34,8 +71,51 @@ def create_app(test_config=None):
 
         from .authentication import authentication
         app.register_blueprint(authentication.authentication_blueprint)
+        app.cli.add_command(authentication.hash_users_command)
 
         from .utilities import utilities
         app.register_blueprint(utilities.utilities_blueprint)
 
     return app
+
+
+def load_repository(app: Flask, data_path: str, progress: LoadProgress) -> AbstractRepository:
+    if app.config['REPOSITORY'] == 'sqlite':
+        repository = SqliteRepository(app.config['SQLITE_DATABASE_PATH'])
+        if repository.get_number_of_movies() == 0:
+            populate(data_path, repository, app.config['LOAD_WORKERS'], progress)
+    elif app.config['REPOSITORY'] == 'memory':
+        catalog_path = app.config.get('CATALOG_PATH')
+        # Movies read from a catalog file can't be held in a snapshot, so a catalog takes its place.
+        snapshot_path = app.config.get('SNAPSHOT_PATH') if not catalog_path else None
+        repository = load_snapshot(snapshot_path, data_path) if snapshot_path else None
+        if repository is None:
+            repository = MemoryRepository()
+            catalog = CatalogFile(catalog_path) if catalog_path else None
+            populate(data_path, repository, app.config['LOAD_WORKERS'], progress, app.config['REVIEW_STORE_PATH'],
+                     catalog)
+        journal_path = app.config['JOURNAL_PATH']
+        if journal_path:
+            # Users and reviews added since the data files, or the snapshot, were written are replayed from the journal.
+            position = replay_journal(journal_path, repository, repository.journal_position)
+            repository.attach_journal(Journal(journal_path, position, app.config['JOURNAL_COMMIT_DELAY_MS'] / 1000))
+        if app.config['THREAD_SAFE_REPOSITORY']:
+            repository.make_thread_safe()
+    else:
+        raise ValueError(f"REPOSITORY is {app.config['REPOSITORY']!r}, expected 'memory' or 'sqlite'")
+
+    if app.config['REPOSITORY_CACHE_SIZE'] > 0:
+        repository = CachingRepository(repository, app.config['REPOSITORY_CACHE_SIZE'],
+                                       app.config['REPOSITORY_CACHE_TTL_SECONDS'])
+    return repository
+
+
+def load_repository_in_background(app: Flask, data_path: str, progress: LoadProgress):
+    try:
+        repository = load_repository(app, data_path, progress)
+    except Exception as exception:
+        app.logger.exception('Loading the repository failed')
+        progress.finish(f'{type(exception).__name__}: {exception}')
+        return
+    repo.repo_instance = repository
+    progress.finish()
@@ -0,0 +1,242 @@
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import List
+
+from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList
+
+
+class CachingRepository(AbstractRepository):
+    """
+    A repository that keeps the results of the hottest lookups of another repository in memory: movies by id, movie
+    ids by genre and movies by release year. Other calls go straight to the wrapped repository.
+
+    At most max_entries results are kept, the least recently used being evicted first, and each for at most ttl
+    seconds, so that a change the cache doesn't see, such as one made by another process sharing a database, shows
+    within ttl seconds. Writes through the cache drop the results they change.
+    """
+    CACHED_METHODS = ('get_movie_by_id', 'get_movies_by_genre', 'get_movies_by_release_year')
+
+    def __init__(self, repository: AbstractRepository, max_entries: int, ttl: float):
+        self.__repository = repository
+        self.__max_entries = max_entries
+        self.__ttl = ttl
+        # Results keyed by (method name, argument), each with the time it expires, least recently used first.
+        self.__entries = OrderedDict()
+        # Counts invalidations, so that a result looked up while a write dropped it is not cached.
+        self.__generation = 0
+        self.__lock = threading.Lock()
+        self.__hits = dict.fromkeys(self.CACHED_METHODS, 0)
+        self.__misses = dict.fromkeys(self.CACHED_METHODS, 0)
+        self.__evictions = 0
+        self.__expirations = 0
+
+    @property
+    def repository(self) -> AbstractRepository:
+        """ The wrapped repository. """
+        return self.__repository
+
+    def stats(self) -> dict:
+        """ Returns the number of hits and misses and the hit rate of each cached method and of all of them. """
+        with self.__lock:
+            methods = {name: _rates(self.__hits[name], self.__misses[name]) for name in self.CACHED_METHODS}
+            overall = _rates(sum(self.__hits.values()), sum(self.__misses.values()))
+            return {
+                'entries': len(self.__entries),
+                'max_entries': self.__max_entries,
+                'ttl_seconds': self.__ttl,
+                'evictions': self.__evictions,
+                'expirations': self.__expirations,
+                **overall,
+                'methods': methods,
+            }
+
+    def clear(self):
+        with self.__lock:
+            self.__generation += 1
+            self.__entries.clear()
+
+    def add_user(self, user: User):
+        self.__repository.add_user(user)
+
+    def get_user(self, username) -> User:
+        return self.__repository.get_user(username)
+
+    def update_user_password(self, user: User):
+        self.__repository.update_user_password(user)
+
+    def add_actor(self, actor: Actor):
+        self.__repository.add_actor(actor)
+
+    def get_actor(self, actor_full_name) -> Actor:
+        return self.__repository.get_actor(actor_full_name)
+
+    def add_director(self, director: Director):
+        self.__repository.add_director(director)
+
+    def get_director(self, director_full_name) -> Director:
+        return self.__repository.get_director(director_full_name)
+
+    def add_genre(self, genre: Genre):
+        self.__repository.add_genre(genre)
+        # A genre may come associated with movies, which it then classifies.
+        if isinstance(genre, Genre):
+            self.__invalidate([('get_movies_by_genre', genre.genre_full_name)])
+
+    def get_genres(self) -> List[Genre]:
+        return self.__repository.get_genres()
+
+    def add_movie(self, movie: Movie):
+        self.__repository.add_movie(movie)
+        if isinstance(movie, Movie):
+            self.__invalidate(_movie_keys(movie))
+
+    def add_movies_bulk(self, movies, actors=(), directors=(), genres=()):
+        movies = list(movies)
+        genres = list(genres)
+        self.__repository.add_movies_bulk(movies, actors, directors, genres)
+        self.__invalidate([key for movie in movies if isinstance(movie, Movie) for key in _movie_keys(movie)] +
+                          [('get_movies_by_genre', genre.genre_full_name) for genre in genres
+                           if isinstance(genre, Genre)])
+
+    def get_movie(self, title: str, release_year: int):
+        return self.__repository.get_movie(title, release_year)
+
+    def get_movies_by_release_year(self, target_year: int) -> List[Movie]:
+        return list(self.__cached('get_movies_by_release_year', target_year))
+
+    def get_movies_by_actor(self, actor_fullname: str) -> List[Movie]:
+        return self.__repository.get_movies_by_actor(actor_fullname)
+
+    def get_movies_by_director(self, director_fullname: str) -> List[Movie]:
+        return self.__repository.get_movies_by_director(director_fullname)
+
+    def get_similar_actor_names(self, actor_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        return self.__repository.get_similar_actor_names(actor_fullname, max_distance, limit)
+
+    def get_similar_director_names(self, director_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        return self.__repository.get_similar_director_names(director_fullname, max_distance, limit)
+
+    def autocomplete(self, prefix: str, kind: str, limit: int = 10, time_budget: float = None) -> List[str]:
+        return self.__repository.autocomplete(prefix, kind, limit, time_budget)
+
+    def search_movie_by_title(self, title: str) -> List[Movie]:
+        return self.__repository.search_movie_by_title(title)
+
+    def search_movies_by_text(self, query: str, limit: int = 20) -> List[Movie]:
+        return self.__repository.search_movies_by_text(query, limit)
+
+    def get_newest_movie(self):
+        return self.__repository.get_newest_movie()
+
+    def get_oldest_movie(self):
+        return self.__repository.get_oldest_movie()
+
+    def get_release_year_of_previous_movie(self, movie: Movie):
+        return self.__repository.get_release_year_of_previous_movie(movie)
+
+    def get_release_year_of_next_movie(self, movie: Movie):
+        return self.__repository.get_release_year_of_next_movie(movie)
+
+    def get_number_of_movies(self):
+        return self.__repository.get_number_of_movies()
+
+    def get_movie_by_id(self, index: int):
+        return self.__cached('get_movie_by_id', index)
+
+    def get_movies_by_id(self, index_list):
+        return self.__repository.get_movies_by_id(index_list)
+
+    def get_movies_by_genre(self, genre_name: str):
+        return list(self.__cached('get_movies_by_genre', genre_name))
+
+    def get_movies_by_genres(self, genre_names, excluded_genre_names=()):
+        return self.__repository.get_movies_by_genres(genre_names, excluded_genre_names)
+
+    def get_movies_by_facets(self, facets: dict):
+        return self.__repository.get_movies_by_facets(facets)
+
+    def get_top_movie_ids(self, attribute: str, limit: int, offset: int = 0) -> List[int]:
+        return self.__repository.get_top_movie_ids(attribute, limit, offset)
+
+    def get_movie_ids_by_range(self, attribute: str, low=None, high=None) -> List[int]:
+        return self.__repository.get_movie_ids_by_range(attribute, low, high)
+
+    def get_number_of_ranked_movies(self, attribute: str) -> int:
+        return self.__repository.get_number_of_ranked_movies(attribute)
+
+    def add_review(self, review: Review):
+        self.__repository.add_review(review)
+        # The review changes the reviews and rating of its movie, wherever the movie is listed.
+        self.__invalidate(_movie_keys(review.movie, with_genres=False))
+
+    def add_review_for(self, movie_id: int, username: str, review_text: str, rating: int,
+                       timestamp: datetime = None) -> Review:
+        review = self.__repository.add_review_for(movie_id, username, review_text, rating, timestamp)
+        if review is not None:
+            self.__invalidate(_movie_keys(review.movie, with_genres=False))
+        return review
+
+    def get_reviews(self) -> List[Review]:
+        return self.__repository.get_reviews()
+
+    def get_reviews_for_movie(self, movie_id: int) -> List[Review]:
+        return self.__repository.get_reviews_for_movie(movie_id)
+
+    def add_watchlist(self, watchlist: WatchList):
+        self.__repository.add_watchlist(watchlist)
+
+    def get_watchlist(self) -> List[WatchList]:
+        return self.__repository.get_watchlist()
+
+    def user_recommendations_by_genre(self, username: str) -> List[Movie]:
+        return self.__repository.user_recommendations_by_genre(username)
+
+    def __cached(self, method_name: str, argument):
+        key = (method_name, argument)
+        now = time.monotonic()
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is not None:
+                expires, result = entry
+                if expires > now:
+                    self.__entries.move_to_end(key)
+                    self.__hits[method_name] += 1
+                    return result
+                del self.__entries[key]
+                self.__expirations += 1
+            self.__misses[method_name] += 1
+            generation = self.__generation
+
+        # The wrapped repository is called without holding the lock, so that a slow lookup doesn't hold back others.
+        result = getattr(self.__repository, method_name)(argument)
+        with self.__lock:
+            if generation != self.__generation:
+                return result
+            self.__entries[key] = (now + self.__ttl, result)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.__max_entries:
+                self.__entries.popitem(last=False)
+                self.__evictions += 1
+        return result
+
+    def __invalidate(self, keys):
+        with self.__lock:
+            self.__generation += 1
+            for key in keys:
+                self.__entries.pop(key, None)
+
+
+def _movie_keys(movie: Movie, with_genres: bool = True) -> list:
+    # Keys of the cached results that list movie.
+    keys = [('get_movie_by_id', movie.id), ('get_movies_by_release_year', movie.release_year)]
+    if with_genres:
+        keys.extend(('get_movies_by_genre', genre.genre_full_name) for genre in movie.genres)
+    return keys
+
+
+def _rates(hits: int, misses: int) -> dict:
+    lookups = hits + misses
+    return {'hits': hits, 'misses': misses, 'hit_rate': round(hits / lookups, 4) if lookups > 0 else None}
@@ -0,0 +1,215 @@
+"""
+A columnar file of the movie catalog that is memory-mapped rather than read, so that every process opening it shares
+the one copy held in the operating system's page cache, and nothing is decoded until it is used.
+
+The file starts with a header holding a magic string, the format version and the number of movies, followed by a
+directory of section offsets and then the sections themselves, each aligned to 8 bytes:
+
+* one fixed-width array per numeric column of MovieColumns.COLUMNS, with a row per movie in ascending id order;
+* one string heap per text column, made of an array of len + 1 byte offsets followed by the UTF-8 encoded texts, the
+  text of row i spanning offsets i to i + 1. Actor and genre names are joined by a unit separator.
+"""
+import mmap
+import struct
+from collections import OrderedDict
+
+import click
+from flask import current_app
+import numpy as np
+from flask.cli import with_appcontext
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.movie_columns import MovieColumns, filter_columns
+from movie_web_app.domainmodel.model import Movie, Actor, Genre
+
+MAGIC = b'MWACAT'
+VERSION = 1
+HEADER = struct.Struct('<6sHq')
+TEXT_COLUMNS = ('title', 'description', 'director', 'actors', 'genres')
+NAME_SEPARATOR = '\x1f'
+ALIGNMENT = 8
+
+
+class CatalogFileException(Exception):
+    pass
+
+
+def write_catalog_file(movies, catalog_path: str):
+    """ Writes the given movies to a catalog file at catalog_path. """
+    movies = sorted(movies, key=lambda movie: movie.id)
+    columns = MovieColumns()
+    columns.add_many(movies)
+    texts = {
+        'title': [movie.title or '' for movie in movies],
+        'description': [movie.description or '' for movie in movies],
+        'director': [movie.director or '' for movie in movies],
+        'actors': [NAME_SEPARATOR.join(actor.actor_full_name for actor in movie.actors) for movie in movies],
+        'genres': [NAME_SEPARATOR.join(genre.genre_full_name for genre in movie.genres) for movie in movies],
+    }
+
+    sections = [columns.column(name).tobytes() for name in MovieColumns.COLUMNS]
+    for name in TEXT_COLUMNS:
+        encoded = [text.encode('utf-8') for text in texts[name]]
+        offsets = np.zeros(len(encoded) + 1, np.uint64)
+        np.cumsum([len(text) for text in encoded], out=offsets[1:])
+        sections.append(offsets.tobytes())
+        sections.append(b''.join(encoded))
+
+    directory = struct.Struct(f'<{len(sections)}q')
+    position = _aligned(HEADER.size + directory.size)
+    section_offsets = list()
+    for section in sections:
+        section_offsets.append(position)
+        position = _aligned(position + len(section))
+
+    with open(catalog_path, 'wb') as outfile:
+        outfile.write(HEADER.pack(MAGIC, VERSION, len(movies)))
+        outfile.write(directory.pack(*section_offsets))
+        for offset, section in zip(section_offsets, sections):
+            outfile.write(b'\0' * (offset - outfile.tell()))
+            outfile.write(section)
+
+
+class CatalogFile:
+    """
+    A read-only, memory-mapped catalog file. Numeric columns are NumPy arrays over the mapped pages, so filtering them
+    copies nothing, and a Movie is only built from the file when it is first asked for. The most recently used movies
+    are kept, up to MOVIE_CACHE_SIZE of them.
+
+    Movies built from the file are detached from the rest of the domain model: their actors and genres are new
+    entities that don't list the movie among their own.
+    """
+    MOVIE_CACHE_SIZE = 4096
+
+    def __init__(self, catalog_path: str):
+        with open(catalog_path, 'rb') as infile:
+            self.__buffer = mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self.__buffer) < HEADER.size:
+            raise CatalogFileException(f'{catalog_path} is not a catalog file')
+        magic, version, self.__size = HEADER.unpack_from(self.__buffer)
+        if magic != MAGIC:
+            raise CatalogFileException(f'{catalog_path} is not a catalog file')
+        if version != VERSION:
+            raise CatalogFileException(f'{catalog_path} has catalog version {version}, expected {VERSION}')
+
+        section_count = len(MovieColumns.COLUMNS) + 2 * len(TEXT_COLUMNS)
+        offsets = iter(struct.unpack_from(f'<{section_count}q', self.__buffer, HEADER.size))
+        self.__columns = {name: np.frombuffer(self.__buffer, dtype, self.__size, next(offsets))
+                          for name, dtype in MovieColumns.COLUMNS.items()}
+        # Each text column is the array of offsets of its texts along with the position of the texts themselves.
+        self.__texts = {name: (np.frombuffer(self.__buffer, np.uint64, self.__size + 1, next(offsets)), next(offsets))
+                        for name in TEXT_COLUMNS}
+        self.__movies = OrderedDict()
+
+    def __len__(self):
+        return self.__size
+
+    def column(self, name: str) -> np.ndarray:
+        """ Returns the named numeric column, a read-only array over the mapped file. """
+        return self.__columns[name]
+
+    def text(self, name: str, row: int) -> str:
+        offsets, start = self.__texts[name]
+        return self.__buffer[start + int(offsets[row]):start + int(offsets[row + 1])].decode('utf-8')
+
+    def row_of(self, movie_id: int):
+        """ Returns the row holding the movie with the given id, or None if there is no such movie. """
+        ids = self.__columns['id']
+        row = int(np.searchsorted(ids, movie_id))
+        return row if row < self.__size and ids[row] == movie_id else None
+
+    def movie(self, movie_id: int) -> Movie:
+        """ Returns the movie with the given id, or None if there is no such movie. """
+        movie = self.__movies.get(movie_id)
+        if movie is not None:
+            self.__movies.move_to_end(movie_id)
+            return movie
+
+        row = self.row_of(movie_id)
+        if row is None:
+            return None
+        movie = self.__movie_at(row)
+        self.__movies[movie_id] = movie
+        if len(self.__movies) > self.MOVIE_CACHE_SIZE:
+            self.__movies.popitem(last=False)
+        return movie
+
+    def filter(self, ranges: dict) -> np.ndarray:
+        """ Returns the ids of the movies whose values lie within every given range, as for MovieColumns.filter. """
+        return filter_columns(self.__columns, ranges)
+
+    def named_movies(self):
+        """
+        Yields a CatalogMovie for each row, in id order, along with the names of its genres, director and actors, for
+        a repository to associate with its own genres and people.
+        """
+        for row in range(self.__size):
+            movie = self.__with_values(CatalogMovie(self.text('title', row), self.__release_year(row), self, row), row)
+            yield movie, _names(self.text('genres', row)), self.text('director', row) or None, \
+                _names(self.text('actors', row))
+
+    def __release_year(self, row: int):
+        release_year = self.__columns['release_year'][row]
+        return None if np.isnan(release_year) else int(release_year)
+
+    def __with_values(self, movie: Movie, row: int) -> Movie:
+        # Sets the values of the numeric columns of row.
+        movie.id = int(self.__columns['id'][row])
+        movie.runtime_minutes = int(self.__columns['runtime_minutes'][row])
+        movie.rating = float(self.__columns['rating'][row])
+        movie.votes = int(self.__columns['votes'][row])
+        for name in ('revenue', 'metascore'):
+            value = float(self.__columns[name][row])
+            setattr(movie, name, 'Not Available' if np.isnan(value) else value)
+        return movie
+
+    def __movie_at(self, row: int) -> Movie:
+        movie = self.__with_values(Movie(self.text('title', row), self.__release_year(row)), row)
+        movie.description = self.text('description', row)
+        movie.director = self.text('director', row) or None
+        for actor_name in _names(self.text('actors', row)):
+            movie.add_actor(Actor(actor_name))
+        for genre_name in _names(self.text('genres', row)):
+            movie.add_genre(Genre(genre_name))
+        return movie
+
+
+class CatalogMovie(Movie):
+    """
+    A movie of a repository loaded from a catalog file. Its description, the bulk of the catalog, is not held in memory
+    but decoded from the mapped file whenever it is asked for, so that it stays in the one page-cache copy shared by
+    every process.
+    """
+    __slots__ = ('__catalog', '__row')
+
+    def __init__(self, movie_full_name: str, movie_release_year: int, catalog: CatalogFile, row: int):
+        super().__init__(movie_full_name, movie_release_year)
+        self.__catalog = catalog
+        self.__row = row
+
+    @property
+    def description(self):
+        return self.__catalog.text('description', self.__row).strip() or None
+
+    def __getstate__(self):
+        raise TypeError('A movie read from a catalog file cannot be pickled')
+
+
+def _aligned(position: int) -> int:
+    return -(-position // ALIGNMENT) * ALIGNMENT
+
+
+def _names(text: str) -> list:
+    return text.split(NAME_SEPARATOR) if text else []
+
+
+@click.command('write-catalog')
+@click.argument('catalog_path')
+@with_appcontext
+def write_catalog_command(catalog_path):
+    """ Writes the movies of the repository to a memory-mappable catalog file at CATALOG_PATH. """
+    # With LAZY_POPULATE the repository may still be loading.
+    current_app.extensions['load_progress'].wait()
+    movie_ids = repo.repo_instance.get_movies_by_facets(dict())
+    write_catalog_file(repo.repo_instance.get_movies_by_id(movie_ids), catalog_path)
+    click.echo(f'Wrote {len(movie_ids)} movies to {catalog_path}')
@@ -0,0 +1,418 @@
+import heapq
+import math
+import re
+import time
+import unicodedata
+from bisect import bisect_left, bisect_right, insort_left
+from operator import itemgetter
+
+
+def normalize_name(name: str) -> str:
+    """
+    Returns the key used to look up a person by name: accents are stripped, runs of whitespace are collapsed into a
+    single space and the result is casefolded, so that "  Penélope  CRUZ" and "penelope cruz" share the same key.
+    """
+    decomposed = unicodedata.normalize('NFKD', name)
+    without_accents = ''.join(char for char in decomposed if not unicodedata.combining(char))
+    return ' '.join(without_accents.split()).casefold()
+
+
+def bitset_to_ids(bitset: int) -> list:
+    """ Returns the positions of the set bits of bitset in ascending order. """
+    # Scanning the binary representation keeps the work per set bit constant, whereas clearing the lowest set bit of
+    # a large int copies the whole int every time.
+    bits = bin(bitset)[:1:-1]
+    ids = list()
+    position = bits.find('1')
+    while position != -1:
+        ids.append(position)
+        position = bits.find('1', position + 1)
+    return ids
+
+
+def tokenize(text: str) -> list:
+    """ Splits text into casefolded, accent-free word tokens. """
+    return re.findall(r'\w+', normalize_name(text))
+
+
+class TrigramIndex:
+    """
+    An inverted index from every three-character substring (trigram) of some indexed texts to the keys of the texts
+    containing it. Substring queries intersect the posting lists of the query's trigrams, starting from the shortest,
+    and then verify the few remaining candidates against their full text. Matching is case-insensitive.
+    """
+    GRAM_LENGTH = 3
+
+    def __init__(self):
+        self.__postings = dict()
+        self.__texts = dict()
+        # Keys of texts too short to contain a single trigram.
+        self.__short_keys = set()
+
+    def __len__(self):
+        return len(self.__texts)
+
+    def add(self, key, text: str):
+        text = text.lower()
+        self.__texts[key] = text
+        grams = self.__grams(text)
+        if len(grams) == 0:
+            self.__short_keys.add(key)
+        for gram in grams:
+            self.__postings.setdefault(gram, set()).add(key)
+
+    def remove(self, key):
+        text = self.__texts.pop(key, None)
+        if text is None:
+            return
+        self.__short_keys.discard(key)
+        for gram in self.__grams(text):
+            posting = self.__postings[gram]
+            posting.discard(key)
+            if len(posting) == 0:
+                del self.__postings[gram]
+
+    def search(self, query: str) -> set:
+        """ Returns the keys of the texts that contain query. An empty query matches every text. """
+        query = query.lower()
+        if len(query) == 0:
+            return set(self.__texts)
+
+        if len(query) < self.GRAM_LENGTH:
+            # The query is shorter than a trigram, so any matching text either contains a trigram that contains the
+            # query or is itself too short to have been split into trigrams.
+            candidates = set(self.__short_keys)
+            for gram, posting in self.__postings.items():
+                if query in gram:
+                    candidates |= posting
+        else:
+            postings = list()
+            for gram in self.__grams(query):
+                posting = self.__postings.get(gram)
+                if posting is None:
+                    return set()
+                postings.append(posting)
+            postings.sort(key=len)
+            candidates = postings[0].intersection(*postings[1:])
+
+        return {key for key in candidates if query in self.__texts[key]}
+
+    def __grams(self, text: str) -> set:
+        return {text[i:i + self.GRAM_LENGTH] for i in range(len(text) - self.GRAM_LENGTH + 1)}
+
+
+class BM25Index:
+    """
+    A full-text inverted index that ranks documents with the Okapi BM25 function. Each term maps to the frequency of
+    the term in every document containing it. Collection statistics are kept as running totals, so documents can be
+    added one at a time without ever rebuilding the index.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.__k1 = k1
+        self.__b = b
+        self.__postings = dict()
+        self.__document_lengths = dict()
+        self.__total_length = 0
+
+    def __len__(self):
+        return len(self.__document_lengths)
+
+    def add(self, key, fields):
+        """
+        Indexes the document identified by key. fields is an iterable of (text, weight) pairs; each token of a field
+        counts weight times towards its term frequency, which lets titles outweigh descriptions.
+        """
+        frequencies = dict()
+        for text, weight in fields:
+            if text is None:
+                continue
+            for token in tokenize(text):
+                frequencies[token] = frequencies.get(token, 0) + weight
+
+        length = sum(frequencies.values())
+        self.__document_lengths[key] = length
+        self.__total_length += length
+        for term, frequency in frequencies.items():
+            self.__postings.setdefault(term, dict())[key] = frequency
+
+    def remove(self, key, fields):
+        """
+        Removes the document identified by key. fields must be those the document was added with, since the index
+        doesn't keep the terms of each document.
+        """
+        length = self.__document_lengths.pop(key, None)
+        if length is None:
+            return
+        self.__total_length -= length
+        for text, weight in fields:
+            if text is None:
+                continue
+            for token in set(tokenize(text)):
+                posting = self.__postings.get(token)
+                if posting is not None and posting.pop(key, None) is not None and len(posting) == 0:
+                    del self.__postings[token]
+
+    def search(self, query: str, limit: int = 10) -> list:
+        """ Returns up to limit (key, score) pairs for the documents best matching query, best match first. """
+        document_count = len(self.__document_lengths)
+        if document_count == 0:
+            return list()
+        average_length = self.__total_length / document_count
+
+        scores = dict()
+        for term in set(tokenize(query)):
+            posting = self.__postings.get(term)
+            if posting is None:
+                continue
+            idf = math.log(1 + (document_count - len(posting) + 0.5) / (len(posting) + 0.5))
+            for key, frequency in posting.items():
+                length_norm = self.__k1 * (1 - self.__b + self.__b * self.__document_lengths[key] / average_length)
+                scores[key] = scores.get(key, 0.0) + idf * frequency * (self.__k1 + 1) / (frequency + length_norm)
+
+        return heapq.nlargest(limit, scores.items(), key=itemgetter(1))
+
+
+def levenshtein_distance(source: str, target: str, max_distance: int = None) -> int:
+    """
+    Returns the edit distance between source and target. When max_distance is given, the computation stops as soon as
+    the distance is known to exceed it and max_distance + 1 is returned instead.
+    """
+    if len(source) < len(target):
+        source, target = target, source
+    if max_distance is not None and len(source) - len(target) > max_distance:
+        return max_distance + 1
+
+    # A shared prefix or suffix never adds to the distance, so it is trimmed before filling in the table.
+    start = 0
+    while start < len(target) and source[start] == target[start]:
+        start += 1
+    end = 0
+    while end < len(target) - start and source[-1 - end] == target[-1 - end]:
+        end += 1
+    source = source[start:len(source) - end]
+    target = target[start:len(target) - end]
+
+    previous_row = list(range(len(target) + 1))
+    for i, source_char in enumerate(source, 1):
+        current_row = [i]
+        for j, target_char in enumerate(target, 1):
+            current_row.append(min(previous_row[j] + 1,
+                                   current_row[j - 1] + 1,
+                                   previous_row[j - 1] + (source_char != target_char)))
+        if max_distance is not None and min(current_row) > max_distance:
+            return max_distance + 1
+        previous_row = current_row
+    return previous_row[-1]
+
+
+class BKTree:
+    """
+    A Burkhard-Keller tree of words under the Levenshtein metric. Each child hangs off its parent at their edit
+    distance, so by the triangle inequality a search only needs to descend into children whose distance lies within
+    max_distance of the distance between the query and the parent, pruning most of the tree.
+    """
+
+    def __init__(self):
+        # Each node is a (word, children) pair, where children maps an edit distance to a child node.
+        self.__root = None
+        self.__size = 0
+
+    def __len__(self):
+        return self.__size
+
+    def add(self, word: str):
+        if self.__root is None:
+            self.__root = (word, dict())
+            self.__size += 1
+            return
+
+        node_word, children = self.__root
+        while True:
+            distance = levenshtein_distance(word, node_word)
+            if distance == 0:
+                return
+            child = children.get(distance)
+            if child is None:
+                children[distance] = (word, dict())
+                self.__size += 1
+                return
+            node_word, children = child
+
+    def search(self, word: str, max_distance: int) -> list:
+        """ Returns (distance, word) pairs for the stored words within max_distance of word, closest first. """
+        matches = list()
+        nodes = [self.__root] if self.__root is not None else []
+        while nodes:
+            node_word, children = nodes.pop()
+            # Pruning the children needs the exact distance, so it isn't computed with a cut-off.
+            distance = levenshtein_distance(word, node_word)
+            if distance <= max_distance:
+                matches.append((distance, node_word))
+            nodes.extend(child for child_distance, child in children.items()
+                         if distance - max_distance <= child_distance <= distance + max_distance)
+        matches.sort()
+        return matches
+
+    def __getstate__(self):
+        # The tree is pickled as a flat list of (word, parent position, distance) nodes, parents first, since pickling
+        # the nested nodes recurses once per level and deep trees exceed the recursion limit.
+        nodes = list()
+        pending = [(self.__root, None, None)] if self.__root is not None else []
+        while pending:
+            (word, children), parent, distance = pending.pop()
+            nodes.append((word, parent, distance))
+            position = len(nodes) - 1
+            pending.extend((child, position, child_distance) for child_distance, child in children.items())
+        # The state is never empty, as pickle skips __setstate__ for an empty state.
+        return {'nodes': nodes}
+
+    def __setstate__(self, state):
+        nodes = state['nodes']
+        children_of = list()
+        for word, parent, distance in nodes:
+            children = dict()
+            if parent is not None:
+                children_of[parent][distance] = (word, children)
+            children_of.append(children)
+        self.__root = (nodes[0][0], children_of[0]) if nodes else None
+        self.__size = len(nodes)
+
+
+class PrefixIndex:
+    """
+    A sorted array of (key, value) entries answering prefix queries: the entries whose keys start with a prefix form a
+    contiguous range that starts at the prefix's bisection point. Keys are normalized names, so matching ignores case,
+    accents and spacing.
+    """
+    # Number of entries examined between two checks of the time budget.
+    BUDGET_CHECK_INTERVAL = 256
+
+    def __init__(self):
+        self.__entries = list()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def add(self, text: str, value, all_words: bool = True):
+        """
+        Indexes value under text. With all_words, value is also indexed under every word suffix of text, so that
+        "gal" completes "Guardians of the Galaxy".
+        """
+        key = normalize_name(text)
+        keys = [key]
+        if all_words:
+            words = key.split(' ')
+            keys = [' '.join(words[i:]) for i in range(len(words))]
+        for key in keys:
+            insort_left(self.__entries, (key, value))
+
+    def add_many(self, items, all_words: bool = True):
+        """ Indexes every (text, value) pair of items, sorting the entries once rather than inserting each. """
+        for text, value in items:
+            key = normalize_name(text)
+            if all_words:
+                words = key.split(' ')
+                self.__entries.extend((' '.join(words[i:]), value) for i in range(len(words)))
+            else:
+                self.__entries.append((key, value))
+        self.__entries.sort()
+
+    def remove(self, text: str, value, all_words: bool = True):
+        """ Removes value from under text, and from under its word suffixes if it was added with all_words. """
+        key = normalize_name(text)
+        keys = [key]
+        if all_words:
+            words = key.split(' ')
+            keys = [' '.join(words[i:]) for i in range(len(words))]
+        for key in keys:
+            position = bisect_left(self.__entries, (key, value))
+            if position < len(self.__entries) and self.__entries[position] == (key, value):
+                del self.__entries[position]
+
+    def complete(self, prefix: str, weight, limit: int = 10, time_budget: float = None) -> list:
+        """
+        Returns up to limit distinct values indexed under keys starting with prefix, ranked by weight(value) with
+        the heaviest first. If time_budget seconds elapse before the whole range has been examined, the best values
+        found so far are returned.
+        """
+        prefix = normalize_name(prefix)
+        if len(prefix) == 0:
+            return list()
+        deadline = None if time_budget is None else time.perf_counter() + time_budget
+
+        weights = dict()
+        position = bisect_left(self.__entries, (prefix,))
+        examined = 0
+        while position < len(self.__entries):
+            key, value = self.__entries[position]
+            if not key.startswith(prefix):
+                break
+            if value not in weights:
+                weights[value] = weight(value)
+            position += 1
+            examined += 1
+            if deadline is not None and examined % self.BUDGET_CHECK_INTERVAL == 0 and time.perf_counter() > deadline:
+                break
+
+        return [value for value, value_weight in heapq.nlargest(limit, weights.items(), key=itemgetter(1))]
+
+
+class SortedIndex:
+    """
+    A secondary index keeping (value, key) entries sorted by value, maintained by bisection on every insert and
+    removal. Top-N queries read the high end of the array and range queries bisect both of its bounds.
+    """
+
+    def __init__(self):
+        self.__entries = list()
+        self.__values = dict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def add(self, key, value):
+        """ Indexes key under value, replacing the value key was previously indexed under. """
+        self.remove(key)
+        self.__values[key] = value
+        insort_left(self.__entries, (value, key))
+
+    def add_many(self, items):
+        """ Indexes every (key, value) pair of items, sorting the entries once rather than inserting each. """
+        values = dict(items)
+        if any(key in self.__values for key in values):
+            self.__entries = [entry for entry in self.__entries if entry[1] not in values]
+        self.__values.update(values)
+        self.__entries.extend((value, key) for key, value in values.items())
+        self.__entries.sort()
+
+    def remove(self, key):
+        value = self.__values.pop(key, None)
+        if value is None:
+            return
+        del self.__entries[bisect_left(self.__entries, (value, key))]
+
+    def top(self, limit: int, offset: int = 0) -> list:
+        """ Returns the keys with the highest values, skipping the first offset of them, highest value first. """
+        end = max(len(self.__entries) - offset, 0)
+        start = max(end - limit, 0)
+        return [key for value, key in reversed(self.__entries[start:end])]
+
+    def range(self, low=None, high=None) -> list:
+        """ Returns the keys whose values lie within the inclusive bounds low and high, lowest value first. """
+        start = 0 if low is None else bisect_left(self.__entries, (low,))
+        end = len(self.__entries) if high is None else bisect_right(self.__entries, (high, _GREATEST), lo=start)
+        return [key for value, key in self.__entries[start:end]]
+
+
+class _Greatest:
+    """ A sentinel that compares greater than any other object, used to bisect past every entry with a value. """
+
+    def __lt__(self, other):
+        return False
+
+    def __gt__(self, other):
+        return True
+
+
+_GREATEST = _Greatest()
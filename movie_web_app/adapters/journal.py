@@ -0,0 +1,287 @@
+"""
+An append-only journal of the users and reviews added to a MemoryRepository, so that they outlive the process.
+
+Each record is a line holding the CRC-32 of its payload in hexadecimal, a space and the payload: a JSON array whose
+first item names the change. The journal is replayed on top of the data files, or of a snapshot, when the repository
+is loaded. A record cut short by a crash fails its checksum, and it and anything after it are dropped.
+
+Appends are made durable with group commit: a writer whose record isn't on disk yet either fsyncs the journal itself,
+covering every record written so far, or waits for the fsync already under way, so that concurrent writers share
+fsyncs instead of queuing for one each.
+
+A journal can also be shared by the repositories of several processes, such as the workers forked by prefork.py. Each
+process then appends its records while holding an exclusive lock on the file, having first applied the records the
+others appended, so that every process applies every change in the order of the journal.
+"""
+import csv
+import fcntl
+import json
+import os
+import threading
+import zlib
+from datetime import datetime
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+from movie_web_app.adapters.memory_repository import read_csv_file, write_users_file
+from movie_web_app.adapters.repository import AbstractRepository
+from movie_web_app.domainmodel.model import User, make_review
+
+USER_RECORD = 'user'
+REVIEW_RECORD = 'review'
+
+
+class Journal:
+    def __init__(self, journal_path: str, size: int = None, commit_delay: float = 0.0, shared: bool = False):
+        """
+        Opens the journal at journal_path for appending, creating it if needed. When size is given, the journal is
+        first cut to its first size bytes, the end of its last intact record as returned by replay_journal. A writer
+        starting an fsync first waits up to commit_delay seconds for more records to share it.
+
+        A shared journal is appended to by other processes too, so it is never cut: size is then the offset up to which
+        the repository already holds its records, those after it being applied by catch_up or before the next append.
+        """
+        self.__journal_path = journal_path
+        self.__file = open(journal_path, 'ab')
+        self.__shared = shared
+        if size is not None and not shared:
+            self.__file.truncate(size)
+        self.__size = size if shared and size is not None else self.__file.seek(0, os.SEEK_END)
+        self.__commit_delay = commit_delay
+        # The records of other processes are applied by these, as set by follow.
+        self.__apply_user = None
+        self.__apply_review = None
+        self.__condition = threading.Condition()
+        # Records are numbered in the order they are written; those up to __synced are known to be on disk.
+        self.__written = 0
+        self.__synced = 0
+        self.__syncing = False
+        self.__commits = 0
+
+    @property
+    def size(self) -> int:
+        """ Number of bytes in the journal, or of a shared journal those whose records have been applied. """
+        with self.__condition:
+            return self.__size
+
+    @property
+    def records(self) -> int:
+        """ Number of records appended since the journal was opened. """
+        with self.__condition:
+            return self.__written
+
+    @property
+    def commits(self) -> int:
+        """ Number of fsyncs made since the journal was opened. """
+        with self.__condition:
+            return self.__commits
+
+    def follow(self, apply_user, apply_review):
+        """
+        Sets the functions applying the records other processes append to a shared journal, called with the fields of
+        each user and review record in the order they were appended.
+        """
+        self.__apply_user = apply_user
+        self.__apply_review = apply_review
+
+    def catch_up(self):
+        """ Applies the records other processes have appended to a shared journal since the last were applied. """
+        with self.__condition:
+            self.__catch_up()
+
+    def append_user(self, username: str, password: str, apply=None):
+        """
+        Appends a user record, then calls apply, if given, to add the user and returns its result. Apply is called
+        once the record is on disk, or for a shared journal as soon as it is written, so that it is applied in the
+        order of the journal.
+        """
+        return self.__append([USER_RECORD, username, password], apply)
+
+    def append_review(self, movie_id: int, username: str, review_text: str, rating, timestamp: datetime,
+                      apply=None):
+        """ Appends a review record, then calls apply, if given, as for append_user. """
+        return self.__append([REVIEW_RECORD, movie_id, username, review_text, rating, timestamp.isoformat()], apply)
+
+    def close(self):
+        with self.__condition:
+            self.__file.flush()
+            os.fsync(self.__file.fileno())
+            self.__file.close()
+
+    def __append(self, record: list, apply):
+        # Returns once the record is on disk.
+        line = _encode(record)
+        result = None
+        with self.__condition:
+            if self.__shared:
+                fcntl.flock(self.__file.fileno(), fcntl.LOCK_EX)
+                try:
+                    # With the records of the others applied, the record lands at the offset followed so far.
+                    self.__catch_up()
+                    self.__file.write(line)
+                    self.__file.flush()
+                    self.__size += len(line)
+                    if apply is not None:
+                        result = apply()
+                finally:
+                    fcntl.flock(self.__file.fileno(), fcntl.LOCK_UN)
+            else:
+                self.__file.write(line)
+                self.__size += len(line)
+            self.__written += 1
+            sequence = self.__written
+            while self.__synced < sequence:
+                if self.__syncing:
+                    self.__condition.wait()
+                    continue
+                self.__syncing = True
+                try:
+                    if self.__commit_delay > 0:
+                        # Writers arriving meanwhile add their records and wait for this fsync.
+                        self.__condition.wait(self.__commit_delay)
+                    self.__file.flush()
+                    target = self.__written
+                    # The lock is released during the fsync, so that other writers can add their records meanwhile.
+                    self.__condition.release()
+                    try:
+                        os.fsync(self.__file.fileno())
+                    finally:
+                        self.__condition.acquire()
+                    self.__synced = target
+                    self.__commits += 1
+                finally:
+                    self.__syncing = False
+                    self.__condition.notify_all()
+        if apply is not None and not self.__shared:
+            result = apply()
+        return result
+
+    def __catch_up(self):
+        # Called holding the condition; applies the records past the offset followed so far.
+        if not self.__shared or os.fstat(self.__file.fileno()).st_size == self.__size:
+            return
+        for record, offset in read_journal(self.__journal_path, self.__size):
+            if record[0] == USER_RECORD:
+                self.__apply_user(*record[1:])
+            elif record[0] == REVIEW_RECORD:
+                movie_id, username, review_text, rating, timestamp = record[1:]
+                self.__apply_review(movie_id, username, review_text, rating, datetime.fromisoformat(timestamp))
+            self.__size = offset
+
+
+def _encode(record: list) -> bytes:
+    payload = json.dumps(record, separators=(',', ':')).encode('utf-8')
+    return b'%08x %s\n' % (zlib.crc32(payload), payload)
+
+
+def read_journal(journal_path: str, offset: int = 0):
+    """
+    Yields each intact record of the journal from byte offset onwards, with the offset of the end of the record. Stops
+    at the first record that is cut short or fails its checksum.
+    """
+    try:
+        infile = open(journal_path, 'rb')
+    except FileNotFoundError:
+        return
+    with infile:
+        infile.seek(offset)
+        for line in infile:
+            if not line.endswith(b'\n') or len(line) < 10 or line[8:9] != b' ':
+                return
+            payload = line[9:-1]
+            try:
+                checksum = int(line[:8], 16)
+            except ValueError:
+                return
+            if zlib.crc32(payload) != checksum:
+                return
+            offset += len(line)
+            yield json.loads(payload), offset
+
+
+def replay_journal(journal_path: str, repository: AbstractRepository, offset: int = 0) -> int:
+    """
+    Adds the users and reviews recorded in the journal from byte offset onwards to repository, and returns the offset
+    of the end of the last intact record. Reviews of movies no longer in the repository are skipped.
+    """
+    if not os.path.exists(journal_path):
+        return 0
+    # A journal shorter than offset was replaced since the repository was loaded, so it is replayed in full.
+    if offset > os.path.getsize(journal_path):
+        offset = 0
+    for record, offset in read_journal(journal_path, offset):
+        if record[0] == USER_RECORD:
+            username, password = record[1:]
+            repository.add_user(User(username, password))
+        elif record[0] == REVIEW_RECORD:
+            movie_id, username, review_text, rating, timestamp = record[1:]
+            movie = repository.get_movie_by_id(movie_id)
+            user = repository.get_user(username)
+            if movie is not None and user is not None:
+                repository.add_review(make_review(review_text, user, movie, rating,
+                                                  datetime.fromisoformat(timestamp)))
+    return offset
+
+
+def compact_journal(journal_path: str, data_path: str) -> (int, int):
+    """
+    Folds the users and reviews recorded in the journal into users.csv and reviews.csv of data_path, then empties the
+    journal. The users file is made to hold password hashes first, as journaled users have hashed passwords. Returns
+    the numbers of users and reviews folded in. Must not run while the application is writing to the journal.
+    """
+    records = [record for record, offset in read_journal(journal_path)]
+    if not records:
+        return 0, 0
+    users_filename = os.path.join(data_path, 'users.csv')
+    reviews_filename = os.path.join(data_path, 'reviews.csv')
+    write_users_file(users_filename)
+    user_rows = list(read_csv_file(users_filename))
+    review_rows = list(read_csv_file(reviews_filename))
+    user_ids = {data_row[1]: int(data_row[0]) for data_row in user_rows}
+    user_count = len(user_rows)
+    review_count = len(review_rows)
+    next_user_id = max(user_ids.values(), default=0) + 1
+    next_review_id = max((int(data_row[0]) for data_row in review_rows), default=0) + 1
+
+    for record in records:
+        if record[0] == USER_RECORD:
+            username, password = record[1:]
+            if username not in user_ids:
+                user_ids[username] = next_user_id
+                user_rows.append([next_user_id, username, password])
+                next_user_id += 1
+        elif record[0] == REVIEW_RECORD:
+            movie_id, username, review_text, rating, timestamp = record[1:]
+            if username in user_ids:
+                review_rows.append([next_review_id, user_ids[username], movie_id, review_text, rating,
+                                    datetime.fromisoformat(timestamp).isoformat('#')])
+                next_review_id += 1
+
+    _write_csv_file(users_filename, ['id', 'username', 'password_hash'], user_rows)
+    _write_csv_file(reviews_filename, ['id', 'user-id', 'movie-id', 'review-text', 'ratings', 'timestamp'],
+                    review_rows)
+    open(journal_path, 'wb').close()
+    return len(user_rows) - user_count, len(review_rows) - review_count
+
+
+def _write_csv_file(filename: str, header: list, rows: list):
+    # Written to a temporary file first, so that a reader never sees a partially written data file.
+    temporary_filename = f'{filename}.tmp'
+    with open(temporary_filename, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(header)
+        writer.writerows(rows)
+    os.replace(temporary_filename, filename)
+
+
+@click.command('compact-journal')
+@with_appcontext
+def compact_journal_command():
+    """ Folds the users and reviews of the configured JOURNAL_PATH into the data files, and empties the journal. """
+    journal_path = current_app.config.get('JOURNAL_PATH')
+    if not journal_path:
+        raise click.UsageError('JOURNAL_PATH is not configured.')
+    user_count, review_count = compact_journal(journal_path, current_app.config['DATA_PATH'])
+    click.echo(f'Folded {user_count} users and {review_count} reviews from {journal_path} into the data files')
@@ -0,0 +1,76 @@
+import threading
+from contextlib import contextmanager, nullcontext
+
+
+class ReadWriteLock:
+    """
+    A lock held by any number of readers at once, or by a single writer. Readers don't wait for each other, only for a
+    writer. A waiting writer holds back readers arriving after it, so that a steady stream of reads can't starve writes.
+
+    The writer may take the lock again, for reading or writing, while it holds it, so that a change spanning several
+    calls can hold the lock throughout. Readers must not take it again, as they would wait for a waiting writer.
+    """
+
+    def __init__(self):
+        self.__condition = threading.Condition()
+        self.__readers = 0
+        self.__waiting_writers = 0
+        self.__writer = None
+        self.__writer_depth = 0
+
+    @contextmanager
+    def reading(self):
+        with self.__condition:
+            if self.__writer == threading.get_ident():
+                self.__writer_depth += 1
+                writer = True
+            else:
+                while self.__writer is not None or self.__waiting_writers > 0:
+                    self.__condition.wait()
+                self.__readers += 1
+                writer = False
+        try:
+            yield
+        finally:
+            if writer:
+                self.__release_write()
+            else:
+                with self.__condition:
+                    self.__readers -= 1
+                    if self.__readers == 0:
+                        self.__condition.notify_all()
+
+    @contextmanager
+    def writing(self):
+        thread = threading.get_ident()
+        with self.__condition:
+            if self.__writer != thread:
+                self.__waiting_writers += 1
+                while self.__writer is not None or self.__readers > 0:
+                    self.__condition.wait()
+                self.__waiting_writers -= 1
+                self.__writer = thread
+            self.__writer_depth += 1
+        try:
+            yield
+        finally:
+            self.__release_write()
+
+    def __release_write(self):
+        with self.__condition:
+            self.__writer_depth -= 1
+            if self.__writer_depth == 0:
+                self.__writer = None
+                self.__condition.notify_all()
+
+
+class NoLock:
+    """ Stands in for a ReadWriteLock where only a single thread uses what it would guard. """
+
+    @staticmethod
+    def reading():
+        return nullcontext()
+
+    @staticmethod
+    def writing():
+        return nullcontext()
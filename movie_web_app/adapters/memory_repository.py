@@ -1,226 +1,828 @@
 import csv
+import io
+import mmap
 import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import chain, repeat
 from typing import List
 
 from werkzeug.security import generate_password_hash
-from bisect import bisect_left, insort_left
-from movie_web_app.adapters.repository import AbstractRepository
+from bisect import bisect_left, bisect_right, insort_left
+from movie_web_app.adapters.catalog_file import CatalogFile
+from movie_web_app.adapters.indexes import normalize_name, bitset_to_ids, TrigramIndex, BM25Index, BKTree, \
+    PrefixIndex, SortedIndex
+from movie_web_app.adapters.locking import ReadWriteLock, NoLock
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.adapters.repository import AbstractRepository, RANKED_ATTRIBUTES
+from movie_web_app.adapters.review_store import ReviewStore, ReviewSummary
 from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, \
-    make_actor_association, make_genre_association, make_director_association, make_review
+    make_actor_association, make_genre_association, make_director_association, make_review, PLAINTEXT_PASSWORD_PREFIX
 
 
 class MemoryRepository(AbstractRepository):
     # Movies are ordered by title then by release year
+
+    # Number of times a title token counts towards a movie's full-text term frequencies, relative to the description.
+    TITLE_WEIGHT = 3
+
     def __init__(self):
-        self.__users = list()
-        self.__actors = list()
-        self.__directors = list()
-        self.__genres = list()
+        # Users, actors, directors and genres are keyed by name so that lookups don't scan the whole collection.
+        self.__users = dict()
+        # Usernames of users being journaled, claimed so that no other user is added under them meanwhile.
+        self.__claimed_usernames = set()
+        self.__actors = dict()
+        self.__directors = dict()
+        self.__genres = dict()
+        # Actors and directors are also keyed by their normalized names to support case-insensitive searches.
+        self.__actors_by_normalized_name = dict()
+        self.__directors_by_normalized_name = dict()
+        # Normalized names are organised into BK-trees to suggest the closest names for misspelled searches.
+        self.__actor_name_tree = BKTree()
+        self.__director_name_tree = BKTree()
+        # Sorted prefix indexes of titles and names, used for autocompletion.
+        self.__completions = {'title': PrefixIndex(), 'actor': PrefixIndex(), 'director': PrefixIndex()}
         self.__movies = list()
+        # Movies are also bucketed by release year, each bucket ordered by title then by release year, alongside a
+        # sorted list of the distinct release years.
+        self.__movies_by_release_year = dict()
+        self.__release_years = list()
+        # Titles are split into trigrams to answer substring searches without scanning every movie.
+        self.__title_index = TrigramIndex()
+        # Titles and descriptions are tokenized into a BM25 ranked full-text index.
+        self.__text_index = BM25Index()
+        # Numeric attributes of movies are mirrored into NumPy columns for vectorized range filtering.
+        self.__movie_columns = MovieColumns()
+        # Movies are ranked by each of the RANKED_ATTRIBUTES in sorted secondary indexes.
+        self.__rankings = {attribute: SortedIndex() for attribute in RANKED_ATTRIBUTES}
         self.__reviews = list()
+        # Reviews streamed in by stream_reviews are kept in a review store rather than in memory.
+        self.__review_store = None
+        # Users and reviews added once the repository is loaded are recorded in a journal, if one is attached. The
+        # journal position counts the bytes of the journal whose changes the repository holds.
+        self.__journal = None
+        self.__journal_position = 0
         self.__watchlists = list()
         self.__movie_index = dict()
+        # Single-threaded until make_thread_safe is called.
+        self.__lock = NoLock()
 
     def add_user(self, user: User):
-        self.__users.append(user)
+        # The username is claimed under the lock, so that of users added under one name at once only the first is
+        # journaled and added. The journal is written outside of the lock, so that concurrent writers can share its
+        # fsyncs.
+        with self.__lock.writing():
+            if user.username in self.__users or user.username in self.__claimed_usernames:
+                return
+            self.__claimed_usernames.add(user.username)
+        try:
+            if self.__journal is not None:
+                self.__journal.append_user(user.username, user.password, lambda: self.__add_user(user))
+            else:
+                self.__add_user(user)
+        finally:
+            with self.__lock.writing():
+                self.__claimed_usernames.discard(user.username)
+
+    def __add_user(self, user: User):
+        with self.__lock.writing():
+            # With a shared journal, a user added through another process may have been given the name first.
+            self.__users.setdefault(user.username, user)
 
     def get_user(self, username) -> User:
-        return next((user for user in self.__users if user.username == username), None)
+        with self.__lock.reading():
+            return self.__users.get(username)
+
+    def update_user_password(self, user: User):
+        # The User held by the repository is the one that was changed, so there is nothing left to store.
+        pass
 
     def add_actor(self, actor: Actor):
-        if isinstance(actor, Actor):
-            self.__actors.append(actor)
+        with self.__lock.writing():
+            if isinstance(actor, Actor):
+                if self.__register_name(actor, actor.actor_full_name, self.__actors, self.__actors_by_normalized_name,
+                                        self.__actor_name_tree):
+                    self.__completions['actor'].add(actor.actor_full_name, actor.actor_full_name)
 
     def get_actor(self, actor_full_name) -> Actor:
-        return next((actor for actor in self.__actors if actor.actor_full_name == actor_full_name), None)
+        with self.__lock.reading():
+            return self.__actors.get(actor_full_name)
 
     def add_director(self, director: Director):
-        if isinstance(director, Director):
-            self.__directors.append(director)
+        with self.__lock.writing():
+            if isinstance(director, Director):
+                if self.__register_name(director, director.director_full_name, self.__directors,
+                                        self.__directors_by_normalized_name, self.__director_name_tree):
+                    self.__completions['director'].add(director.director_full_name, director.director_full_name)
 
     def get_director(self, director_full_name) -> Director:
-        return next((director for director in self.__directors if director.director_full_name == director_full_name),
-                    None)
+        with self.__lock.reading():
+            return self.__directors.get(director_full_name)
 
     def add_genre(self, genre: Genre):
-        if isinstance(genre, Genre):
-            self.__genres.append(genre)
+        with self.__lock.writing():
+            if isinstance(genre, Genre):
+                self.__genres.setdefault(genre.genre_full_name, genre)
 
     def get_genres(self) -> List[Genre]:
-        return self.__genres
+        with self.__lock.reading():
+            return list(self.__genres.values())
 
     def add_movie(self, movie: Movie):
-        if isinstance(movie, Movie):
-            # self._movies.append(movie)
-            insort_left(self.__movies, movie)
-            self.__movie_index[movie.id] = movie
+        with self.__lock.writing():
+            if isinstance(movie, Movie):
+                insort_left(self.__movies, movie)
+                self.__index_release_year(movie)
+                if movie.title is not None:
+                    self.__completions['title'].add(movie.title, movie.id)
+                self.__index_movie(movie)
+                self.__movie_columns.add(movie)
+                self.__index_rankings(movie)
+
+    def add_movies_bulk(self, movies, actors=(), directors=(), genres=()):
+        with self.__lock.writing():
+            movies = [movie for movie in movies if isinstance(movie, Movie)]
+
+            # Append everything, then sort once, instead of shifting the sorted lists for every movie.
+            self.__movies.extend(movies)
+            self.__movies.sort()
+            new_release_years = dict()
+            titles = list()
+            rankings = {attribute: list() for attribute in self.__rankings}
+            for movie in movies:
+                if movie.release_year is not None:
+                    new_release_years.setdefault(movie.release_year, list()).append(movie)
+                if movie.title is not None:
+                    titles.append((movie.title, movie.id))
+                self.__index_movie(movie)
+                for attribute, values in rankings.items():
+                    value = getattr(movie, attribute)
+                    if isinstance(value, (int, float)):
+                        values.append((movie.id, value))
+
+            for release_year, year_movies in new_release_years.items():
+                bucket = self.__movies_by_release_year.setdefault(release_year, list())
+                bucket.extend(year_movies)
+                bucket.sort()
+            self.__release_years = sorted(self.__movies_by_release_year)
+            self.__completions['title'].add_many(titles)
+            self.__movie_columns.add_many(movies)
+            for attribute, values in rankings.items():
+                self.__rankings[attribute].add_many(values)
+
+            self.__completions['actor'].add_many(
+                (actor.actor_full_name, actor.actor_full_name) for actor in actors
+                if isinstance(actor, Actor) and self.__register_name(
+                    actor, actor.actor_full_name, self.__actors, self.__actors_by_normalized_name,
+                    self.__actor_name_tree))
+            self.__completions['director'].add_many(
+                (director.director_full_name, director.director_full_name) for director in directors
+                if isinstance(director, Director) and self.__register_name(
+                    director, director.director_full_name, self.__directors, self.__directors_by_normalized_name,
+                    self.__director_name_tree))
+            for genre in genres:
+                self.add_genre(genre)
+
+    def remove_movies(self, movie_ids) -> List[Movie]:
+        """
+        Removes the movies with the given ids, along with their index entries and their associations with actors,
+        directors and genres, and returns them. Their reviews, viewings and watchlist entries are left in place until
+        relink_movies is called. Actors, directors and genres left without movies stay registered.
+        """
+        with self.__lock.writing():
+            removed_movies = [self.__movie_index[movie_id] for movie_id in movie_ids if movie_id in self.__movie_index]
+            for movie in removed_movies:
+                self.__unindex_movie(movie)
+            return removed_movies
+
+    def relink_movies(self, removed_movies):
+        """
+        Moves the reviews, viewings and watchlist entries of movies returned by remove_movies to the movies now stored
+        under the same ids, and drops those of movies no longer stored.
+        """
+        with self.__lock.writing():
+            removed_ids = {id(movie) for movie in removed_movies}
+            reviews = [review for review in self.__reviews if id(review.movie) in removed_ids]
+            if reviews:
+                self.__reviews = [review for review in self.__reviews if id(review.movie) not in removed_ids]
+            for review in reviews:
+                review.user.remove_review(review)
+                replacement = self.__movie_index.get(review.movie.id)
+                if replacement is not None:
+                    self.__add_review(make_review(review.review_text, review.user, replacement, review.rating,
+                                                  review.timestamp))
+            for user in self.__users.values():
+                for movie in [movie for movie in user.watched_movies if id(movie) in removed_ids]:
+                    user.unwatch_movie(movie)
+                    if movie.id in self.__movie_index:
+                        user.watch_movie(self.__movie_index[movie.id])
+            for watchlist in self.__watchlists:
+                for movie in [movie for movie in watchlist.watchlist if id(movie) in removed_ids]:
+                    watchlist.remove_movie(movie)
+                    if movie.id in self.__movie_index:
+                        watchlist.add_movie(self.__movie_index[movie.id])
 
     def get_movie(self, title: str, release_year: int):
-        return next((movie for movie in self.__movies if (movie.title == title and movie.release_year == release_year)),
-                    None)
+        with self.__lock.reading():
+            return next((movie for movie in self.__movies
+                         if (movie.title == title and movie.release_year == release_year)), None)
 
     def get_movies_by_release_year(self, target_year:int):
-        matching_movies = list()
-        for movie in self.__movies:
-            if movie.release_year == target_year:
-                matching_movies.append(movie)
-        return matching_movies
+        with self.__lock.reading():
+            return list(self.__movies_by_release_year.get(target_year, ()))
 
     def get_movies_by_actor(self, actor_fullname:str):
-        actor_fullname = actor_fullname.strip()
-        actor = next((actor for actor in self.__actors if actor.actor_full_name.lower() == actor_fullname.lower()), None)
-        if actor is not None:
-            played_movies = [movie for movie in actor.tagged_movies]
-        else:
-            played_movies = list()
-        return played_movies
+        with self.__lock.reading():
+            actor = self.__actors_by_normalized_name.get(normalize_name(actor_fullname))
+            if actor is not None:
+                played_movies = [movie for movie in actor.tagged_movies]
+            else:
+                played_movies = list()
+            return played_movies
 
     def get_movies_by_director(self, director_fullname:str):
-        director_fullname = director_fullname.strip()
-        director = next((director for director in self.__directors if director.director_full_name.lower() == director_fullname.lower()), None)
-        if director is not None:
-            directed_movies = [movie for movie in director.tagged_movies]
-        else:
-            directed_movies = list()
-        return directed_movies
+        with self.__lock.reading():
+            director = self.__directors_by_normalized_name.get(normalize_name(director_fullname))
+            if director is not None:
+                directed_movies = [movie for movie in director.tagged_movies]
+            else:
+                directed_movies = list()
+            return directed_movies
+
+    def get_similar_actor_names(self, actor_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        with self.__lock.reading():
+            matches = self.__actor_name_tree.search(normalize_name(actor_fullname), max_distance)
+            return [self.__actors_by_normalized_name[name].actor_full_name for distance, name in matches[:limit]]
+
+    def get_similar_director_names(self, director_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        with self.__lock.reading():
+            matches = self.__director_name_tree.search(normalize_name(director_fullname), max_distance)
+            return [self.__directors_by_normalized_name[name].director_full_name for distance, name in matches[:limit]]
+
+    def autocomplete(self, prefix: str, kind: str, limit: int = 10, time_budget: float = None) -> List[str]:
+        with self.__lock.reading():
+            if kind == 'title':
+                movie_ids = self.__completions['title'].complete(
+                    prefix, lambda movie_id: self.__movie_index[movie_id].votes, limit, time_budget)
+                # Remakes share a title, so only the first of them is kept.
+                return list(dict.fromkeys(self.__movie_index[movie_id].title for movie_id in movie_ids))
+
+            people = self.__actors if kind == 'actor' else self.__directors
+            return self.__completions[kind].complete(
+                prefix, lambda name: sum(movie.votes for movie in people[name].tagged_movies), limit, time_budget)
 
     def search_movie_by_title(self, title: str) -> List[Movie]:
-        output = list()
-        for current_movie in self.__movies:
-            if title.lower() in current_movie.title.lower():
-                output.append(current_movie)
-        return output
+        with self.__lock.reading():
+            movie_ids = self.__title_index.search(title)
+            return sorted(self.__movie_index[movie_id] for movie_id in movie_ids)
+
+    def search_movies_by_text(self, query: str, limit: int = 20) -> List[Movie]:
+        with self.__lock.reading():
+            return [self.__movie_index[movie_id] for movie_id, score in self.__text_index.search(query, limit)]
 
     def get_number_of_movies(self):
-        return len(self.__movies)
+        with self.__lock.reading():
+            return len(self.__movies)
 
     def get_newest_movie(self):
-        movie = None
-
-        if len(self.__movies) > 0:
-            self.__movies.sort(key=lambda x: x.release_year, reverse=True)
-            movie = self.__movies[0]
-        return movie
+        with self.__lock.reading():
+            movie = None
+            if len(self.__release_years) > 0:
+                movie = self.__movies_by_release_year[self.__release_years[-1]][0]
+            return movie
 
     def get_oldest_movie(self):
-        movie = None
-        if len(self.__movies) > 0:
-            self.__movies.sort(key=lambda x: x.release_year, reverse=False)
-            movie = self.__movies[0]
-        return movie
+        with self.__lock.reading():
+            movie = None
+            if len(self.__release_years) > 0:
+                movie = self.__movies_by_release_year[self.__release_years[0]][0]
+            return movie
 
     def get_release_year_of_previous_movie(self, movie:Movie):
-        previous_year = None
+        with self.__lock.reading():
+            previous_year = None
 
-        try:
-            index = self.movie_index(movie)
-            for stored_movie in reversed(self.__movies[0:index]):
-                if stored_movie.release_year < movie.release_year:
-                    previous_year = stored_movie.release_year
-                    break
-        except ValueError:
-            pass
+            try:
+                self.__movie_position(movie)
+                index = bisect_left(self.__release_years, movie.release_year)
+                if index > 0:
+                    previous_year = self.__release_years[index - 1]
+            except ValueError:
+                pass
 
-        return previous_year
+            return previous_year
 
     def get_release_year_of_next_movie(self, movie: Movie):
-        next_year = None
+        with self.__lock.reading():
+            next_year = None
 
-        try:
-            index = self.movie_index(movie)
-            for stored_movie in self.__movies[index + 1:len(self.__movies)]:
-                if stored_movie.release_year > movie.release_year:
-                    next_year = stored_movie.release_year
-                    break
-        except ValueError:
-            pass
+            try:
+                self.__movie_position(movie)
+                index = bisect_right(self.__release_years, movie.release_year)
+                if index < len(self.__release_years):
+                    next_year = self.__release_years[index]
+            except ValueError:
+                pass
 
-        return next_year
+            return next_year
 
     def get_movie_by_id(self, index: int):
-        movie = None
-        try:
-            movie = self.__movie_index[index]
-        except KeyError:
-            pass
-        return movie
+        # Read under the lock, as a reload removes a changed movie before adding it anew.
+        with self.__lock.reading():
+            return self.__movie_index.get(index)
 
     def get_movies_by_genre(self, genre_name: str):
-        genre = next((genre for genre in self.__genres if genre.genre_full_name == genre_name), None)
-        if genre is not None:
-            movie_indexes = [movie.id for movie in genre.movie_genres]
-        else:
-            movie_indexes = list()
-        return movie_indexes
+        return self.get_movies_by_genres([genre_name])
+
+    def get_movies_by_genres(self, genre_names, excluded_genre_names=()):
+        with self.__lock.reading():
+            if len(genre_names) == 0:
+                return list()
+
+            bitset = -1
+            for genre_name in genre_names:
+                genre = self.__genres.get(genre_name)
+                if genre is None:
+                    return list()
+                bitset &= genre.movie_bitset
+            for genre_name in excluded_genre_names:
+                genre = self.__genres.get(genre_name)
+                if genre is not None:
+                    bitset &= ~genre.movie_bitset
+            return bitset_to_ids(bitset)
+
+    def get_movies_by_facets(self, facets: dict):
+        with self.__lock.reading():
+            return self.__movie_columns.filter(facets).tolist()
 
     def get_movies_by_id(self, index_list):
-        existing_indexes = [index for index in index_list if index in self.__movie_index]
-        movies = [self.__movie_index[index] for index in existing_indexes]
-        return movies
+        with self.__lock.reading():
+            existing_indexes = [index for index in index_list if index in self.__movie_index]
+            movies = [self.__movie_index[index] for index in existing_indexes]
+            return movies
+
+    def get_top_movie_ids(self, attribute: str, limit: int, offset: int = 0) -> List[int]:
+        with self.__lock.reading():
+            return self.__rankings[attribute].top(limit, offset)
+
+    def get_movie_ids_by_range(self, attribute: str, low=None, high=None) -> List[int]:
+        with self.__lock.reading():
+            return self.__rankings[attribute].range(low, high)
+
+    def get_number_of_ranked_movies(self, attribute: str) -> int:
+        with self.__lock.reading():
+            return len(self.__rankings[attribute])
 
     def add_review(self, review: Review):
         super().add_review(review)
+
+        def add():
+            with self.__lock.writing():
+                self.__add_review(review)
+
+        if self.__journal is not None:
+            self.__journal.append_review(review.movie.id, review.user.username, review.review_text, review.rating,
+                                         review.timestamp, add)
+        else:
+            add()
+
+    def add_review_for(self, movie_id: int, username: str, review_text: str, rating: int,
+                       timestamp: datetime = None) -> Review:
+        timestamp = timestamp or datetime.today()
+        with self.__lock.reading():
+            if movie_id not in self.__movie_index or username not in self.__users:
+                return None
+        # The journal is written outside of the lock, so that concurrent writers can share its fsyncs. A review of a
+        # movie removed meanwhile is skipped when the journal is replayed, as it is here.
+        if self.__journal is not None:
+            return self.__journal.append_review(
+                movie_id, username, review_text, rating, timestamp,
+                lambda: self.__add_review_for(movie_id, username, review_text, rating, timestamp))
+        return self.__add_review_for(movie_id, username, review_text, rating, timestamp)
+
+    def __add_review_for(self, movie_id: int, username: str, review_text: str, rating: int, timestamp: datetime):
+        # The review is linked to its movie and user under the lock, so that no read sees it in their reviews before
+        # its rating is folded in, nor while iterating over them.
+        with self.__lock.writing():
+            movie = self.__movie_index.get(movie_id)
+            user = self.__users.get(username)
+            if movie is None or user is None:
+                return None
+            review = make_review(review_text, user, movie, rating, timestamp)
+            self.__add_review(review)
+        return review
+
+    def __add_review(self, review: Review):
         self.__reviews.append(review)
+        if self.__review_store is not None:
+            self.__review_store.append(review.movie.id, review.user.username, review.review_text, review.rating,
+                                       review.timestamp)
+
+        # Fold the review's rating into the movie's rating and votes, and re-index the movie under the new values.
+        if review.rating is not None:
+            review.movie.update_ratings(review)
+            self.__movie_columns.update(review.movie)
+            self.__index_rankings(review.movie)
 
     def get_reviews(self) -> List[Review]:
-        return self.__reviews
+        with self.__lock.reading():
+            return list(self.__reviews)
+
+    def get_reviews_for_movie(self, movie_id: int) -> List[Review]:
+        with self.__lock.reading():
+            movie = self.__movie_index.get(movie_id)
+            if movie is None:
+                return []
+            if self.__review_store is None:
+                return list(movie.reviews)
+            return [Review(self.__users[username], movie, review_text, rating, timestamp)
+                    for username, review_text, rating, timestamp in self.__review_store.reviews_for_movie(movie_id)]
+
+    def add_review_summaries(self, movie_summaries: dict, user_summaries: dict, review_store: ReviewStore):
+        """
+        Takes in reviews streamed into review_store, of which only the summaries by movie id and by user are at hand.
+        Each movie and user is linked to its latest reviews, and each movie's ratings are folded in at once. Reviews
+        of movies are read from review_store from then on, and later reviews are appended to it.
+        """
+        with self.__lock.writing():
+            self.__review_store = review_store
+            for movie_id, summary in movie_summaries.items():
+                movie = self.__movie_index[movie_id]
+                for review in summary.recent:
+                    movie.add_review(review)
+                movie.add_unlisted_reviews(summary.count - len(summary.recent))
+                if summary.rating_count > 0:
+                    movie.add_ratings(summary.rating_count, summary.rating_sum)
+                    self.__movie_columns.update(movie)
+                    self.__index_rankings(movie)
+            for user, summary in user_summaries.items():
+                for review in summary.recent:
+                    user.add_review(review)
+
+    def attach_journal(self, journal):
+        """
+        Records the users and reviews added from now on in journal, each being on disk before it is added. The
+        repository must already hold the changes of the journal up to its current size, as replayed by replay_journal.
+        The records other processes append to a shared journal are added to the repository as they are caught up with.
+        """
+        journal.follow(lambda username, password: self.__add_user(User(username, password)), self.__add_review_for)
+        self.__journal = journal
+
+    def make_thread_safe(self):
+        """
+        Guards the repository with a reader-writer lock from now on, so that it can be used by several threads at once:
+        reads run alongside each other, and each change is made while no read is under way.
+        """
+        self.__lock = ReadWriteLock()
+
+    def writing(self):
+        """ Returns a context manager holding the write lock, for a change spanning several calls. """
+        return self.__lock.writing()
+
+    @property
+    def journal_position(self) -> int:
+        """ Number of bytes of the journal whose changes the repository holds, from where to replay the journal. """
+        if self.__journal is not None:
+            return self.__journal.size
+        return self.__journal_position
 
     def add_watchlist(self, watchlist: WatchList):
-        self.__watchlists.append(watchlist)
+        with self.__lock.writing():
+            self.__watchlists.append(watchlist)
 
     def get_watchlist(self) -> List[WatchList]:
-        return self.__watchlists
+        with self.__lock.reading():
+            return list(self.__watchlists)
+
+    def __getstate__(self):
+        if self.__review_store is not None:
+            raise TypeError('A repository keeping its reviews in a review store cannot be pickled')
+        # Pickling the entity graph as it is would recurse from each movie through its actors into their other movies,
+        # so entities are pickled without their links, which are kept alongside as lists of positions. The indexes
+        # refer to movies by id and to people by name, so they are pickled as they are.
+        movies, movie_positions = _positions(chain(self.__movie_index.values(), self.__movies,
+                                                   (review.movie for review in self.__reviews)))
+        actors, actor_positions = _positions(chain(self.__actors.values(), self.__actors_by_normalized_name.values(),
+                                                   (actor for movie in movies for actor in movie.actors)))
+        directors, director_positions = _positions(chain(self.__directors.values(),
+                                                         self.__directors_by_normalized_name.values()))
+        genres, genre_positions = _positions(chain(self.__genres.values(),
+                                                   (genre for movie in movies for genre in movie.genres)))
+        users, user_positions = _positions(chain(self.__users.values(), (review.user for review in self.__reviews)))
+
+        return {
+            'movies': movies,
+            'indexed_movies': len(self.__movie_index),
+            'movie_order': _positions_of(self.__movies, movie_positions),
+            'movie_actors': [_positions_of(movie.actors, actor_positions) for movie in movies],
+            'movie_genres': [_positions_of(movie.genres, genre_positions) for movie in movies],
+            'actors': [(actor.actor_full_name, _positions_of(actor.tagged_movies, movie_positions),
+                        _positions_of(actor.actor_colleague, actor_positions)) for actor in actors],
+            'directors': [(director.director_full_name, _positions_of(director.tagged_movies, movie_positions))
+                          for director in directors],
+            'genres': [(genre.genre_full_name, _positions_of(genre.movie_genres, movie_positions)) for genre in genres],
+            'users': [(user.username, user.password, _positions_of(user.watched_movies, movie_positions))
+                      for user in users],
+            'reviews': [(user_positions[id(review.user)], movie_positions[id(review.movie)], review.review_text,
+                         review.rating, review.timestamp) for review in self.__reviews],
+            'watchlists': [_positions_of(watchlist.watchlist, movie_positions) for watchlist in self.__watchlists],
+            'users_by_name': _positions_by_key(self.__users, user_positions),
+            'actors_by_name': _positions_by_key(self.__actors, actor_positions),
+            'actors_by_normalized_name': _positions_by_key(self.__actors_by_normalized_name, actor_positions),
+            'directors_by_name': _positions_by_key(self.__directors, director_positions),
+            'directors_by_normalized_name': _positions_by_key(self.__directors_by_normalized_name, director_positions),
+            'genres_by_name': _positions_by_key(self.__genres, genre_positions),
+            'actor_name_tree': self.__actor_name_tree,
+            'director_name_tree': self.__director_name_tree,
+            'completions': self.__completions,
+            'title_index': self.__title_index,
+            'text_index': self.__text_index,
+            'movie_columns': self.__movie_columns,
+            'rankings': self.__rankings,
+            'journal_position': self.journal_position,
+        }
+
+    def __setstate__(self, state):
+        movies = state['movies']
+        actors = [Actor(name) for name, movie_positions, colleague_positions in state['actors']]
+        directors = [Director(name) for name, movie_positions in state['directors']]
+        genres = [Genre(name) for name, movie_positions in state['genres']]
+        users = [User(username, password) for username, password, watched_positions in state['users']]
+
+        # Links are restored one direction at a time, so that every collection keeps the order it was pickled in.
+        for movie, actor_positions, genre_positions in zip(movies, state['movie_actors'], state['movie_genres']):
+            for position in actor_positions:
+                movie.add_actor(actors[position])
+            for position in genre_positions:
+                movie.add_genre(genres[position])
+        for actor, (name, movie_positions, colleague_positions) in zip(actors, state['actors']):
+            for position in movie_positions:
+                actor.add_movie(movies[position])
+            for position in colleague_positions:
+                actor.add_actor_colleague(actors[position])
+        for director, (name, movie_positions) in zip(directors, state['directors']):
+            for position in movie_positions:
+                director.add_movie(movies[position])
+        for genre, (name, movie_positions) in zip(genres, state['genres']):
+            for position in movie_positions:
+                genre.add_movie(movies[position])
+        for user, (username, password, watched_positions) in zip(users, state['users']):
+            for position in watched_positions:
+                user.watch_movie(movies[position])
+
+        self.__users = {username: users[position] for username, position in state['users_by_name'].items()}
+        self.__claimed_usernames = set()
+        self.__actors = {name: actors[position] for name, position in state['actors_by_name'].items()}
+        self.__directors = {name: directors[position] for name, position in state['directors_by_name'].items()}
+        self.__genres = {name: genres[position] for name, position in state['genres_by_name'].items()}
+        self.__actors_by_normalized_name = {
+            name: actors[position] for name, position in state['actors_by_normalized_name'].items()}
+        self.__directors_by_normalized_name = {
+            name: directors[position] for name, position in state['directors_by_normalized_name'].items()}
+        self.__actor_name_tree = state['actor_name_tree']
+        self.__director_name_tree = state['director_name_tree']
+        self.__completions = state['completions']
+
+        # Movies were pickled in title order, so filling the release-year buckets in that order keeps them sorted.
+        self.__movies = [movies[position] for position in state['movie_order']]
+        self.__movies_by_release_year = dict()
+        for movie in self.__movies:
+            if movie.release_year is not None:
+                self.__movies_by_release_year.setdefault(movie.release_year, list()).append(movie)
+        self.__release_years = sorted(self.__movies_by_release_year)
+        self.__title_index = state['title_index']
+        self.__text_index = state['text_index']
+        self.__movie_columns = state['movie_columns']
+        self.__rankings = state['rankings']
+        self.__reviews = [make_review(review_text, users[user_position], movies[movie_position], rating, timestamp)
+                          for user_position, movie_position, review_text, rating, timestamp in state['reviews']]
+        self.__review_store = None
+        self.__journal = None
+        self.__journal_position = state['journal_position']
+        self.__lock = NoLock()
+        self.__watchlists = list()
+        for movie_positions in state['watchlists']:
+            watchlist = WatchList()
+            for position in movie_positions:
+                watchlist.add_movie(movies[position])
+            self.__watchlists.append(watchlist)
+        self.__movie_index = {movie.id: movie for movie in movies[:state['indexed_movies']]}
+
+    def __index_movie(self, movie: Movie):
+        # Indexes that take a movie in constant time, shared by the single and the bulk paths.
+        self.__movie_index[movie.id] = movie
+        if movie.title is not None:
+            self.__title_index.add(movie.id, movie.title)
+        self.__text_index.add(movie.id, ((movie.title, self.TITLE_WEIGHT), (movie.description, 1)))
+
+    def __unindex_movie(self, movie: Movie):
+        # Undoes add_movie, along with the movie's associations with actors, directors and genres.
+        del self.__movies[_position_of(self.__movies, movie)]
+        if movie.release_year is not None:
+            bucket = self.__movies_by_release_year[movie.release_year]
+            del bucket[_position_of(bucket, movie)]
+            if len(bucket) == 0:
+                del self.__movies_by_release_year[movie.release_year]
+                self.__release_years.remove(movie.release_year)
+        del self.__movie_index[movie.id]
+        if movie.title is not None:
+            self.__title_index.remove(movie.id)
+            self.__completions['title'].remove(movie.title, movie.id)
+        self.__text_index.remove(movie.id, ((movie.title, self.TITLE_WEIGHT), (movie.description, 1)))
+        self.__movie_columns.remove(movie.id)
+        for index in self.__rankings.values():
+            index.remove(movie.id)
+
+        for genre in movie.genres:
+            genre.remove_movie(movie)
+        for actor in movie.actors:
+            actor.remove_movie(movie)
+        director = self.__directors.get(movie.director)
+        if director is not None:
+            director.remove_movie(movie)
+
+    @staticmethod
+    def __register_name(person, name, by_name: dict, by_normalized_name: dict, name_tree: BKTree) -> bool:
+        # Keys an actor or director by name and normalized name, returning whether the normalized name is new.
+        by_name.setdefault(name, person)
+        if name is None:
+            return False
+        normalized_name = normalize_name(name)
+        if normalized_name in by_normalized_name:
+            return False
+        by_normalized_name[normalized_name] = person
+        name_tree.add(normalized_name)
+        return True
+
+    def __index_rankings(self, movie: Movie):
+        for attribute, index in self.__rankings.items():
+            value = getattr(movie, attribute)
+            # Revenues and metascores that are 'Not Available' are left out of the rankings.
+            if isinstance(value, (int, float)):
+                index.add(movie.id, value)
+
+    def __index_release_year(self, movie: Movie):
+        if movie.release_year is None:
+            return
+        bucket = self.__movies_by_release_year.get(movie.release_year)
+        if bucket is None:
+            bucket = self.__movies_by_release_year[movie.release_year] = list()
+            insort_left(self.__release_years, movie.release_year)
+        insort_left(bucket, movie)
 
     def movie_index(self, movie: Movie):
+        with self.__lock.reading():
+            return self.__movie_position(movie)
+
+    def __movie_position(self, movie: Movie) -> int:
         index = bisect_left(self.__movies, movie)
         if index != len(self.__movies) and self.__movies[index].release_year == movie.release_year:
             return index
         raise ValueError
 
     def user_recommendations_by_genre(self, username: str) -> List[Movie]:
-        user = self.get_user(username)
-        preference_list = {}
-        recommended_movies = {}
-        reviewed = []
-        lowest_movie = None
-        lowest_score = None
-        if not user.reviews:
-            return self.__movies[0:10]
-        for review in user.reviews:
-            movie = review.movie
-            reviewed.append(movie)
-            weighting = review.rating - 5
-            for genre in movie.genres:
-                if genre not in preference_list:
-                    preference_list[genre] = weighting
-                else:
-                    preference_list[genre] += weighting
-        for movie in self.__movies:
-            if movie in reviewed:
-                continue
-            relation = 0
-            for genre in movie.genres:
-                relation += preference_list.get(genre, 0)
-            if len(recommended_movies) == 0:
-                recommended_movies[movie] = relation
-                lowest_movie = movie
-                lowest_score = relation
-            else:
-                if len(recommended_movies) < 10:
+        with self.__lock.reading():
+            user = self.__users.get(username)
+            preference_list = {}
+            recommended_movies = {}
+            reviewed = []
+            lowest_movie = None
+            lowest_score = None
+            if not user.reviews:
+                return self.__movies[0:10]
+            for review in user.reviews:
+                movie = review.movie
+                reviewed.append(movie)
+                weighting = review.rating - 5
+                for genre in movie.genres:
+                    if genre not in preference_list:
+                        preference_list[genre] = weighting
+                    else:
+                        preference_list[genre] += weighting
+            for movie in self.__movies:
+                if movie in reviewed:
+                    continue
+                relation = 0
+                for genre in movie.genres:
+                    relation += preference_list.get(genre, 0)
+                if len(recommended_movies) == 0:
                     recommended_movies[movie] = relation
-                    if relation < lowest_score:
-                        lowest_score = relation
-                        lowest_movie = movie
+                    lowest_movie = movie
+                    lowest_score = relation
                 else:
-                    if relation > lowest_score:
-                        recommended_movies.pop(lowest_movie)
+                    if len(recommended_movies) < 10:
                         recommended_movies[movie] = relation
-                        lowest_movie = min(recommended_movies.keys(), key=(lambda k: recommended_movies[k]))
-                        lowest_score = recommended_movies[lowest_movie]
-        x = {key: value for key, value in sorted(recommended_movies.items(), key=lambda item: item[1])}
-        top_ten_recommendations = list(x.keys())
-        return top_ten_recommendations
+                        if relation < lowest_score:
+                            lowest_score = relation
+                            lowest_movie = movie
+                    else:
+                        if relation > lowest_score:
+                            recommended_movies.pop(lowest_movie)
+                            recommended_movies[movie] = relation
+                            lowest_movie = min(recommended_movies.keys(), key=(lambda k: recommended_movies[k]))
+                            lowest_score = recommended_movies[lowest_movie]
+            x = {key: value for key, value in sorted(recommended_movies.items(), key=lambda item: item[1])}
+            top_ten_recommendations = list(x.keys())
+            return top_ten_recommendations
+
+
+class LoadProgress:
+    """
+    Progress of populating a repository, updated by the loading thread and read by any other. Counters are only ever
+    assigned by the loading thread, so readers see each of them either before or after an update.
+    """
+    STAGES = ('parsing movies', 'indexing movies', 'loading users', 'loading reviews', 'ready', 'failed')
+
+    def __init__(self):
+        self.stage = self.STAGES[0]
+        self.movies_parsed = 0
+        self.movies_indexed = 0
+        self.users_loaded = 0
+        self.reviews_loaded = 0
+        self.error = None
+        self.__started = time.monotonic()
+        self.__finished = None
+        self.__done = threading.Event()
+
+    @property
+    def ready(self) -> bool:
+        return self.stage == 'ready'
+
+    @property
+    def done(self) -> bool:
+        return self.__done.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        """ Blocks until loading has finished or failed, or timeout seconds have passed. Returns whether it is done. """
+        return self.__done.wait(timeout)
+
+    def finish(self, error: str = None):
+        self.error = error
+        self.stage = 'failed' if error is not None else 'ready'
+        self.__finished = time.monotonic()
+        self.__done.set()
+
+    def count_movie_rows(self, movie_rows):
+        for movie_row in movie_rows:
+            self.movies_parsed += 1
+            yield movie_row
+
+    def as_dict(self) -> dict:
+        finished = self.__finished if self.__finished is not None else time.monotonic()
+        return {
+            'ready': self.ready,
+            'stage': self.stage,
+            'movies_parsed': self.movies_parsed,
+            'movies_indexed': self.movies_indexed,
+            'users_loaded': self.users_loaded,
+            'reviews_loaded': self.reviews_loaded,
+            'elapsed_seconds': round(finished - self.__started, 3),
+            'error': self.error,
+        }
+
+
+# Number of latest reviews of each movie and by each user held in memory when reviews are streamed into a review store.
+RECENT_REVIEW_COUNT = 10
+# Files smaller than this are parsed in a single process, as starting workers would take longer than parsing them.
+MIN_CHUNK_BYTES = 1 << 20
+CSV_BLOCK_BYTES = 1 << 20
+
+
+def _position_of(movies: List[Movie], movie: Movie) -> int:
+    # Movies with the same title and release year compare equal, so the sorted list is searched for this very one.
+    position = bisect_left(movies, movie)
+    while movies[position] is not movie:
+        position += 1
+    return position
+
+
+def _positions(entities) -> (list, dict):
+    """
+    Returns the distinct entities, in the order they are first seen, along with a dict from the id() of each of them to
+    its position. Entities are told apart by identity, since distinct actors can share a name.
+    """
+    positions = dict()
+    distinct = list()
+    for entity in entities:
+        if id(entity) not in positions:
+            positions[id(entity)] = len(distinct)
+            distinct.append(entity)
+    return distinct, positions
+
+
+def _positions_of(entities, positions: dict) -> list:
+    return [positions[id(entity)] for entity in entities if id(entity) in positions]
+
+
+def _positions_by_key(entities_by_key: dict, positions: dict) -> dict:
+    return {key: positions[id(entity)] for key, entity in entities_by_key.items()}
+
+
+def read_csv_headers(filename: str) -> List[str]:
+    with open(filename, encoding='utf-8-sig') as infile:
+        return [header.strip() for header in next(csv.reader(infile))]
 
 
 def read_csv_file(filename: str):
@@ -237,98 +839,273 @@ def read_csv_file(filename: str):
             yield row
 
 
-def load_movies(data_path: str, repo: MemoryRepository):
-    genres = dict()
+def csv_chunks(filename: str, chunk_count: int) -> List[tuple]:
+    """
+    Splits the records of a CSV file, after its header line, into at most chunk_count (start, end) byte ranges of
+    roughly equal size. Every range starts and ends on a record boundary: a newline preceded by an even number of
+    quote characters, since a newline inside a quoted field doesn't end a record.
+    """
+    chunks = list()
+    with open(filename, 'rb') as infile:
+        infile.readline()
+        start = infile.tell()
+        with mmap.mmap(infile.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for i in range(1, chunk_count):
+                newline = data.find(b'\n', max(start, start + (len(data) - start) // (chunk_count - i + 1)))
+                # Quotes are only counted from the start of the chunk, as the previous chunk ended outside of quotes.
+                quotes = _count_quotes(data, start, newline)
+                while newline != -1 and quotes % 2 == 1:
+                    next_newline = data.find(b'\n', newline + 1)
+                    quotes += _count_quotes(data, newline, next_newline)
+                    newline = next_newline
+                if newline == -1:
+                    break
+                chunks.append((start, newline + 1))
+                start = newline + 1
+            if start < len(data):
+                chunks.append((start, len(data)))
+    return chunks
+
+
+def _count_quotes(data: mmap.mmap, start: int, end: int) -> int:
+    # Counted a block at a time, so that a chunk is never copied out of the mapping whole.
+    end = len(data) if end == -1 else end
+    return sum(data[i:min(i + CSV_BLOCK_BYTES, end)].count(b'"') for i in range(start, end, CSV_BLOCK_BYTES))
+
+
+def read_csv_chunk(filename: str, start: int, end: int) -> list:
+    """ Returns the parsed movie rows found between the start and end byte offsets of a CSV file of movies. """
+    with open(filename, 'rb') as infile:
+        infile.seek(start)
+        text = infile.read(end - start).decode('utf-8')
+    # Newlines are translated as when reading the whole file in text mode.
+    rows = csv.reader(io.StringIO(text, newline=None))
+    return [parse_movie_row([item.strip() for item in row]) for row in rows]
+
+
+def parse_movie_row(data_row: List[str]) -> tuple:
+    """
+    Converts a row of Data1000Movies.csv into a tuple of (id, title, release year, genre names, description, director
+    name, actor names, runtime, rating, votes, revenue, metascore), with 'Not Available' for a missing revenue or
+    metascore.
+    """
+    revenue = data_row[10]
+    metascore = data_row[11]
+    return (
+        int(data_row[0]),
+        data_row[1],
+        int(data_row[6]),
+        data_row[2].split(","),
+        data_row[3],
+        data_row[4],
+        data_row[5].split(","),
+        int(data_row[7]),
+        float(data_row[8]),
+        int(data_row[9]),
+        float(revenue) if revenue[0].isdigit() else 'Not Available',
+        float(metascore) if metascore[0].isdigit() else 'Not Available',
+    )
+
+
+def load_movies(data_path: str, repo: MemoryRepository, workers: int = 1, progress: LoadProgress = None):
+    """
+    Loads the movies of Data1000Movies.csv into repo. With more than one worker, chunks of the file are parsed in a
+    pool of processes and merged in file order, so the repository ends up exactly as with a single worker.
+    """
+    filename = os.path.join(data_path, 'Data1000Movies.csv')
+    chunk_count = min(workers, os.path.getsize(filename) // MIN_CHUNK_BYTES)
+    if chunk_count > 1:
+        chunks = csv_chunks(filename, chunk_count)
+        starts, ends = zip(*chunks)
+        with ProcessPoolExecutor(min(workers, len(chunks))) as pool:
+            # Results come back in the order of the chunks, whichever worker finishes first.
+            parsed_chunks = pool.map(read_csv_chunk, repeat(filename), starts, ends)
+            add_movie_rows(chain.from_iterable(parsed_chunks), repo, progress)
+    else:
+        add_movie_rows((parse_movie_row(data_row) for data_row in read_csv_file(filename)), repo, progress)
+
+
+def load_catalog_movies(catalog: CatalogFile, repo: MemoryRepository, progress: LoadProgress = None):
+    """ Loads the movies of a catalog file into repo, their descriptions staying in the file. """
+    progress = progress or LoadProgress()
+    progress.stage = 'parsing movies'
+    movies, actors, directors, genres = associate_movies(catalog.named_movies(), repo)
+    progress.movies_parsed = len(movies)
+    progress.stage = 'indexing movies'
+    repo.add_movies_bulk(movies, actors, directors, genres)
+    progress.movies_indexed = len(movies)
+
+
+def add_movie_rows(movie_rows, repo: MemoryRepository, progress: LoadProgress = None):
+    """ Builds the movies, and their genres, actors and directors, from parsed movie rows and adds them to repo. """
+    progress = progress or LoadProgress()
+    movies, actors, directors, genres = make_movies(progress.count_movie_rows(movie_rows), repo)
+    progress.stage = 'indexing movies'
+    repo.add_movies_bulk(movies, actors, directors, genres)
+    progress.movies_indexed = len(movies)
+
+
+def make_movies(movie_rows, repo: MemoryRepository) -> tuple:
+    """
+    Builds the movies of parsed movie rows, associated with the genres, actors and directors of repo or with new ones
+    where repo has none of that name. Returns the movies along with the actors, directors and genres they refer to.
+    """
+    return associate_movies(((_movie_of_row(movie_row), movie_row[3], movie_row[5], movie_row[6])
+                             for movie_row in movie_rows), repo)
+
+
+def _movie_of_row(movie_row: tuple) -> Movie:
+    (movie_id, title, release_year, movie_genres, description, director_name, movie_actors, runtime_minutes,
+     rating, votes, revenue, metascore) = movie_row
+    movie = Movie(title, release_year)
+    movie.id = movie_id
+    movie.description = description
+    movie.runtime_minutes = runtime_minutes
+    movie.rating = rating
+    movie.votes = votes
+    movie.revenue = revenue
+    movie.metascore = metascore
+    return movie
+
+
+def associate_movies(named_movies, repo: MemoryRepository) -> tuple:
+    """
+    Associates movies, each given along with the names of its genres, director and actors, with the genres, actors and
+    directors of repo or with new ones where repo has none of that name. Returns the movies along with the actors,
+    directors and genres they refer to.
+    """
+    genres = {genre.genre_full_name: genre for genre in repo.get_genres()}
     directors = dict()
     actors = dict()
+    movies = list()
 
-    for data_row in read_csv_file(os.path.join(data_path, 'Data1000Movies.csv')):
-        movie = Movie(data_row[1], int(data_row[6]))
-        movie.id = int(data_row[0])
-        movie_genres = data_row[2].split(",")
-        movie.description = data_row[3]
-        movie.director = data_row[4]
-        movie_actors = data_row[5].split(",")
-        movie.runtime_minutes = int(data_row[7])
-        movie.rating = float(data_row[8])
-        movie.votes = int(data_row[9])
-        revenue = data_row[10]
-        metascore = data_row[11]
-
-        for genre in movie_genres:
-            if genre not in genres.keys():
-                genres[genre] = list()
-            genres[genre].append(movie.id)
-
-        for actor in movie_actors:
-            if actor not in actors.keys():
-                actors[actor] = list()
-            actors[actor].append(movie.id)
-
-        if movie.director not in directors.keys():
-            directors[movie.director] = list()
-        directors[movie.director].append(movie.id)
-
-        if revenue[0].isdigit():
-            movie.revenue = float(revenue)
-        else:
-            movie.revenue = 'Not Available'
+    for movie, movie_genres, director_name, movie_actors in named_movies:
+        # Associate the movie while the row is at hand, rather than looking every movie up again afterwards.
+        for genre_name in movie_genres:
+            if genre_name not in genres:
+                genres[genre_name] = Genre(genre_name)
+            make_genre_association(movie, genres[genre_name])
 
-        if metascore[0].isdigit():
-            movie.metascore = float(metascore)
-        else:
-            movie.metascore = 'Not Available'
+        for actor_name in movie_actors:
+            if actor_name not in actors:
+                actors[actor_name] = repo.get_actor(actor_name) or Actor(actor_name)
+            make_actor_association(movie, actors[actor_name])
 
-        repo.add_movie(movie)
+        movie.director = director_name
+        if movie.director not in directors:
+            directors[movie.director] = repo.get_director(movie.director) or Director(movie.director)
+        make_director_association(movie, directors[movie.director])
+        movies.append(movie)
 
-    for actor_name in actors.keys():
-        actor = Actor(actor_name)
-        for movie_id in actors[actor_name]:
-            movie = repo.get_movie_by_id(movie_id)
-            make_actor_association(movie, actor)
-        repo.add_actor(actor)
+    return movies, actors.values(), directors.values(), genres.values()
 
-    for genre_name in genres.keys():
-        genre = Genre(genre_name)
-        for movie_id in genres[genre_name]:
-            movie = repo.get_movie_by_id(movie_id)
-            make_genre_association(movie, genre)
-        repo.add_genre(genre)
 
-    for director_name in directors.keys():
-        director = Director(director_name)
-        for movie_id in directors[director_name]:
-            movie = repo.get_movie_by_id(movie_id)
-            make_director_association(movie, director)
-        repo.add_director(director)
+def apply_movie_changes(changes: dict, repo: MemoryRepository):
+    """
+    Applies changes, mapping movie ids to their new parsed rows or to None for removed movies, to repo. A changed movie
+    is removed and added anew, then takes over the reviews, viewings and watchlist entries of the movie it replaces.
+    The changes are applied while holding the write lock, so that no read sees a movie removed but not yet replaced.
+    """
+    with repo.writing():
+        removed_movies = repo.remove_movies(changes)
+        movies, actors, directors, genres = make_movies(
+            (movie_row for movie_row in changes.values() if movie_row is not None), repo)
+        repo.add_movies_bulk(movies, actors, directors, genres)
+        repo.relink_movies(removed_movies)
 
 
 def load_users(data_path: str, repo: MemoryRepository):
+    """
+    Loads the users of users.csv into repo. A users file written by write_users_file holds password hashes, which are
+    used as they are. Older users files hold plaintext passwords, which are marked as such and only hashed when their
+    user first logs in, so that loading users derives no keys.
+    """
+    filename = os.path.join(data_path, 'users.csv')
+    hashed = read_csv_headers(filename)[2] == 'password_hash'
     users = dict()
-    for data_row in read_csv_file(os.path.join(data_path, 'users.csv')):
+    for data_row in read_csv_file(filename):
         user = User(
             user_name=data_row[1],
-            password=generate_password_hash(data_row[2])
+            password=data_row[2] if hashed else PLAINTEXT_PASSWORD_PREFIX + data_row[2]
         )
         repo.add_user(user)
         users[int(data_row[0])] = user
     return users
 
 
-def load_reviews(data_path: str, repo: MemoryRepository, users):
+def write_users_file(filename: str, workers: int = None):
+    """
+    Rewrites a users file holding plaintext passwords so that it holds their hashes instead. The passwords are hashed
+    by a pool of worker processes, as every hash is deliberately expensive to compute.
+    """
+    if read_csv_headers(filename)[2] == 'password_hash':
+        return
+    rows = list(read_csv_file(filename))
+    with ProcessPoolExecutor(workers) as pool:
+        password_hashes = list(pool.map(generate_password_hash, (data_row[2] for data_row in rows), chunksize=64))
+
+    temporary_filename = f'{filename}.tmp'
+    with open(temporary_filename, 'w', newline='', encoding='utf-8') as outfile:
+        writer = csv.writer(outfile)
+        writer.writerow(['id', 'username', 'password_hash'])
+        for data_row, password_hash in zip(rows, password_hashes):
+            writer.writerow([data_row[0], data_row[1], password_hash])
+    os.replace(temporary_filename, filename)
+
+
+def load_reviews(data_path: str, repo: MemoryRepository, users) -> int:
+    review_count = 0
     for data_row in read_csv_file(os.path.join(data_path, 'reviews.csv')):
         movie = repo.get_movie_by_id(int(data_row[2]))
         user = users[int(data_row[1])]
         review = make_review(review_text=data_row[3], user=user, movie=movie, rating=int(data_row[4]), timestamp=datetime.fromisoformat(data_row[5]))
         repo.add_review(review)
+        review_count += 1
+    return review_count
+
+
+def stream_reviews(data_path: str, repo: MemoryRepository, users, review_store_path: str) -> int:
+    """
+    Loads the reviews of reviews.csv into repo while holding only a bounded number of them in memory: every review is
+    appended to a review store at review_store_path, and only the counts, rating sums and RECENT_REVIEW_COUNT latest
+    reviews of each movie and user are kept. Returns the number of reviews loaded.
+    """
+    review_store = ReviewStore(review_store_path)
+    movie_summaries = dict()
+    user_summaries = dict()
+    for data_row in read_csv_file(os.path.join(data_path, 'reviews.csv')):
+        movie = repo.get_movie_by_id(int(data_row[2]))
+        user = users[int(data_row[1])]
+        review = Review(user, movie, data_row[3], int(data_row[4]), datetime.fromisoformat(data_row[5]))
+        review_store.append(movie.id, user.username, review.review_text, review.rating, review.timestamp)
+        if movie.id not in movie_summaries:
+            movie_summaries[movie.id] = ReviewSummary(RECENT_REVIEW_COUNT)
+        movie_summaries[movie.id].add(review)
+        if user not in user_summaries:
+            user_summaries[user] = ReviewSummary(RECENT_REVIEW_COUNT)
+        user_summaries[user].add(review)
+    repo.add_review_summaries(movie_summaries, user_summaries, review_store)
+    return len(review_store)
+
 
+def populate(data_path: str, repo: MemoryRepository, workers: int = 1, progress: LoadProgress = None,
+             review_store_path: str = None, catalog: CatalogFile = None):
+    progress = progress or LoadProgress()
 
-def populate(data_path: str, repo: MemoryRepository):
-    # Load movies from Data1000Movies.csv
-    load_movies(data_path, repo)
+    # Load movies from the catalog file if one is given, and from Data1000Movies.csv otherwise
+    if catalog is not None:
+        load_catalog_movies(catalog, repo, progress)
+    else:
+        load_movies(data_path, repo, workers, progress)
 
     # Load users into the repository
+    progress.stage = 'loading users'
     users = load_users(data_path, repo)
+    progress.users_loaded = len(users)
 
     # Load reviews into the repository
-    load_reviews(data_path, repo, users)
+    progress.stage = 'loading reviews'
+    if review_store_path:
+        progress.reviews_loaded = stream_reviews(data_path, repo, users, review_store_path)
+    else:
+        progress.reviews_loaded = load_reviews(data_path, repo, users)
@@ -0,0 +1,122 @@
+import numpy as np
+
+from movie_web_app.domainmodel.model import Movie
+
+
+class MovieColumns:
+    """
+    A columnar side-store of the numeric attributes of movies, one NumPy array per attribute, so that range filters
+    over the whole catalog are evaluated as vectorized boolean masks instead of property lookups on every Movie.
+
+    Revenue and metascore are 'Not Available' for some movies; those are stored as NaN, which fails every range
+    comparison, so a movie without a revenue never matches a revenue range.
+    """
+    COLUMNS = {
+        'id': np.int64,
+        'release_year': np.float64,
+        'runtime_minutes': np.int32,
+        'rating': np.float64,
+        'votes': np.int64,
+        'revenue': np.float64,
+        'metascore': np.float64,
+    }
+    INITIAL_CAPACITY = 1024
+
+    def __init__(self):
+        self.__size = 0
+        self.__columns = {name: np.zeros(self.INITIAL_CAPACITY, dtype) for name, dtype in self.COLUMNS.items()}
+        # Row of each movie id, used to refresh a movie whose values changed.
+        self.__rows = dict()
+
+    def __len__(self):
+        return self.__size
+
+    def column(self, name: str) -> np.ndarray:
+        """ Returns a read-only view of the stored values of the named column. """
+        view = self.__columns[name][:self.__size]
+        view.flags.writeable = False
+        return view
+
+    def add(self, movie: Movie):
+        if movie.id in self.__rows:
+            self.update(movie)
+            return
+        if self.__size == len(self.__columns['id']):
+            # Double the capacity so that appending stays amortised O(1).
+            for name, values in self.__columns.items():
+                self.__columns[name] = np.resize(values, 2 * len(values))
+
+        self.__rows[movie.id] = self.__size
+        self.__size += 1
+        self.update(movie)
+
+    def add_many(self, movies):
+        """ Appends rows for all of movies at once, growing each column a single time. """
+        new_movies = dict()
+        for movie in movies:
+            if movie.id not in self.__rows:
+                new_movies.setdefault(movie.id, movie)
+        movies = list(new_movies.values())
+        size = self.__size + len(movies)
+        if size > len(self.__columns['id']):
+            capacity = max(size, 2 * len(self.__columns['id']))
+            for name, values in self.__columns.items():
+                self.__columns[name] = np.resize(values, capacity)
+
+        rows = [self.__values(movie) for movie in movies]
+        for name, dtype in self.COLUMNS.items():
+            self.__columns[name][self.__size:size] = np.fromiter((row[name] for row in rows), dtype, len(rows))
+        for row, movie in enumerate(movies, self.__size):
+            self.__rows[movie.id] = row
+        self.__size = size
+
+    def remove(self, movie_id: int):
+        """ Removes the row of a movie, moving the last row into its place. """
+        row = self.__rows.pop(movie_id, None)
+        if row is None:
+            return
+        self.__size -= 1
+        if row != self.__size:
+            for values in self.__columns.values():
+                values[row] = values[self.__size]
+            self.__rows[int(self.__columns['id'][row])] = row
+
+    def update(self, movie: Movie):
+        """ Copies the current values of a stored movie into its row. """
+        row = self.__rows[movie.id]
+        for name, value in self.__values(movie).items():
+            self.__columns[name][row] = value
+
+    def filter(self, ranges: dict) -> np.ndarray:
+        """
+        Returns the ids, in ascending order, of the movies whose values lie within every given range. ranges maps a
+        column name to a (low, high) pair of inclusive bounds, either of which may be None to leave that end open.
+        """
+        return filter_columns({name: values[:self.__size] for name, values in self.__columns.items()}, ranges)
+
+    @staticmethod
+    def __values(movie: Movie) -> dict:
+        return {
+            'id': movie.id,
+            'release_year': np.nan if movie.release_year is None else movie.release_year,
+            'runtime_minutes': movie.runtime_minutes,
+            'rating': movie.rating,
+            'votes': movie.votes,
+            'revenue': movie.revenue if isinstance(movie.revenue, float) else np.nan,
+            'metascore': movie.metascore if isinstance(movie.metascore, float) else np.nan,
+        }
+
+
+def filter_columns(columns: dict, ranges: dict) -> np.ndarray:
+    """
+    Returns the ids, in ascending order, of the rows of columns whose values lie within every given range, where
+    columns maps each column name to an array of equal length and ranges is as for MovieColumns.filter.
+    """
+    mask = np.ones(len(columns['id']), dtype=bool)
+    for name, (low, high) in ranges.items():
+        values = columns[name]
+        if low is not None:
+            mask &= values >= low
+        if high is not None:
+            mask &= values <= high
+    return np.sort(columns['id'][mask])
@@ -0,0 +1,90 @@
+"""
+Reloading of the movies data file while the application runs, so that edits to the catalog show without a restart.
+
+A background thread polls the modification time of Data1000Movies.csv. When it changes, the file is read again and
+each row is compared, by a digest, with the row of the same movie id when the file was last read. The rows of new and
+changed movies, and the ids of removed ones, make a pending change that is applied to the repository at the start of
+the next request, so that no request sees the repository in the middle of the change.
+"""
+import logging
+import os
+import threading
+import time
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.caching_repository import CachingRepository
+from movie_web_app.adapters.memory_repository import LoadProgress, apply_movie_changes, parse_movie_row, read_csv_file
+
+logger = logging.getLogger(__name__)
+
+
+def movie_rows_by_id(filename: str) -> dict:
+    """ Returns the rows of a movies data file keyed by movie id, each row as a tuple of its stripped fields. """
+    return {int(data_row[0]): tuple(data_row) for data_row in read_csv_file(filename)}
+
+
+class CatalogReloader:
+    def __init__(self, data_path: str, interval: float, progress: LoadProgress):
+        self.__filename = os.path.join(data_path, 'Data1000Movies.csv')
+        self.__interval = interval
+        self.__progress = progress
+        self.__modified = None
+        self.__digests = dict()
+        # Changes found but not applied yet, keyed by movie id. A later change of the same movie replaces an earlier
+        # one, so changes found between two requests are applied together.
+        self.__changes = dict()
+        self.__changes_lock = threading.Lock()
+        # Checks are serialised, so that a change is never recorded twice or missed.
+        self.__check_lock = threading.Lock()
+
+    def start(self):
+        threading.Thread(target=self.__watch, name='catalog-reloader', daemon=True).start()
+
+    def check(self) -> bool:
+        """
+        Reads the movies data file again if it was modified since it was last read, and records how its movies
+        changed. Returns whether any movie changed. The first call only records the file as it is.
+        """
+        with self.__check_lock:
+            return self.__check()
+
+    def __check(self) -> bool:
+        modified = os.stat(self.__filename).st_mtime_ns
+        if modified == self.__modified:
+            return False
+        rows = movie_rows_by_id(self.__filename)
+        digests = {movie_id: hash(data_row) for movie_id, data_row in rows.items()}
+        changes = dict()
+        if self.__modified is not None:
+            changes = {movie_id: parse_movie_row(list(data_row)) for movie_id, data_row in rows.items()
+                       if self.__digests.get(movie_id) != digests[movie_id]}
+            changes.update((movie_id, None) for movie_id in self.__digests if movie_id not in digests)
+        self.__modified = modified
+        self.__digests = digests
+        with self.__changes_lock:
+            self.__changes.update(changes)
+        return len(changes) > 0
+
+    def apply(self):
+        """ Applies the changes found so far to the repository. Runs before every request. """
+        if not self.__progress.ready or len(self.__changes) == 0:
+            return
+        with self.__changes_lock:
+            changes, self.__changes = self.__changes, dict()
+        repository = repo.repo_instance
+        if isinstance(repository, CachingRepository):
+            apply_movie_changes(changes, repository.repository)
+            repository.clear()
+        else:
+            apply_movie_changes(changes, repository)
+        logger.info('Applied changes to %d movies from %s', len(changes), self.__filename)
+
+    def __watch(self):
+        self.__progress.wait()
+        while True:
+            try:
+                self.check()
+            except (OSError, ValueError, IndexError):
+                # The file may have been read while it was being written; it is read again once it is modified.
+                logger.exception('Reading %s failed', self.__filename)
+            time.sleep(self.__interval)
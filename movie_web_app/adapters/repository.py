@@ -1,9 +1,13 @@
 import abc
+from datetime import datetime
 from typing import List
-from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList
+from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, make_review
 
 repo_instance = None
 
+# Movie attributes that movies can be ranked by.
+RANKED_ATTRIBUTES = ('rating', 'votes', 'revenue', 'metascore')
+
 
 class RepositoryException(Exception):
 
@@ -23,6 +27,11 @@ class AbstractRepository(abc.ABC):
         """ Returns the User named username from the repository. """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def update_user_password(self, user: User):
+        """ Stores the password of a User of the repository, after it was changed on the User. """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_actor(self, actor: Actor):
         """ Adds an actor to the repository """
@@ -63,6 +72,14 @@ class AbstractRepository(abc.ABC):
         """ Adds a movie to the repository and add the index of movie to repo """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def add_movies_bulk(self, movies, actors=(), directors=(), genres=()):
+        """
+        Adds many movies to the repository at once, together with the actors, directors and genres associated with
+        them. Equivalent to adding each of them in turn, but indexes are built in one pass and sorted once.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def get_movie(self, title: str, release_year: int):
         """
@@ -96,6 +113,31 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_similar_actor_names(self, actor_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """
+        Returns up to limit names of actors within max_distance edits of actor_fullname, closest first
+        Returns an empty list if no actor name is close enough
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_similar_director_names(self, director_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        """
+        Returns up to limit names of directors within max_distance edits of director_fullname, closest first
+        Returns an empty list if no director name is close enough
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def autocomplete(self, prefix: str, kind: str, limit: int = 10, time_budget: float = None) -> List[str]:
+        """
+        Returns up to limit movie titles, actor names or director names (kind is 'title', 'actor' or 'director') that
+        have a word starting with prefix, ranked by the number of votes of their movies
+        If time_budget seconds elapse before every match has been ranked, the best matches found so far are returned
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def search_movie_by_title(self, title: str) -> List[Movie]:
         """
@@ -104,6 +146,14 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def search_movies_by_text(self, query: str, limit: int = 20) -> List[Movie]:
+        """
+        Returns up to limit movies whose title or description best match the words of query, best match first
+        Returns an empty list if no movie matches any of the words
+        """
+        raise NotImplementedError
+
 
     @abc.abstractmethod
     def get_newest_movie(self):
@@ -170,6 +220,47 @@ class AbstractRepository(abc.ABC):
         """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_movies_by_genres(self, genre_names, excluded_genre_names=()):
+        """
+        Returns a list of movie indexes, in ascending order, representing Movies that are classified by every one of
+        genre_names and by none of excluded_genre_names
+        If no genre names are given, or no movie matches, then the method returns an empty list
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movies_by_facets(self, facets: dict):
+        """
+        Returns a list of movie indexes, in ascending order, representing Movies whose attributes lie within every
+        given range. facets maps 'release_year', 'runtime_minutes', 'rating', 'votes', 'revenue' or 'metascore' to an
+        inclusive (low, high) pair, either of which may be None to leave that end of the range open
+        Movies whose revenue or metascore is not available never match a range on that attribute
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_top_movie_ids(self, attribute: str, limit: int, offset: int = 0) -> List[int]:
+        """
+        Returns the indexes of up to limit Movies with the highest values of attribute, one of RANKED_ATTRIBUTES,
+        highest first, after skipping the offset highest
+        Movies whose value of attribute is not available are never ranked
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_movie_ids_by_range(self, attribute: str, low=None, high=None) -> List[int]:
+        """
+        Returns the indexes of Movies whose value of attribute, one of RANKED_ATTRIBUTES, lies within the inclusive
+        bounds low and high, lowest value first. Either bound may be None to leave that end of the range open
+        """
+        raise NotImplementedError
+
+    @abc.abstractmethod
+    def get_number_of_ranked_movies(self, attribute: str) -> int:
+        """ Returns the number of Movies that have a value of attribute, one of RANKED_ATTRIBUTES """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_review(self, review: Review):
         """
@@ -183,11 +274,32 @@ class AbstractRepository(abc.ABC):
         if review.movie is None or review not in review.movie.reviews:
             raise RepositoryException("Review not correctly attached to a Movie")
 
+    def add_review_for(self, movie_id: int, username: str, review_text: str, rating: int,
+                       timestamp: datetime = None) -> Review:
+        """
+        Makes a Review of the Movie with the given id by the User named username, links it to both and adds it to the
+        repository, as a single change. Returns the Review, or None if there is no such Movie or User.
+        """
+        movie = self.get_movie_by_id(movie_id)
+        user = self.get_user(username)
+        if movie is None or user is None:
+            return None
+        review = make_review(review_text, user, movie, rating, timestamp or datetime.today())
+        self.add_review(review)
+        return review
+
     @abc.abstractmethod
     def get_reviews(self) -> List[Review]:
         """ Returns reviews stored in the repository """
         raise NotImplementedError
 
+    @abc.abstractmethod
+    def get_reviews_for_movie(self, movie_id: int) -> List[Review]:
+        """
+        Returns the reviews of the Movie with the given id, oldest first, or an empty list if there is no such Movie.
+        """
+        raise NotImplementedError
+
     @abc.abstractmethod
     def add_watchlist(self, watchlist: WatchList):
         """ Adds an empty watchlist to the repository """
@@ -0,0 +1,73 @@
+"""
+An append-only file of reviews, so that the reviews of a very large reviews file need not all be held in memory.
+
+Each record is a header, holding the offset of the previous record of the same movie (or -1) and the length of the
+payload, followed by the payload: the JSON encoded username, review text, rating and timestamp of the review. Records
+of a movie are chained from its newest one backwards, so that the store only keeps the offset of the newest record of
+each movie in memory.
+"""
+import json
+import threading
+from collections import deque
+from datetime import datetime
+
+RECORD_HEADER_SIZE = 12
+
+
+class ReviewStore:
+    def __init__(self, store_path: str):
+        # The file is created anew: records are only ever appended while the repository is loaded or in use.
+        self.__file = open(store_path, 'w+b')
+        self.__size = 0
+        self.__newest_records = dict()
+        # Appends and reads share the file position, so they are serialised.
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        with self.__lock:
+            return self.__size
+
+    def append(self, movie_id: int, username: str, review_text: str, rating, timestamp: datetime):
+        payload = json.dumps([username, review_text, rating, timestamp.isoformat()]).encode('utf-8')
+        with self.__lock:
+            offset = self.__file.seek(0, 2)
+            previous = self.__newest_records.get(movie_id, -1)
+            self.__file.write(previous.to_bytes(8, 'little', signed=True) + len(payload).to_bytes(4, 'little'))
+            self.__file.write(payload)
+            self.__newest_records[movie_id] = offset
+            self.__size += 1
+
+    def reviews_for_movie(self, movie_id: int) -> list:
+        """ Returns the (username, review text, rating, timestamp) of every review of a movie, oldest first. """
+        reviews = deque()
+        with self.__lock:
+            offset = self.__newest_records.get(movie_id, -1)
+            while offset != -1:
+                self.__file.seek(offset)
+                header = self.__file.read(RECORD_HEADER_SIZE)
+                username, review_text, rating, timestamp = json.loads(
+                    self.__file.read(int.from_bytes(header[8:], 'little')))
+                reviews.appendleft((username, review_text, rating, datetime.fromisoformat(timestamp)))
+                offset = int.from_bytes(header[:8], 'little', signed=True)
+        return list(reviews)
+
+    def close(self):
+        self.__file.close()
+
+
+class ReviewSummary:
+    """ The number of reviews of a movie or by a user, the number and sum of their ratings, and the latest reviews. """
+    __slots__ = ('count', 'rating_count', 'rating_sum', 'recent')
+
+    def __init__(self, recent_count: int):
+        self.count = 0
+        self.rating_count = 0
+        self.rating_sum = 0
+        self.recent = deque(maxlen=recent_count)
+
+    def add(self, review):
+        self.count += 1
+        if review.rating is not None:
+            self.rating_count += 1
+            self.rating_sum += review.rating
+        self.recent.append(review)
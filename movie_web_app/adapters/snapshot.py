@@ -0,0 +1,104 @@
+"""
+Versioned binary snapshots of a populated MemoryRepository, so that the application can start from a single file
+instead of parsing the CSV data files and rebuilding every index.
+
+A snapshot is a fixed header, holding a magic string, the format version and the modification time of the newest
+data file it was built from, followed by the pickled repository.
+"""
+import gc
+import os
+import pickle
+import struct
+
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.caching_repository import CachingRepository
+from movie_web_app.adapters.memory_repository import MemoryRepository
+
+MAGIC = b'MWASNAP'
+# Bump whenever the pickled state of the repository, its indexes or the domain model changes shape.
+VERSION = 2
+HEADER = struct.Struct('<7sHq')
+DATA_FILES = ('Data1000Movies.csv', 'users.csv', 'reviews.csv')
+
+
+class SnapshotException(Exception):
+    pass
+
+
+def data_files_mtime(data_path: str) -> int:
+    """ Returns the modification time, in nanoseconds, of the most recently modified data file. """
+    return max(os.stat(os.path.join(data_path, filename)).st_mtime_ns for filename in DATA_FILES)
+
+
+def write_snapshot(repository: MemoryRepository, snapshot_path: str, data_path: str):
+    """
+    Writes a snapshot of repository, which must have been populated from the data files in data_path. The snapshot is
+    written to a temporary file first, so that a reader never sees a partially written snapshot.
+    """
+    temporary_path = f'{snapshot_path}.tmp'
+    with open(temporary_path, 'wb') as outfile:
+        outfile.write(HEADER.pack(MAGIC, VERSION, data_files_mtime(data_path)))
+        pickle.dump(repository, outfile, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary_path, snapshot_path)
+
+
+def read_snapshot(snapshot_path: str, data_path: str = None) -> MemoryRepository:
+    """
+    Returns the repository stored in a snapshot. Raises SnapshotException if the file is not a snapshot of the current
+    version or, when data_path is given, if the data files in data_path have been modified since it was written.
+    """
+    with open(snapshot_path, 'rb') as infile:
+        header = infile.read(HEADER.size)
+        if len(header) < HEADER.size or header[:len(MAGIC)] != MAGIC:
+            raise SnapshotException(f'{snapshot_path} is not a repository snapshot')
+        magic, version, mtime = HEADER.unpack(header)
+        if version != VERSION:
+            raise SnapshotException(f'{snapshot_path} has snapshot version {version}, expected {VERSION}')
+        # The header is checked before unpickling, so that a stale snapshot costs nothing to reject.
+        if data_path is not None and mtime != data_files_mtime(data_path):
+            raise SnapshotException(f'The data files in {data_path} have changed since {snapshot_path} was written')
+        # Unpickling allocates millions of containers, each allocation counting towards a cyclic garbage collection
+        # that would traverse the whole partially built graph again, so collection is paused meanwhile.
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            return pickle.load(infile)
+        finally:
+            if gc_enabled:
+                gc.enable()
+
+
+def load_snapshot(snapshot_path: str, data_path: str):
+    """
+    Returns the repository stored in a snapshot, or None if there is no usable snapshot: when the file doesn't exist,
+    is of another version, or the data files have been modified since it was written.
+    """
+    try:
+        return read_snapshot(snapshot_path, data_path)
+    except (OSError, SnapshotException):
+        return None
+
+
+@click.command('write-snapshot')
+@click.argument('snapshot_path', required=False)
+@with_appcontext
+def write_snapshot_command(snapshot_path):
+    """ Writes a snapshot of the repository to SNAPSHOT_PATH, by default the configured SNAPSHOT_PATH. """
+    snapshot_path = snapshot_path or current_app.config.get('SNAPSHOT_PATH')
+    if not snapshot_path:
+        raise click.UsageError('No snapshot path was given and SNAPSHOT_PATH is not configured.')
+    if current_app.config['REPOSITORY'] != 'memory':
+        raise click.UsageError('Snapshots are only written of a memory repository.')
+    if current_app.config.get('CATALOG_PATH'):
+        raise click.UsageError('Snapshots are not written of a repository loaded from a catalog file.')
+    # With LAZY_POPULATE the repository may still be loading.
+    current_app.extensions['load_progress'].wait()
+    repository = repo.repo_instance
+    if isinstance(repository, CachingRepository):
+        repository = repository.repository
+    write_snapshot(repository, snapshot_path, current_app.config['DATA_PATH'])
+    click.echo(f'Wrote a snapshot of {repository.get_number_of_movies()} movies to {snapshot_path}')
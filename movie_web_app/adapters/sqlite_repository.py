@@ -0,0 +1,619 @@
+"""
+A repository kept in an SQLite database file, so that the catalog, users and reviews outlive the process and several
+processes can serve the same data.
+
+The database is opened in WAL mode, where readers never block the single writer nor each other. Every operation takes
+a connection of its own from a pool, so that each thread uses a connection no other thread is using at the time, and
+runs statements held as constants below with their values bound as parameters, so that each connection's statement
+cache compiles every statement only once. Lists of values are bound as a single JSON array.
+
+Movies, titles and names are indexed in the database itself: movies by title, release year, director and ranked
+attribute, genres and actors by name, titles by trigram and word suffix, and titles and descriptions in a BM25 ranked
+full-text table.
+"""
+import json
+import math
+import queue
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List
+
+from movie_web_app.adapters.indexes import normalize_name, tokenize, BKTree
+from movie_web_app.adapters.movie_columns import MovieColumns
+from movie_web_app.adapters.repository import AbstractRepository, RANKED_ATTRIBUTES
+from movie_web_app.domainmodel.model import User, Actor, Director, Genre, Movie, Review, WatchList, make_review
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS movies (
+    id INTEGER PRIMARY KEY,
+    title TEXT,
+    release_year INTEGER,
+    description TEXT,
+    director TEXT,
+    runtime_minutes INTEGER NOT NULL,
+    rating REAL NOT NULL,
+    votes INTEGER NOT NULL,
+    revenue REAL,
+    metascore REAL
+);
+CREATE INDEX IF NOT EXISTS movies_by_title ON movies (title, release_year);
+CREATE INDEX IF NOT EXISTS movies_by_release_year ON movies (release_year, title);
+CREATE INDEX IF NOT EXISTS movies_by_director ON movies (director);
+CREATE INDEX IF NOT EXISTS movies_by_rating ON movies (round(rating, 1), id);
+CREATE INDEX IF NOT EXISTS movies_by_votes ON movies (votes, id);
+CREATE INDEX IF NOT EXISTS movies_by_revenue ON movies (revenue, id);
+CREATE INDEX IF NOT EXISTS movies_by_metascore ON movies (metascore, id);
+
+CREATE TABLE IF NOT EXISTS actors (name TEXT PRIMARY KEY, normalized_name TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS actors_by_normalized_name ON actors (normalized_name);
+CREATE TABLE IF NOT EXISTS directors (name TEXT PRIMARY KEY, normalized_name TEXT NOT NULL);
+CREATE INDEX IF NOT EXISTS directors_by_normalized_name ON directors (normalized_name);
+CREATE TABLE IF NOT EXISTS genres (name TEXT PRIMARY KEY);
+
+CREATE TABLE IF NOT EXISTS movie_actors (
+    movie_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    actor TEXT NOT NULL,
+    PRIMARY KEY (movie_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_actors_by_actor ON movie_actors (actor, movie_id);
+CREATE TABLE IF NOT EXISTS movie_genres (
+    movie_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    genre TEXT NOT NULL,
+    PRIMARY KEY (movie_id, position)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS movie_genres_by_genre ON movie_genres (genre, movie_id);
+
+CREATE TABLE IF NOT EXISTS title_suffixes (
+    suffix TEXT NOT NULL,
+    movie_id INTEGER NOT NULL,
+    PRIMARY KEY (suffix, movie_id)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS name_suffixes (
+    kind TEXT NOT NULL,
+    suffix TEXT NOT NULL,
+    name TEXT NOT NULL,
+    PRIMARY KEY (kind, suffix, name)
+) WITHOUT ROWID;
+CREATE VIRTUAL TABLE IF NOT EXISTS movie_titles USING fts5(title, tokenize='trigram');
+CREATE VIRTUAL TABLE IF NOT EXISTS movie_texts USING fts5(title, description, tokenize='unicode61 remove_diacritics 2');
+
+CREATE TABLE IF NOT EXISTS users (username TEXT PRIMARY KEY, password TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS reviews (
+    id INTEGER PRIMARY KEY,
+    movie_id INTEGER NOT NULL,
+    username TEXT NOT NULL,
+    review_text TEXT,
+    rating INTEGER,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS reviews_by_movie ON reviews (movie_id, id);
+CREATE INDEX IF NOT EXISTS reviews_by_user ON reviews (username);
+CREATE TABLE IF NOT EXISTS watchlists (id INTEGER PRIMARY KEY);
+CREATE TABLE IF NOT EXISTS watchlist_movies (
+    watchlist_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    movie_id INTEGER NOT NULL,
+    PRIMARY KEY (watchlist_id, position)
+) WITHOUT ROWID;
+'''
+
+MOVIE_COLUMNS = 'id, title, release_year, description, director, runtime_minutes, rating, votes, revenue, metascore'
+
+INSERT_USER = 'INSERT OR IGNORE INTO users (username, password) VALUES (?, ?)'
+SELECT_USER = 'SELECT username, password FROM users WHERE username = ?'
+UPDATE_USER_PASSWORD = 'UPDATE users SET password = ? WHERE username = ?'
+
+SELECT_PERSON = {kind: f'SELECT name FROM {kind}s WHERE name = ?' for kind in ('actor', 'director')}
+SELECT_PERSON_BY_NORMALIZED_NAME = {
+    kind: f'SELECT name FROM {kind}s WHERE normalized_name = ? ORDER BY rowid LIMIT 1' for kind in ('actor', 'director')}
+SELECT_NORMALIZED_NAMES = {kind: f'SELECT DISTINCT normalized_name FROM {kind}s' for kind in ('actor', 'director')}
+INSERT_PERSON = {kind: f'INSERT OR IGNORE INTO {kind}s (name, normalized_name) VALUES (?, ?)'
+                 for kind in ('actor', 'director')}
+INSERT_NAME_SUFFIX = 'INSERT OR IGNORE INTO name_suffixes (kind, suffix, name) VALUES (?, ?, ?)'
+INSERT_GENRE = 'INSERT OR IGNORE INTO genres (name) VALUES (?)'
+SELECT_GENRES = 'SELECT name FROM genres ORDER BY rowid'
+COUNT_GENRES = 'SELECT count(*) FROM genres WHERE name IN (SELECT value FROM json_each(?))'
+
+DELETE_MOVIE_ROWS = (
+    'DELETE FROM movie_actors WHERE movie_id = ?',
+    'DELETE FROM movie_genres WHERE movie_id = ?',
+    'DELETE FROM title_suffixes WHERE movie_id = ?',
+    'DELETE FROM movie_titles WHERE rowid = ?',
+    'DELETE FROM movie_texts WHERE rowid = ?',
+)
+INSERT_MOVIE = f'INSERT OR REPLACE INTO movies ({MOVIE_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'
+INSERT_MOVIE_ACTOR = 'INSERT INTO movie_actors (movie_id, position, actor) VALUES (?, ?, ?)'
+INSERT_MOVIE_GENRE = 'INSERT INTO movie_genres (movie_id, position, genre) VALUES (?, ?, ?)'
+INSERT_TITLE_SUFFIX = 'INSERT OR IGNORE INTO title_suffixes (suffix, movie_id) VALUES (?, ?)'
+INSERT_MOVIE_TITLE = 'INSERT INTO movie_titles (rowid, title) VALUES (?, ?)'
+INSERT_MOVIE_TEXT = 'INSERT INTO movie_texts (rowid, title, description) VALUES (?, ?, ?)'
+
+SELECT_MOVIES_BY_ID = f'SELECT {MOVIE_COLUMNS} FROM movies WHERE id IN (SELECT value FROM json_each(?))'
+SELECT_ACTORS_OF_MOVIES = ('SELECT movie_id, actor FROM movie_actors WHERE movie_id IN (SELECT value FROM json_each(?)) '
+                           'ORDER BY movie_id, position')
+SELECT_GENRES_OF_MOVIES = ('SELECT movie_id, genre FROM movie_genres WHERE movie_id IN (SELECT value FROM json_each(?)) '
+                           'ORDER BY movie_id, position')
+SELECT_REVIEWS_OF_MOVIES = ('SELECT r.movie_id, r.username, u.password, r.review_text, r.rating, r.timestamp '
+                            'FROM reviews r LEFT JOIN users u ON u.username = r.username '
+                            'WHERE r.movie_id IN (SELECT value FROM json_each(?)) ORDER BY r.id')
+
+SELECT_MOVIE = f'SELECT {MOVIE_COLUMNS} FROM movies WHERE title = ? AND release_year = ? LIMIT 1'
+SELECT_MOVIES_BY_RELEASE_YEAR = f'SELECT {MOVIE_COLUMNS} FROM movies WHERE release_year = ? ORDER BY title, id'
+SELECT_MOVIES_BY_ACTOR = (f'SELECT {MOVIE_COLUMNS} FROM movies '
+                          f'WHERE id IN (SELECT movie_id FROM movie_actors WHERE actor = ?) ORDER BY id')
+SELECT_MOVIES_BY_DIRECTOR = f'SELECT {MOVIE_COLUMNS} FROM movies WHERE director = ? ORDER BY id'
+SELECT_NEWEST_MOVIE = (f'SELECT {MOVIE_COLUMNS} FROM movies WHERE release_year IS NOT NULL '
+                       f'ORDER BY release_year DESC, title, id LIMIT 1')
+SELECT_OLDEST_MOVIE = (f'SELECT {MOVIE_COLUMNS} FROM movies WHERE release_year IS NOT NULL '
+                       f'ORDER BY release_year, title, id LIMIT 1')
+SELECT_MOVIE_EXISTS = 'SELECT 1 FROM movies WHERE title = ? AND release_year = ? LIMIT 1'
+SELECT_PREVIOUS_RELEASE_YEAR = 'SELECT max(release_year) FROM movies WHERE release_year < ?'
+SELECT_NEXT_RELEASE_YEAR = 'SELECT min(release_year) FROM movies WHERE release_year > ?'
+COUNT_MOVIES = 'SELECT count(*) FROM movies'
+
+# Trigram queries need at least three characters; shorter queries scan the titles instead.
+SELECT_TITLES_MATCHING = (f'SELECT {MOVIE_COLUMNS} FROM movies '
+                          f'WHERE id IN (SELECT rowid FROM movie_titles WHERE movie_titles MATCH ?) '
+                          f'ORDER BY title, release_year, id')
+SELECT_TITLES_LIKE = (f'SELECT {MOVIE_COLUMNS} FROM movies '
+                      f'WHERE id IN (SELECT rowid FROM movie_titles WHERE title LIKE ? ESCAPE \'\\\') '
+                      f'ORDER BY title, release_year, id')
+# Title tokens outweigh description tokens by as much as in the in-memory BM25 index.
+SELECT_TEXT_MATCHES = ('SELECT rowid FROM movie_texts WHERE movie_texts MATCH ? '
+                       'ORDER BY bm25(movie_texts, 3.0, 1.0) LIMIT ?')
+
+SELECT_TITLE_COMPLETIONS = ('SELECT m.title FROM movies m WHERE m.id IN '
+                            '(SELECT movie_id FROM title_suffixes WHERE suffix >= ? AND suffix < ?) '
+                            'ORDER BY m.votes DESC, m.id LIMIT ?')
+SELECT_NAME_COMPLETIONS = {
+    'actor': ('SELECT w.name FROM (SELECT DISTINCT name FROM name_suffixes '
+              "WHERE kind = 'actor' AND suffix >= ? AND suffix < ?) w "
+              'ORDER BY (SELECT total(m.votes) FROM movie_actors a JOIN movies m ON m.id = a.movie_id '
+              'WHERE a.actor = w.name) DESC, w.name LIMIT ?'),
+    'director': ('SELECT w.name FROM (SELECT DISTINCT name FROM name_suffixes '
+                 "WHERE kind = 'director' AND suffix >= ? AND suffix < ?) w "
+                 'ORDER BY (SELECT total(m.votes) FROM movies m WHERE m.director = w.name) DESC, w.name LIMIT ?'),
+}
+
+SELECT_MOVIE_IDS_BY_GENRES = ('SELECT movie_id FROM movie_genres '
+                              'WHERE genre IN (SELECT value FROM json_each(?1)) AND movie_id NOT IN '
+                              '(SELECT movie_id FROM movie_genres WHERE genre IN (SELECT value FROM json_each(?3))) '
+                              'GROUP BY movie_id HAVING count(*) = ?2 ORDER BY movie_id')
+# Movies are ranked and filtered by their ratings as shown, rounded to one decimal, while the rating itself is kept
+# unrounded so that later reviews fold into it exactly.
+COLUMN_VALUES = {name: 'round(rating, 1)' if name == 'rating' else name for name in MovieColumns.COLUMNS}
+SELECT_TOP_MOVIE_IDS = {attribute: f'SELECT id FROM movies WHERE {COLUMN_VALUES[attribute]} IS NOT NULL '
+                                   f'ORDER BY {COLUMN_VALUES[attribute]} DESC, id DESC LIMIT ? OFFSET ?'
+                        for attribute in RANKED_ATTRIBUTES}
+SELECT_MOVIE_IDS_BY_RANGE = {attribute: f'SELECT id FROM movies WHERE {COLUMN_VALUES[attribute]} BETWEEN ? AND ? '
+                                        f'ORDER BY {COLUMN_VALUES[attribute]}, id'
+                             for attribute in RANKED_ATTRIBUTES}
+COUNT_RANKED_MOVIES = {attribute: f'SELECT count(*) FROM movies WHERE {attribute} IS NOT NULL'
+                       for attribute in RANKED_ATTRIBUTES}
+
+INSERT_REVIEW = 'INSERT INTO reviews (movie_id, username, review_text, rating, timestamp) VALUES (?, ?, ?, ?, ?)'
+UPDATE_MOVIE_RATINGS = 'UPDATE movies SET rating = (rating * votes + ?) / (votes + 1), votes = votes + 1 WHERE id = ?'
+SELECT_REVIEWED_MOVIE_IDS = 'SELECT movie_id FROM reviews ORDER BY id'
+SELECT_REVIEW_EXISTS = 'SELECT 1 FROM reviews WHERE username = ? LIMIT 1'
+SELECT_REVIEWED_GENRES = ('SELECT r.movie_id, r.rating, g.genre FROM reviews r '
+                          'LEFT JOIN movie_genres g ON g.movie_id = r.movie_id WHERE r.username = ?')
+SELECT_FIRST_MOVIES = f'SELECT {MOVIE_COLUMNS} FROM movies ORDER BY title, release_year, id LIMIT ?'
+# Each movie's relation to the user's preferences is the sum of the weights of its genres.
+SELECT_RECOMMENDED_MOVIE_IDS = ('SELECT m.id, total(p.value) AS relation FROM movies m '
+                                'LEFT JOIN movie_genres g ON g.movie_id = m.id '
+                                'LEFT JOIN json_each(?1) p ON p.key = g.genre '
+                                'WHERE m.id NOT IN (SELECT value FROM json_each(?2)) '
+                                'GROUP BY m.id ORDER BY relation DESC, m.title, m.release_year, m.id LIMIT ?3')
+
+INSERT_WATCHLIST = 'INSERT INTO watchlists DEFAULT VALUES'
+INSERT_WATCHLIST_MOVIE = 'INSERT INTO watchlist_movies (watchlist_id, position, movie_id) VALUES (?, ?, ?)'
+SELECT_WATCHLIST_MOVIES = ('SELECT w.id, m.movie_id FROM watchlists w '
+                           'LEFT JOIN watchlist_movies m ON m.watchlist_id = w.id ORDER BY w.id, m.position')
+
+# Connections kept open for reuse once returned to the pool; more may be open while many threads are busy at once.
+POOL_SIZE = 8
+# Statements compiled and kept by each connection, enough for every statement above.
+STATEMENT_CACHE_SIZE = 256
+# Sorts after any character a name or title can continue a prefix with, bounding the range of suffixes of a prefix.
+GREATEST_CHARACTER = '\U0010ffff'
+
+
+class SqliteRepository(AbstractRepository):
+    """
+    Movies, people and users are built anew from the database for every call, so two calls never return the same
+    objects. A movie comes with its actors, genres and reviews, the actors and genres being detached entities that
+    don't list the movie among their own, like those of a CatalogFile.
+    """
+
+    def __init__(self, database_path: str):
+        self.__database_path = database_path
+        self.__idle_connections = queue.Queue(POOL_SIZE)
+        # Normalized names of actors and directors are organised into BK-trees, built on first use, to suggest the
+        # closest names for misspelled searches, as SQLite can't index edit distances.
+        self.__name_trees = dict()
+        self.__name_trees_lock = threading.Lock()
+        with self.__connection() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.executescript(SCHEMA)
+
+    def close(self):
+        """ Closes the connections held by the pool. Connections in use are closed when they are returned. """
+        while True:
+            try:
+                self.__idle_connections.get_nowait().close()
+            except queue.Empty:
+                return
+
+    def add_user(self, user: User):
+        with self.__connection() as connection, connection:
+            connection.execute(INSERT_USER, (user.username, user.password))
+
+    def get_user(self, username) -> User:
+        with self.__connection() as connection:
+            row = connection.execute(SELECT_USER, (username,)).fetchone()
+        return User(*row) if row is not None else None
+
+    def update_user_password(self, user: User):
+        with self.__connection() as connection, connection:
+            connection.execute(UPDATE_USER_PASSWORD, (user.password, user.username))
+
+    def add_actor(self, actor: Actor):
+        if isinstance(actor, Actor):
+            with self.__connection() as connection, connection:
+                self.__register_name(connection, 'actor', actor.actor_full_name)
+
+    def get_actor(self, actor_full_name) -> Actor:
+        name = self.__person_name('actor', actor_full_name)
+        return Actor(name) if name is not None else None
+
+    def add_director(self, director: Director):
+        if isinstance(director, Director):
+            with self.__connection() as connection, connection:
+                self.__register_name(connection, 'director', director.director_full_name)
+
+    def get_director(self, director_full_name) -> Director:
+        name = self.__person_name('director', director_full_name)
+        return Director(name) if name is not None else None
+
+    def add_genre(self, genre: Genre):
+        if isinstance(genre, Genre):
+            with self.__connection() as connection, connection:
+                connection.execute(INSERT_GENRE, (genre.genre_full_name,))
+
+    def get_genres(self) -> List[Genre]:
+        with self.__connection() as connection:
+            return [Genre(name) for name, in connection.execute(SELECT_GENRES)]
+
+    def add_movie(self, movie: Movie):
+        if isinstance(movie, Movie):
+            with self.__connection() as connection, connection:
+                self.__insert_movie(connection, movie)
+
+    def add_movies_bulk(self, movies, actors=(), directors=(), genres=()):
+        # Everything is written in a single transaction, so the database is synced once rather than once per movie.
+        with self.__connection() as connection, connection:
+            for movie in movies:
+                if isinstance(movie, Movie):
+                    self.__insert_movie(connection, movie)
+            for actor in actors:
+                if isinstance(actor, Actor):
+                    self.__register_name(connection, 'actor', actor.actor_full_name)
+            for director in directors:
+                if isinstance(director, Director):
+                    self.__register_name(connection, 'director', director.director_full_name)
+            connection.executemany(INSERT_GENRE, ((genre.genre_full_name,) for genre in genres
+                                                  if isinstance(genre, Genre)))
+
+    def get_movie(self, title: str, release_year: int):
+        movies = self.__movies(SELECT_MOVIE, (title, release_year))
+        return movies[0] if movies else None
+
+    def get_movies_by_release_year(self, target_year: int) -> List[Movie]:
+        return self.__movies(SELECT_MOVIES_BY_RELEASE_YEAR, (target_year,))
+
+    def get_movies_by_actor(self, actor_fullname: str) -> List[Movie]:
+        return self.__movies_by_person('actor', actor_fullname)
+
+    def get_movies_by_director(self, director_fullname: str) -> List[Movie]:
+        return self.__movies_by_person('director', director_fullname)
+
+    def get_similar_actor_names(self, actor_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        return self.__similar_names('actor', actor_fullname, max_distance, limit)
+
+    def get_similar_director_names(self, director_fullname: str, max_distance: int = 2, limit: int = 5) -> List[str]:
+        return self.__similar_names('director', director_fullname, max_distance, limit)
+
+    def autocomplete(self, prefix: str, kind: str, limit: int = 10, time_budget: float = None) -> List[str]:
+        # Each query examines an index range at most as long as the in-memory index would, so there is no time budget
+        # to keep to.
+        prefix = normalize_name(prefix)
+        if len(prefix) == 0:
+            return list()
+        bounds = (prefix, prefix + GREATEST_CHARACTER, limit)
+        with self.__connection() as connection:
+            if kind == 'title':
+                # Remakes share a title, so only the first of them is kept.
+                return list(dict.fromkeys(title for title, in connection.execute(SELECT_TITLE_COMPLETIONS, bounds)))
+            return [name for name, in connection.execute(SELECT_NAME_COMPLETIONS[kind], bounds)]
+
+    def search_movie_by_title(self, title: str) -> List[Movie]:
+        if len(title) >= 3:
+            return self.__movies(SELECT_TITLES_MATCHING, ('"' + title.replace('"', '""') + '"',))
+        pattern = title.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+        return self.__movies(SELECT_TITLES_LIKE, (f'%{pattern}%',))
+
+    def search_movies_by_text(self, query: str, limit: int = 20) -> List[Movie]:
+        terms = set(tokenize(query))
+        if len(terms) == 0:
+            return list()
+        with self.__connection() as connection:
+            movie_ids = [movie_id for movie_id, in connection.execute(
+                SELECT_TEXT_MATCHES, (' OR '.join(f'"{term}"' for term in terms), limit))]
+        return self.get_movies_by_id(movie_ids)
+
+    def get_newest_movie(self):
+        movies = self.__movies(SELECT_NEWEST_MOVIE, ())
+        return movies[0] if movies else None
+
+    def get_oldest_movie(self):
+        movies = self.__movies(SELECT_OLDEST_MOVIE, ())
+        return movies[0] if movies else None
+
+    def get_release_year_of_previous_movie(self, movie: Movie):
+        return self.__adjacent_release_year(SELECT_PREVIOUS_RELEASE_YEAR, movie)
+
+    def get_release_year_of_next_movie(self, movie: Movie):
+        return self.__adjacent_release_year(SELECT_NEXT_RELEASE_YEAR, movie)
+
+    def get_number_of_movies(self):
+        with self.__connection() as connection:
+            return connection.execute(COUNT_MOVIES).fetchone()[0]
+
+    def get_movie_by_id(self, index: int):
+        movies = self.get_movies_by_id([index])
+        return movies[0] if movies else None
+
+    def get_movies_by_id(self, index_list):
+        index_list = list(index_list)
+        with self.__connection() as connection:
+            movies = {movie.id: movie for movie in self.__movies_from_rows(
+                connection, connection.execute(SELECT_MOVIES_BY_ID, (json.dumps(index_list),)).fetchall())}
+        return [movies[index] for index in index_list if index in movies]
+
+    def get_movies_by_genre(self, genre_name: str):
+        return self.get_movies_by_genres([genre_name])
+
+    def get_movies_by_genres(self, genre_names, excluded_genre_names=()):
+        genre_names = list(dict.fromkeys(genre_names))
+        if len(genre_names) == 0:
+            return list()
+        with self.__connection() as connection:
+            if connection.execute(COUNT_GENRES, (json.dumps(genre_names),)).fetchone()[0] < len(genre_names):
+                return list()
+            return [movie_id for movie_id, in connection.execute(SELECT_MOVIE_IDS_BY_GENRES, (
+                json.dumps(genre_names), len(genre_names), json.dumps(list(excluded_genre_names))))]
+
+    def get_movies_by_facets(self, facets: dict):
+        conditions = list()
+        parameters = list()
+        for name, (low, high) in facets.items():
+            # Unavailable values are NULL, which lies within no range.
+            conditions.append(f'{COLUMN_VALUES[name]} BETWEEN ? AND ?')
+            parameters.extend((-math.inf if low is None else low, math.inf if high is None else high))
+        where = f' WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self.__connection() as connection:
+            return [movie_id for movie_id, in connection.execute(f'SELECT id FROM movies{where} ORDER BY id',
+                                                                  parameters)]
+
+    def get_top_movie_ids(self, attribute: str, limit: int, offset: int = 0) -> List[int]:
+        with self.__connection() as connection:
+            return [movie_id for movie_id, in connection.execute(SELECT_TOP_MOVIE_IDS[attribute], (limit, offset))]
+
+    def get_movie_ids_by_range(self, attribute: str, low=None, high=None) -> List[int]:
+        bounds = (-math.inf if low is None else low, math.inf if high is None else high)
+        with self.__connection() as connection:
+            return [movie_id for movie_id, in connection.execute(SELECT_MOVIE_IDS_BY_RANGE[attribute], bounds)]
+
+    def get_number_of_ranked_movies(self, attribute: str) -> int:
+        with self.__connection() as connection:
+            return connection.execute(COUNT_RANKED_MOVIES[attribute]).fetchone()[0]
+
+    def add_review(self, review: Review):
+        super().add_review(review)
+        with self.__connection() as connection, connection:
+            connection.execute(INSERT_REVIEW, (review.movie.id, review.user.username, review.review_text,
+                                               review.rating, review.timestamp.isoformat()))
+            # The rating is folded in by the database, so that concurrent reviews of a movie never overwrite each other.
+            if review.rating is not None:
+                connection.execute(UPDATE_MOVIE_RATINGS, (review.rating, review.movie.id))
+        if review.rating is not None:
+            review.movie.update_ratings(review)
+
+    def get_reviews(self) -> List[Review]:
+        with self.__connection() as connection:
+            movie_ids = [movie_id for movie_id, in connection.execute(SELECT_REVIEWED_MOVIE_IDS)]
+        # Each movie lists its reviews in the order they were added, so the reviews of all movies are merged in that
+        # order by taking the next review of each movie in turn.
+        reviews = {movie.id: movie.reviews for movie in self.get_movies_by_id(set(movie_ids))}
+        return [next(reviews[movie_id]) for movie_id in movie_ids]
+
+    def get_reviews_for_movie(self, movie_id: int) -> List[Review]:
+        movie = self.get_movie_by_id(movie_id)
+        return list(movie.reviews) if movie is not None else []
+
+    def add_watchlist(self, watchlist: WatchList):
+        with self.__connection() as connection, connection:
+            watchlist_id = connection.execute(INSERT_WATCHLIST).lastrowid
+            connection.executemany(INSERT_WATCHLIST_MOVIE, ((watchlist_id, position, movie.id)
+                                                            for position, movie in enumerate(watchlist.watchlist)))
+
+    def get_watchlist(self) -> List[WatchList]:
+        with self.__connection() as connection:
+            rows = connection.execute(SELECT_WATCHLIST_MOVIES).fetchall()
+        movies = {movie.id: movie for movie in self.get_movies_by_id({movie_id for _, movie_id in rows
+                                                                      if movie_id is not None})}
+        watchlists = dict()
+        for watchlist_id, movie_id in rows:
+            watchlist = watchlists.setdefault(watchlist_id, WatchList())
+            if movie_id in movies:
+                watchlist.add_movie(movies[movie_id])
+        return list(watchlists.values())
+
+    def user_recommendations_by_genre(self, username: str) -> List[Movie]:
+        with self.__connection() as connection:
+            if connection.execute(SELECT_REVIEW_EXISTS, (username,)).fetchone() is None:
+                return self.__movies(SELECT_FIRST_MOVIES, (10,))
+            # Every review weighs each genre of its movie by how far its rating lies above or below 5.
+            preferences = dict()
+            reviewed = set()
+            for movie_id, rating, genre in connection.execute(SELECT_REVIEWED_GENRES, (username,)):
+                reviewed.add(movie_id)
+                if genre is not None and rating is not None:
+                    preferences[genre] = preferences.get(genre, 0) + rating - 5
+            relations = connection.execute(SELECT_RECOMMENDED_MOVIE_IDS, (
+                json.dumps(preferences), json.dumps(list(reviewed)), 10)).fetchall()
+        # The best related movies are listed from the least related up.
+        relations.sort(key=lambda row: row[1])
+        return self.get_movies_by_id([movie_id for movie_id, relation in relations])
+
+    @contextmanager
+    def __connection(self):
+        try:
+            connection = self.__idle_connections.get_nowait()
+        except queue.Empty:
+            # A connection is only ever used by one thread at a time, though not always by the thread that opened it.
+            connection = sqlite3.connect(self.__database_path, check_same_thread=False,
+                                         cached_statements=STATEMENT_CACHE_SIZE)
+            connection.execute('PRAGMA synchronous=NORMAL')
+        try:
+            yield connection
+        finally:
+            if connection.in_transaction:
+                connection.rollback()
+            try:
+                self.__idle_connections.put_nowait(connection)
+            except queue.Full:
+                connection.close()
+
+    def __movies(self, statement: str, parameters) -> List[Movie]:
+        with self.__connection() as connection:
+            return self.__movies_from_rows(connection, connection.execute(statement, parameters).fetchall())
+
+    @staticmethod
+    def __movies_from_rows(connection: sqlite3.Connection, rows) -> List[Movie]:
+        movies = {row[0]: _movie_from_row(row) for row in rows}
+        if len(movies) == 0:
+            return list()
+        movie_ids = json.dumps(list(movies))
+        for movie_id, actor_name in connection.execute(SELECT_ACTORS_OF_MOVIES, (movie_ids,)):
+            movies[movie_id].add_actor(Actor(actor_name))
+        for movie_id, genre_name in connection.execute(SELECT_GENRES_OF_MOVIES, (movie_ids,)):
+            movies[movie_id].add_genre(Genre(genre_name))
+        users = dict()
+        for movie_id, username, password, review_text, rating, timestamp in connection.execute(
+                SELECT_REVIEWS_OF_MOVIES, (movie_ids,)):
+            if username not in users:
+                users[username] = User(username, password)
+            make_review(review_text, users[username], movies[movie_id], rating, datetime.fromisoformat(timestamp))
+        return list(movies.values())
+
+    def __insert_movie(self, connection: sqlite3.Connection, movie: Movie):
+        # A movie added again under the same id replaces the earlier one, along with its index rows.
+        if movie.id is not None:
+            for statement in DELETE_MOVIE_ROWS:
+                connection.execute(statement, (movie.id,))
+        movie_id = connection.execute(INSERT_MOVIE, (
+            movie.id, movie.title, movie.release_year, movie.description, movie.director, movie.runtime_minutes,
+            movie.rating, movie.votes, _available(movie.revenue), _available(movie.metascore))).lastrowid
+        if movie.id is None:
+            movie.id = movie_id
+        connection.executemany(INSERT_MOVIE_ACTOR, ((movie.id, position, actor.actor_full_name)
+                                                    for position, actor in enumerate(movie.actors)
+                                                    if actor.actor_full_name is not None))
+        connection.executemany(INSERT_MOVIE_GENRE, ((movie.id, position, genre.genre_full_name)
+                                                    for position, genre in enumerate(movie.genres)
+                                                    if genre.genre_full_name is not None))
+        if movie.title is not None:
+            connection.execute(INSERT_MOVIE_TITLE, (movie.id, movie.title))
+            connection.executemany(INSERT_TITLE_SUFFIX, ((suffix, movie.id) for suffix in _word_suffixes(movie.title)))
+        connection.execute(INSERT_MOVIE_TEXT, (movie.id, movie.title, movie.description))
+
+    def __register_name(self, connection: sqlite3.Connection, kind: str, name: str):
+        # Keys an actor or director by name and normalized name, indexing the name for autocompletion and suggestions
+        # when its normalized name is new.
+        if name is None:
+            return
+        normalized_name = normalize_name(name)
+        is_new = connection.execute(SELECT_PERSON_BY_NORMALIZED_NAME[kind], (normalized_name,)).fetchone() is None
+        connection.execute(INSERT_PERSON[kind], (name, normalized_name))
+        if is_new:
+            connection.executemany(INSERT_NAME_SUFFIX, ((kind, suffix, name) for suffix in _word_suffixes(name)))
+            with self.__name_trees_lock:
+                if kind in self.__name_trees:
+                    self.__name_trees[kind].add(normalized_name)
+
+    def __person_name(self, kind: str, name: str):
+        with self.__connection() as connection:
+            row = connection.execute(SELECT_PERSON[kind], (name,)).fetchone()
+        return row[0] if row is not None else None
+
+    def __movies_by_person(self, kind: str, name: str) -> List[Movie]:
+        with self.__connection() as connection:
+            row = connection.execute(SELECT_PERSON_BY_NORMALIZED_NAME[kind], (normalize_name(name),)).fetchone()
+        if row is None:
+            return list()
+        return self.__movies(SELECT_MOVIES_BY_ACTOR if kind == 'actor' else SELECT_MOVIES_BY_DIRECTOR, row)
+
+    def __similar_names(self, kind: str, name: str, max_distance: int, limit: int) -> List[str]:
+        matches = self.__name_tree(kind).search(normalize_name(name), max_distance)
+        with self.__connection() as connection:
+            return [connection.execute(SELECT_PERSON_BY_NORMALIZED_NAME[kind], (normalized_name,)).fetchone()[0]
+                    for distance, normalized_name in matches[:limit]]
+
+    def __name_tree(self, kind: str) -> BKTree:
+        with self.__name_trees_lock:
+            if kind not in self.__name_trees:
+                tree = BKTree()
+                with self.__connection() as connection:
+                    for normalized_name, in connection.execute(SELECT_NORMALIZED_NAMES[kind]):
+                        tree.add(normalized_name)
+                self.__name_trees[kind] = tree
+            return self.__name_trees[kind]
+
+    def __adjacent_release_year(self, statement: str, movie: Movie):
+        if movie.release_year is None:
+            return None
+        with self.__connection() as connection:
+            if connection.execute(SELECT_MOVIE_EXISTS, (movie.title, movie.release_year)).fetchone() is None:
+                return None
+            return connection.execute(statement, (movie.release_year,)).fetchone()[0]
+
+
+def _movie_from_row(row) -> Movie:
+    (movie_id, title, release_year, description, director, runtime_minutes, rating, votes, revenue,
+     metascore) = row
+    movie = Movie(title, release_year)
+    movie.id = movie_id
+    movie.description = description
+    movie.director = director
+    movie.runtime_minutes = runtime_minutes
+    movie.rating = rating
+    movie.votes = votes
+    # Unavailable revenues and metascores are NULL, leaving the movie's 'Not Available'.
+    movie.revenue = revenue
+    movie.metascore = metascore
+    return movie
+
+
+def _available(value):
+    return value if isinstance(value, (int, float)) else None
+
+
+def _word_suffixes(text: str) -> List[str]:
+    # The keys a PrefixIndex indexes text under: its normalized form and every word suffix of it.
+    words = normalize_name(text).split(' ')
+    return [' '.join(words[i:]) for i in range(len(words))]
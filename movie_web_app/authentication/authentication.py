@@ -1,4 +1,8 @@
-from flask import Blueprint, render_template, redirect, url_for, session, request
+import os
+
+import click
+from flask import Blueprint, render_template, redirect, url_for, session, request, current_app
+from flask.cli import with_appcontext
 
 from flask_wtf import FlaskForm
 from wtforms import StringField, PasswordField, SubmitField, validators
@@ -11,6 +15,7 @@ from functools import wraps
 import movie_web_app.utilities.utilities as utilities
 import movie_web_app.authentication.services as services
 import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.memory_repository import write_users_file
 from flask_wtf import FlaskForm
 from wtforms import TextAreaField, HiddenField, SubmitField, DecimalField
 from wtforms.validators import DataRequired, Length, ValidationError, NumberRange
@@ -100,6 +105,14 @@ def logout():
     return redirect(url_for('home_bp.home'))
 
 
+@click.command('hash-users')
+@with_appcontext
+def hash_users_command():
+    """ Replaces the plaintext passwords of the users data file with their hashes. """
+    write_users_file(os.path.join(current_app.config['DATA_PATH'], 'users.csv'))
+    click.echo('Users data file now holds password hashes')
+
+
 def login_required(view):
     @wraps(view)
     def wrapped_view(**kwargs):
@@ -1,7 +1,9 @@
+import hmac
+
 from werkzeug.security import generate_password_hash, check_password_hash
 
 from movie_web_app.adapters.repository import AbstractRepository
-from movie_web_app.domainmodel.model import User
+from movie_web_app.domainmodel.model import User, PLAINTEXT_PASSWORD_PREFIX
 
 
 class NameNotUniqueException(Exception):
@@ -31,6 +33,11 @@ def add_user(username: str, password: str, repo: AbstractRepository):
     user = User(username, password_hash)
     repo.add_user(user)
 
+    # A user registered under the same name meanwhile is kept rather than this one.
+    stored_user = repo.get_user(username)
+    if stored_user is None or stored_user.password != password_hash:
+        raise NameNotUniqueException
+
 
 
 def get_user(username: str, repo: AbstractRepository):
@@ -46,7 +53,16 @@ def authenticate_user(username: str, password: str, repo: AbstractRepository):
 
     user = repo.get_user(username)
     if user is not None:
-        authenticated = check_password_hash(user.password, password)
+        if user.password.startswith(PLAINTEXT_PASSWORD_PREFIX):
+            # The user was loaded from a users file without hashes; the password is hashed on its first use.
+            # Compared as bytes, as compare_digest only takes strings of ASCII characters.
+            authenticated = hmac.compare_digest(user.password[len(PLAINTEXT_PASSWORD_PREFIX):].encode('utf-8'),
+                                                password.encode('utf-8'))
+            if authenticated:
+                user.password = generate_password_hash(password)
+                repo.update_user_password(user)
+        else:
+            authenticated = check_password_hash(user.password, password)
     if not authenticated:
         raise AuthenticationException
 
@@ -1,6 +1,19 @@
+import sys
 from datetime import datetime
 from typing import List
+
+
+# Entities declare __slots__ so that they carry no per-instance __dict__. Names of actors, directors and genres are
+# interned, since every movie referring to the same person or genre can then share a single string.
+#
+# Collections that are checked for membership are dicts used as insertion-ordered sets (every value is None), so that
+# membership checks are O(1) while iteration keeps the order in which items were added.
+
 class Movie:
+    __slots__ = ('__movie_full_name', '__movie_release_year', '__hash', '__id', '__description', '__director',
+                 '__actors', '__genres', '__reviews', '__review_count', '__runtime_minutes', '__rating', '__votes',
+                 '__revenue', '__metascore')
+
     def __init__(self, movie_full_name: str, movie_release_year: int):
         if movie_full_name == "" or type(movie_full_name) is not str:
             self.__movie_full_name = None
@@ -12,33 +25,29 @@ class Movie:
         else:
             self.__movie_release_year = movie_release_year
         self.__id: int = None
-        self.__title: str = None
         self.__description: str = ""
         self.__director: Director = None
         self.__actors: List[Actor] = list()
         self.__genres: List[Genre] = list()
-        self.__reviews: List[Review] = list()
+        # Most movies are never reviewed, so their list of reviews is only created for the first review.
+        self.__reviews: List[Review] = None
+        # Reviews kept outside of the movie, in a review store, are counted without being listed.
+        self.__review_count = 0
         self.__runtime_minutes: int = 0
         self.__rating = 0
         self.__votes = 0
         self.__revenue = 'Not Available'
         self.__metascore = 'Not Available'
+        # Movies are hashed on their title and release year, which never change, so the hash is computed once.
+        self.__hash = hash((self.__movie_full_name, self.__movie_release_year))
 
     @property
-    def title(self):
-        return self.__title
-
-    @title.setter
-    def title(self, movie_title: str):
-        if movie_title == "" or type(movie_title) is not str:
-            self.__title = None
-        else:
-            self.__title = movie_title.strip()
-        return
+    def reviews(self) -> list():
+        return iter(self.__reviews or ())
 
     @property
-    def reviews(self) -> list():
-        return iter(self.__reviews)
+    def review_count(self) -> int:
+        return self.__review_count
 
     @property
     def title(self):
@@ -162,8 +171,19 @@ class Movie:
         self.__rating = ((self.__rating * self.__votes) + review.rating) / (self.__votes + 1)
         self.__votes += 1
 
+    def add_ratings(self, rating_count: int, rating_sum: int):
+        """ Folds rating_count ratings adding up to rating_sum into the rating at once, as update_ratings would. """
+        self.__rating = ((self.__rating * self.__votes) + rating_sum) / (self.__votes + rating_count)
+        self.__votes += rating_count
+
     def add_review(self, review):
+        if self.__reviews is None:
+            self.__reviews = list()
         self.__reviews.append(review)
+        self.__review_count += 1
+
+    def add_unlisted_reviews(self, review_count: int):
+        self.__review_count += review_count
 
     def __repr__(self):
         return f"<Movie {self.__movie_full_name}, {self.__movie_release_year}>"
@@ -172,20 +192,41 @@ class Movie:
         return self.__movie_full_name == other.__movie_full_name and self.__movie_release_year == other.__movie_release_year
 
     def __lt__(self, other):
-        return (self.__movie_full_name, self.__movie_release_year) < (other.__movie_full_name, other.__movie_release_year)
+        # Compare the fields in turn rather than building a (title, release year) tuple on every comparison.
+        if self.__movie_full_name != other.__movie_full_name:
+            return self.__movie_full_name < other.__movie_full_name
+        return self.__movie_release_year < other.__movie_release_year
 
     def __hash__(self):
-        return hash(self.__movie_full_name + str(self.__movie_release_year))
+        return self.__hash
+
+    def __getstate__(self):
+        # Only the movie's own attributes are pickled. Actors, genres and reviews link back to other movies, so
+        # pickling them here would recurse through the whole catalog; the repository restores those links itself.
+        return (self.__movie_full_name, self.__movie_release_year, self.__id, self.__description, self.__director,
+                self.__runtime_minutes, self.__rating, self.__votes, self.__revenue, self.__metascore)
+
+    def __setstate__(self, state):
+        (self.__movie_full_name, self.__movie_release_year, self.__id, self.__description, self.__director,
+         self.__runtime_minutes, self.__rating, self.__votes, self.__revenue, self.__metascore) = state
+        self.__actors = list()
+        self.__genres = list()
+        self.__reviews = None
+        self.__review_count = 0
+        # String hashes differ between processes, so the hash is recomputed rather than restored.
+        self.__hash = hash((self.__movie_full_name, self.__movie_release_year))
 
 
 class Actor:
+    __slots__ = ('__actor_full_name', '__actor_colleague', '__movie_actors')
+
     def __init__(self, actor_full_name: str):
         if actor_full_name == "" or type(actor_full_name) is not str:
             self.__actor_full_name = None
         else:
-            self.__actor_full_name = actor_full_name.strip()
-        self.__actor_colleague = list()
-        self.__movie_actors = list()
+            self.__actor_full_name = sys.intern(actor_full_name.strip())
+        self.__actor_colleague = dict()
+        self.__movie_actors = dict()
 
     @property
     def actor_full_name(self) -> str:
@@ -203,7 +244,10 @@ class Actor:
         return movie in self.__movie_actors
 
     def add_movie(self, movie: Movie):
-        self.__movie_actors.append(movie)
+        self.__movie_actors[movie] = None
+
+    def remove_movie(self, movie: Movie):
+        self.__movie_actors.pop(movie, None)
 
     def __repr__(self):
         return f"<Actor {self.__actor_full_name}>"
@@ -219,23 +263,25 @@ class Actor:
 
     def add_actor_colleague(self, colleague):
         if not self.check_if_this_actor_worked_with(colleague):
-            self.__actor_colleagues.append(colleague)
+            self.__actor_colleague[colleague] = None
         return
 
     def check_if_this_actor_worked_with(self, colleague):
-        if colleague in self.__actor_colleagues:
+        if colleague in self.__actor_colleague:
             return True
         else:
             return False
 
 
 class Director:
+    __slots__ = ('__director_full_name', '__movies_directed')
+
     def __init__(self, director_full_name: str):
         if director_full_name == "" or type(director_full_name) is not str:
             self.__director_full_name = None
         else:
-            self.__director_full_name = director_full_name.strip()
-        self.__movies_directed = list()
+            self.__director_full_name = sys.intern(director_full_name.strip())
+        self.__movies_directed = dict()
 
     @property
     def director_full_name(self) -> str:
@@ -258,24 +304,42 @@ class Director:
         return hash(self.__director_full_name)
 
     def add_movie(self, movie: Movie):
-        self.__movies_directed.append(movie)
+        self.__movies_directed[movie] = None
+
+    def remove_movie(self, movie: Movie):
+        self.__movies_directed.pop(movie, None)
 
     def is_applied_to(self, movie: Movie) -> bool:
         return movie in self.__movies_directed
 
 
 class Genre:
+    __slots__ = ('__genre_full_name', '__movie_genres', '__movie_bitset')
+
     def __init__(self, genre_name: str):
         if genre_name == "" or type(genre_name) is not str:
             self.__genre_full_name = None
         else:
-            self.__genre_full_name = genre_name.strip()
-        self.__movie_genres: List[Movie] = list()
+            self.__genre_full_name = sys.intern(genre_name.strip())
+        self.__movie_genres = dict()
+        # Bit i is set when the movie with id i is classified by this genre. The bitset is rebuilt on first use after
+        # movies are added, since setting one bit at a time copies the whole integer on every addition.
+        self.__movie_bitset = 0
 
     @property
     def movie_genres(self):
         return iter(self.__movie_genres)
 
+    @property
+    def movie_bitset(self) -> int:
+        if self.__movie_bitset is None:
+            movie_ids = [movie.id for movie in self.__movie_genres if movie.id is not None]
+            bits = bytearray(max(movie_ids, default=0) // 8 + 1)
+            for movie_id in movie_ids:
+                bits[movie_id >> 3] |= 1 << (movie_id & 7)
+            self.__movie_bitset = int.from_bytes(bits, 'little')
+        return self.__movie_bitset
+
     @property
     def number_of_unique_movies(self):
         return len(self.__movie_genres)
@@ -297,18 +361,31 @@ class Genre:
         return hash(self.__genre_full_name)
 
     def add_movie(self, movie: Movie):
-        self.__movie_genres.append(movie)
+        self.__movie_genres[movie] = None
+        self.__movie_bitset = None
+
+    def remove_movie(self, movie: Movie):
+        if movie in self.__movie_genres:
+            del self.__movie_genres[movie]
+            self.__movie_bitset = None
 
     def is_applied_to(self, movie: Movie) -> bool:
         return movie in self.__movie_genres
 
 
+# Passwords read from users files that predate stored hashes are kept in werkzeug's format for unhashed passwords until
+# their user next logs in, so that loading users doesn't derive a key for every one of them.
+PLAINTEXT_PASSWORD_PREFIX = 'plain$$'
+
+
 class User:
+    __slots__ = ('__user_name', '__password', '__watched_movies', '__reviews', '__time_spent_watching_movies_minutes')
+
     def __init__(self, user_name: str, password: str):
         self.__user_name = user_name
         self.__password = password
-        self.__watched_movies = list()
-        self.__reviews = list()
+        self.__watched_movies = dict()
+        self.__reviews = dict()
         self.__time_spent_watching_movies_minutes = 0
 
     @property
@@ -319,13 +396,17 @@ class User:
     def password(self):
         return self.__password
 
+    @password.setter
+    def password(self, password: str):
+        self.__password = password
+
     @property
     def watched_movies(self):
-        return self.__watched_movies
+        return self.__watched_movies.keys()
 
     @property
     def reviews(self):
-        return self.__reviews
+        return self.__reviews.keys()
 
     @property
     def time_spent_watching_movies_minutes(self):
@@ -343,19 +424,30 @@ class User:
         return self.username < other.username
 
     def __hash__(self):
-        return hash((self.__user_name, self.__password))
+        # Users are equal when their usernames are, so the username alone is hashed.
+        return hash(self.__user_name)
 
     def watch_movie(self, movie: Movie):
         if movie not in self.__watched_movies:
-            self.__watched_movies.append(movie)
+            self.__watched_movies[movie] = None
             self.__time_spent_watching_movies_minutes += movie.runtime_minutes
 
+    def unwatch_movie(self, movie: Movie):
+        if movie in self.__watched_movies:
+            del self.__watched_movies[movie]
+            self.__time_spent_watching_movies_minutes -= movie.runtime_minutes
+
     def add_review(self, review):
         if review not in self.__reviews:
-            self.__reviews.append(review)
+            self.__reviews[review] = None
+
+    def remove_review(self, review):
+        self.__reviews.pop(review, None)
 
 
 class Review:
+    __slots__ = ('__author', '__movie', '__review_text', '__rating', '__timestamp')
+
     def __init__(self, user: User, movie: Movie, review_text: str, rating: int, timestamp: datetime):
         self.__author = user
         self.__movie = movie
@@ -394,25 +486,31 @@ class Review:
             return True
         return False
 
-    def hash(self):
+    def __hash__(self):
         return hash((self.movie, self.timestamp))
 
 
 class WatchList:
+    __slots__ = ('__watchlist', '__watchlist_members', 'pos')
+
     def __init__(self):
         self.__watchlist = []
+        # Movies are selected by position, so they are kept in a list alongside a set for membership checks.
+        self.__watchlist_members = set()
 
     @property
     def watchlist(self):
         return self.__watchlist
 
     def add_movie(self, movie):
-        if type(movie) is Movie and movie not in self.__watchlist:
+        if isinstance(movie, Movie) and movie not in self.__watchlist_members:
             self.__watchlist.append(movie)
+            self.__watchlist_members.add(movie)
 
     def remove_movie(self, movie):
-        if type(movie) is Movie and movie in self.__watchlist:
+        if isinstance(movie, Movie) and movie in self.__watchlist_members:
             self.__watchlist.remove(movie)
+            self.__watchlist_members.remove(movie)
 
     def first_movie_in_watchlist(self):
         return self.__watchlist[0]
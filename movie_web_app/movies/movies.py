@@ -2,7 +2,7 @@
 
 from datetime import date
 from flask import Blueprint
-from flask import request, render_template, redirect, url_for, session
+from flask import request, render_template, redirect, url_for, session, jsonify, abort, current_app
 
 from better_profanity import profanity
 from flask_wtf import FlaskForm
@@ -55,12 +55,13 @@ def movies_by_release_year():
     first_page_url = url_for('movies_bp.movies_by_release_year', year=int(first_movie['release_year']))
 
     if movies_by_year > 0:
-        next_year = int(movies[0]['release_year']) - 1
-        previous_year = int(movies[0]['release_year']) + 1
-
-        next_page_url = url_for('movies_bp.movies_by_release_year', year=previous_year )
-        previous_page_url = url_for('movies_bp.movies_by_release_year', year=next_year)
-
+        # Link to the closest earlier and later years that have movies, skipping years without any.
+        previous_page_url = None
+        next_page_url = None
+        if previous_year is not None:
+            previous_page_url = url_for('movies_bp.movies_by_release_year', year=previous_year)
+        if next_year is not None:
+            next_page_url = url_for('movies_bp.movies_by_release_year', year=next_year)
 
         # Construct urls for viewing movie reviews and adding reviews
         for movie in movies:
@@ -68,6 +69,8 @@ def movies_by_release_year():
             movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
 
 
+        show_all_reviews(movies, movie_to_show_reviews)
+
         # Generate the webpage to display the movies
         return render_template(
             'movies/movies.html',
@@ -95,8 +98,10 @@ def movies_by_release_year():
 def movies_by_genre():
     movies_per_page = 10
 
-    # Read query parameter.
-    genre_name = request.args.get('genre')
+    # Read query parameters. Several genres can be given, and movies must be classified by all of them and by none
+    # of the excluded genres.
+    genre_names = request.args.getlist('genre')
+    excluded_genre_names = request.args.getlist('exclude')
     cursor = request.args.get('cursor')
     movie_to_show_reviews = request.args.get('view_reviews_for')
 
@@ -114,8 +119,8 @@ def movies_by_genre():
         # Convert cursor from string to int
         cursor = int(cursor)
 
-    # Retrieve movie ids for movies that are classified with genre_name
-    movie_ids = services.get_movie_ids_for_genre(genre_name, repo.repo_instance)
+    # Retrieve movie ids for movies that are classified with genre_names but not excluded_genre_names
+    movie_ids = services.get_movie_ids_for_genres(genre_names, excluded_genre_names, repo.repo_instance)
     num_of_movies_found = len(movie_ids)
 
     # Retrieve the batch of articles to display on the Web page.
@@ -128,36 +133,204 @@ def movies_by_genre():
 
     if cursor > 0:
         # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
-        previous_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor - movies_per_page)
-        last_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name)
+        previous_page_url = url_for('movies_bp.movies_by_genre', genre=genre_names, exclude=excluded_genre_names,
+                                    cursor=cursor - movies_per_page)
+        last_page_url = url_for('movies_bp.movies_by_genre', genre=genre_names, exclude=excluded_genre_names)
 
     if cursor + movies_per_page < len(movie_ids):
         # There are further movies, so generate URLs for the 'next' and last navigation buttons.
-        next_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor + movies_per_page)
+        next_page_url = url_for('movies_bp.movies_by_genre', genre=genre_names, exclude=excluded_genre_names,
+                                cursor=cursor + movies_per_page)
 
         last_cursor = movies_per_page * int(len(movie_ids) / movies_per_page)
         if len(movie_ids) % movies_per_page == 0:
             last_cursor -= movies_per_page
 
-        first_page_url = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=last_cursor)
+        first_page_url = url_for('movies_bp.movies_by_genre', genre=genre_names, exclude=excluded_genre_names,
+                                 cursor=last_cursor)
 
     # Construct urls for viewing movie reviews and adding reviews
     for movie in movies:
-        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_name, cursor=cursor,
-                                           view_reviews_for=movie['id'])
+        movie['view_review_url'] = url_for('movies_bp.movies_by_genre', genre=genre_names,
+                                           exclude=excluded_genre_names, cursor=cursor, view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
-    print(cursor)
     current_page = cursor
     if current_page + 10 < num_of_movies_found:
         current_page += 10
     else:
         current_page += (num_of_movies_found - current_page)
 
+    genre_title = " and ".join(genre_names)
+    if len(excluded_genre_names) > 0:
+        genre_title += " but not " + " or ".join(excluded_genre_names)
+
+    show_all_reviews(movies, movie_to_show_reviews)
+
+    # Generate the webpage to display the movies
+    return render_template(
+        'movies/movies.html',
+        title='Movies',
+        movies_title=genre_title + " Movies - ("+ str(current_page) + " of " +  str(num_of_movies_found) + " results)",
+        movies=movies,
+        form=SearchForm(),
+        handler_url=url_for('movies_bp.search'),
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_page_url=first_page_url,
+        last_page_url=last_page_url,
+        previous_page_url=previous_page_url,
+        next_page_url=next_page_url,
+        show_reviews_for_movie=movie_to_show_reviews,
+        title_form=SearchByTitleForm(),
+        handler_url_title=url_for('movies_bp.search_by_title'),
+    )
+
+
+@movies_blueprint.route('/movies_by_facets', methods=['GET'])
+def movies_by_facets():
+    movies_per_page = 10
+
+    # Read query parameters. Each facet is filtered by an optional min_<facet> and max_<facet> pair of bounds.
+    cursor = request.args.get('cursor', 0, type=int)
+    movie_to_show_reviews = request.args.get('view_reviews_for', -1, type=int)
+    bounds = dict()
+    ranges = dict()
+    for name in services.FACETS:
+        low = request.args.get('min_' + name, type=float)
+        high = request.args.get('max_' + name, type=float)
+        if low is not None:
+            bounds['min_' + name] = low
+        if high is not None:
+            bounds['max_' + name] = high
+        if low is not None or high is not None:
+            ranges[name] = (low, high)
+
+    # Retrieve movie ids for movies within every range
+    movie_ids = services.get_movie_ids_for_facets(ranges, repo.repo_instance)
+    num_of_movies_found = len(movie_ids)
+
+    # Retrieve the batch of movies to display on the Web page.
+    movies = services.get_movies_by_id(movie_ids[cursor:cursor + movies_per_page], repo.repo_instance)
+
+    first_page_url = None
+    last_page_url = None
+    previous_page_url = None
+    next_page_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        previous_page_url = url_for('movies_bp.movies_by_facets', cursor=cursor - movies_per_page, **bounds)
+        last_page_url = url_for('movies_bp.movies_by_facets', **bounds)
+
+    if cursor + movies_per_page < num_of_movies_found:
+        # There are further movies, so generate URLs for the 'next' and last navigation buttons.
+        next_page_url = url_for('movies_bp.movies_by_facets', cursor=cursor + movies_per_page, **bounds)
+
+        last_cursor = movies_per_page * int(num_of_movies_found / movies_per_page)
+        if num_of_movies_found % movies_per_page == 0:
+            last_cursor -= movies_per_page
+
+        first_page_url = url_for('movies_bp.movies_by_facets', cursor=last_cursor, **bounds)
+
+    # Construct urls for viewing movie reviews and adding reviews
+    for movie in movies:
+        movie['view_review_url'] = url_for('movies_bp.movies_by_facets', cursor=cursor, view_reviews_for=movie['id'],
+                                           **bounds)
+        movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
+
+    # Describe the ranges in the page title, e.g. "year 2010 to 2014, rating at least 8"
+    descriptions = list()
+    for name, (low, high) in ranges.items():
+        if high is None:
+            descriptions.append(f'{name} at least {low:g}')
+        elif low is None:
+            descriptions.append(f'{name} at most {high:g}')
+        else:
+            descriptions.append(f'{name} {low:g} to {high:g}')
+
+    show_all_reviews(movies, movie_to_show_reviews)
+
     # Generate the webpage to display the movies
     return render_template(
         'movies/movies.html',
         title='Movies',
-        movies_title=genre_name + " Movies - ("+ str(current_page) + " of " +  str(num_of_movies_found) + " results)",
+        movies_title="Movies with " + (", ".join(descriptions) or "any attributes") + " - ("
+                     + str(min(cursor + movies_per_page, num_of_movies_found)) + " of " + str(num_of_movies_found)
+                     + " results)",
+        movies=movies,
+        form=SearchForm(),
+        handler_url=url_for('movies_bp.search'),
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_page_url=first_page_url,
+        last_page_url=last_page_url,
+        previous_page_url=previous_page_url,
+        next_page_url=next_page_url,
+        show_reviews_for_movie=movie_to_show_reviews,
+        title_form=SearchByTitleForm(),
+        handler_url_title=url_for('movies_bp.search_by_title'),
+    )
+
+
+@movies_blueprint.route('/top_movies', methods=['GET'])
+def top_movies():
+    movies_per_page = 10
+
+    # Read query parameters. Movies are ranked by the attribute named by 'by', optionally within a min/max range.
+    attribute = request.args.get('by', 'rating')
+    low = request.args.get('min', type=float)
+    high = request.args.get('max', type=float)
+    cursor = request.args.get('cursor', 0, type=int)
+    movie_to_show_reviews = request.args.get('view_reviews_for', -1, type=int)
+    bounds = {name: value for name, value in (('min', low), ('max', high)) if value is not None}
+
+    # Retrieve the ids of the batch of movies to display on the Web page, and the number of ranked movies.
+    try:
+        if len(bounds) == 0:
+            movie_ids, num_of_movies_found = services.get_top_movie_ids(attribute, movies_per_page, cursor,
+                                                                        repo.repo_instance)
+        else:
+            movie_ids = services.get_movie_ids_by_range(attribute, low, high, repo.repo_instance)
+            num_of_movies_found = len(movie_ids)
+            movie_ids = movie_ids[cursor:cursor + movies_per_page]
+    except NonExistentException:
+        abort(404)
+    movies = services.get_movies_by_id(movie_ids, repo.repo_instance)
+
+    first_page_url = None
+    last_page_url = None
+    previous_page_url = None
+    next_page_url = None
+
+    if cursor > 0:
+        # There are preceding movies, so generate URLs for the 'previous' and 'first' navigation buttons.
+        previous_page_url = url_for('movies_bp.top_movies', by=attribute, cursor=cursor - movies_per_page, **bounds)
+        last_page_url = url_for('movies_bp.top_movies', by=attribute, **bounds)
+
+    if cursor + movies_per_page < num_of_movies_found:
+        # There are further movies, so generate URLs for the 'next' and last navigation buttons.
+        next_page_url = url_for('movies_bp.top_movies', by=attribute, cursor=cursor + movies_per_page, **bounds)
+
+        last_cursor = movies_per_page * int(num_of_movies_found / movies_per_page)
+        if num_of_movies_found % movies_per_page == 0:
+            last_cursor -= movies_per_page
+
+        first_page_url = url_for('movies_bp.top_movies', by=attribute, cursor=last_cursor, **bounds)
+
+    # Construct urls for viewing movie reviews and adding reviews
+    for movie in movies:
+        movie['view_review_url'] = url_for('movies_bp.top_movies', by=attribute, cursor=cursor,
+                                           view_reviews_for=movie['id'], **bounds)
+        movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
+
+    show_all_reviews(movies, movie_to_show_reviews)
+
+    # Generate the webpage to display the movies
+    return render_template(
+        'movies/movies.html',
+        title='Movies',
+        movies_title="Top Movies by " + attribute + " - (" + str(min(cursor + movies_per_page, num_of_movies_found))
+                     + " of " + str(num_of_movies_found) + " results)",
         movies=movies,
         form=SearchForm(),
         handler_url=url_for('movies_bp.search'),
@@ -219,6 +392,7 @@ def review_movie():
     # For a GET or an unsuccessful POST, retrieve the movie to review in dict form, and return a Web page that allows
     # the user to enter a review. The generated Web page include a form object.
     movie = services.get_movie(movie_id, repo.repo_instance)
+    show_all_reviews([movie], movie_id)
 
     return render_template(
         'movies/review_movie.html',
@@ -250,6 +424,7 @@ def search_movies_by_actor_or_director():
         movie_reviews = int(movie_reviews)
 
     title_message = "No results found"
+    suggestions = dict()
     if target_actor is None:
         target_actor = ""
     if target_director is None:
@@ -259,14 +434,18 @@ def search_movies_by_actor_or_director():
         try:
             movies = services.search_movie_by_actor_fullname(actor_fullname=target_actor, repo=repo.repo_instance)
         except NonExistentException:
-            pass
+            # Offer the closest actor names in case the name was misspelled.
+            for name in services.get_similar_actor_names(target_actor, repo.repo_instance):
+                suggestions[name] = url_for('movies_bp.search_movies_by_actor_or_director', actor=name, director='')
     elif len(target_director) != 0 and len(target_actor) == 0:
         title_message = "Movies directed by " + target_director
         try:
             movies = services.search_movie_directed_by_director_fullname(director_fullname=target_director,
                                                                          repo=repo.repo_instance)
         except NonExistentException:
-            pass
+            # Offer the closest director names in case the name was misspelled.
+            for name in services.get_similar_director_names(target_director, repo.repo_instance):
+                suggestions[name] = url_for('movies_bp.search_movies_by_actor_or_director', actor='', director=name)
     first_page_url = None
     last_page_url = None
     previous_page_url = None
@@ -278,6 +457,8 @@ def search_movies_by_actor_or_director():
                                            view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
 
+    show_all_reviews(movies, movie_reviews)
+
     return render_template(
         'movies/movies.html',
         title='Movies',
@@ -292,6 +473,7 @@ def search_movies_by_actor_or_director():
         previous_page_url=previous_page_url,
         next_page_url=next_page_url,
         show_reviews_for_movie=movie_reviews,
+        suggestion_urls=suggestions,
         title_form=SearchForm(),
         handler_url_title=url_for('movies_bp.search_by_title'),
     )
@@ -352,6 +534,8 @@ def search_movies_by_title():
                                            view_reviews_for=movie['id'])
         movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
 
+    show_all_reviews(movies, movie_reviews)
+
     return render_template(
         'movies/movies.html',
         title='Movies',
@@ -371,6 +555,70 @@ def search_movies_by_title():
     )
 
 
+@movies_blueprint.route('/search_movies_by_description', methods=['GET'])
+def search_movies_by_description():
+    query = request.args.get('query')
+    movie_reviews = request.args.get('view_reviews_for')
+    movies = list()
+
+    if movie_reviews is None:
+        # No view-reviews query parameter, so set to a non-existent movie id.
+        movie_reviews = -1
+    else:
+        # Convert movie_reviews from string to int
+        movie_reviews = int(movie_reviews)
+
+    if query is None:
+        query = ""
+
+    try:
+        movies = services.search_movies_by_text(query=query, repo=repo.repo_instance)
+    except NonExistentException:
+        pass
+
+    for movie in movies:
+        movie['view_review_url'] = url_for('movies_bp.search_movies_by_description', query=query,
+                                           view_reviews_for=movie['id'])
+        movie['add_review_url'] = url_for('movies_bp.review_movie', movie=movie['id'])
+
+    show_all_reviews(movies, movie_reviews)
+
+    return render_template(
+        'movies/movies.html',
+        title='Movies',
+        movies_title="Best matches for " + query + " - (" + str(len(movies)) + " results)",
+        movies=movies,
+        form=SearchForm(),
+        handler_url=url_for('movies_bp.search'),
+        selected_movies=utilities.get_selected_movies(len(movies) * 2),
+        genre_urls=utilities.get_genres_and_urls(),
+        first_page_url=None,
+        last_page_url=None,
+        previous_page_url=None,
+        next_page_url=None,
+        show_reviews_for_movie=movie_reviews,
+        title_form=SearchByTitleForm(),
+        handler_url_title=url_for('movies_bp.search_by_title')
+    )
+
+
+@movies_blueprint.route('/autocomplete', methods=['GET'])
+def autocomplete():
+    # Read query parameters
+    prefix = request.args.get('q', '')
+    kind = request.args.get('kind', 'title')
+    limit = max(1, min(request.args.get('limit', 10, type=int), 50))
+
+    # Rank completions for no longer than the configured budget, so that suggestions keep up with typing.
+    time_budget = current_app.config['AUTOCOMPLETE_TIME_BUDGET_MS'] / 1000
+    try:
+        completions = services.autocomplete(prefix, kind, repo.repo_instance, limit, time_budget)
+    except NonExistentException:
+        abort(400)
+
+    return jsonify(query=prefix, kind=kind, completions=completions)
+
+
 @movies_blueprint.route('/search_by_title', methods=['GET', 'POST'])
 def search_by_title():
     title_form = SearchByTitleForm()
@@ -438,6 +686,14 @@ def suggest_movie():
     )
 
 
+def show_all_reviews(movies, movie_id: int):
+    # Movies only list their latest reviews when reviews are kept in a review store, so the reviews of the movie whose
+    # reviews are shown are fetched from the repository.
+    for movie in movies:
+        if movie['id'] == movie_id:
+            movie['reviews'] = services.get_reviews_for_movie(movie_id, repo.repo_instance)
+
+
 class ProfanityFree:
     def __init__(self, message=None):
         if not message:
@@ -1,7 +1,21 @@
 import random
 from typing import List, Iterable
-from movie_web_app.adapters.repository import AbstractRepository
-from movie_web_app.domainmodel.model import Movie, Review, Genre, make_review, Actor, Director
+from movie_web_app.adapters.repository import AbstractRepository, RANKED_ATTRIBUTES
+from movie_web_app.domainmodel.model import Movie, Review, Genre, Actor, Director
+
+
+# Names of the ranges accepted by faceted search, and the movie attributes they filter.
+FACETS = {
+    'year': 'release_year',
+    'runtime': 'runtime_minutes',
+    'rating': 'rating',
+    'votes': 'votes',
+    'revenue': 'revenue',
+    'metascore': 'metascore',
+}
+
+# Kinds of names that can be autocompleted.
+AUTOCOMPLETE_KINDS = ('title', 'actor', 'director')
 
 
 class NonExistentException(Exception):
@@ -14,20 +28,16 @@ class UnknownUserException(Exception):
 
 def add_review(review_text: str, username: str, movie_id: int, rating: int, repo: AbstractRepository):
     # Check that the movie exists.
-    movie = repo.get_movie_by_id(movie_id)
-    if movie is None:
+    if repo.get_movie_by_id(movie_id) is None:
         raise NonExistentException
 
     # Check that the user exists
-    user = repo.get_user(username)
-    if user is None:
+    if repo.get_user(username) is None:
         raise UnknownUserException
 
-    # Create review
-    review = make_review(review_text=review_text, user=user, movie=movie, rating=rating)
-
-    # Update the repository
-    repo.add_review(review)
+    # Create the review and add it to the repository as one change, which fails if the movie was removed meanwhile.
+    if repo.add_review_for(movie_id, username, review_text, rating) is None:
+        raise NonExistentException
 
 
 def get_movie(movie_id: int, repo: AbstractRepository):
@@ -70,6 +80,41 @@ def get_movie_ids_for_genre(genre_name: str, repo: AbstractRepository):
     return movie_ids
 
 
+def get_movie_ids_for_genres(genre_names, excluded_genre_names, repo: AbstractRepository):
+    movie_ids = repo.get_movies_by_genres(genre_names, excluded_genre_names)
+
+    return movie_ids
+
+
+def get_movie_ids_for_facets(ranges: dict, repo: AbstractRepository):
+    # Translate facet names into the movie attributes they filter.
+    facets = {FACETS[name]: bounds for name, bounds in ranges.items()}
+    movie_ids = repo.get_movies_by_facets(facets)
+
+    return movie_ids
+
+
+def get_top_movie_ids(attribute: str, limit: int, offset: int, repo: AbstractRepository):
+    if attribute not in RANKED_ATTRIBUTES:
+        raise NonExistentException
+
+    movie_ids = repo.get_top_movie_ids(attribute, limit, offset)
+    number_of_ranked_movies = repo.get_number_of_ranked_movies(attribute)
+
+    return movie_ids, number_of_ranked_movies
+
+
+def get_movie_ids_by_range(attribute: str, low, high, repo: AbstractRepository):
+    if attribute not in RANKED_ATTRIBUTES:
+        raise NonExistentException
+
+    # Rank the movies within the range from the highest value down.
+    movie_ids = repo.get_movie_ids_by_range(attribute, low, high)
+    movie_ids.reverse()
+
+    return movie_ids
+
+
 def get_movies_by_id(id_list, repo: AbstractRepository):
     movies = repo.get_movies_by_id(id_list)
 
@@ -85,7 +130,7 @@ def get_reviews_for_movie(movie_id, repo: AbstractRepository):
     if movie is None:
         raise NonExistentException
 
-    return reviews_to_dict(movie.reviews)
+    return reviews_to_dict(repo.get_reviews_for_movie(movie_id))
 
 
 def search_movie_by_actor_fullname(actor_fullname: str, repo: AbstractRepository):
@@ -106,6 +151,14 @@ def search_movie_directed_by_director_fullname(director_fullname: str, repo: Abs
     return movies_as_dict
 
 
+def get_similar_actor_names(actor_fullname: str, repo: AbstractRepository):
+    return repo.get_similar_actor_names(actor_fullname)
+
+
+def get_similar_director_names(director_fullname: str, repo: AbstractRepository):
+    return repo.get_similar_director_names(director_fullname)
+
+
 def search_movie_by_actor_and_director(actor_fullname: str, director_fullname: str, repo: AbstractRepository):
     movies = repo.search_movies_by_actor_and_director(actor_fullname=actor_fullname,
                                                       director_fullname=director_fullname)
@@ -125,6 +178,22 @@ def search_movie_by_title(title:str, repo:AbstractRepository):
     return movies_as_dict
 
 
+def autocomplete(prefix: str, kind: str, repo: AbstractRepository, limit: int = 10, time_budget: float = None):
+    if kind not in AUTOCOMPLETE_KINDS:
+        raise NonExistentException
+
+    return repo.autocomplete(prefix, kind, limit, time_budget)
+
+
+def search_movies_by_text(query: str, repo: AbstractRepository, limit: int = 20):
+    movies = repo.search_movies_by_text(query, limit)
+    if len(movies) == 0:
+        raise NonExistentException
+
+    movies_as_dict = movies_to_dict(movies)
+    return movies_as_dict
+
+
 def get_random_movies(repo:AbstractRepository):
     movie_count = repo.get_number_of_movies()
     quantity = 5
@@ -160,6 +229,7 @@ def movie_to_dict(movie: Movie):
         'genres': genres_to_dict(movie.genres),
         'runtime_minutes': movie.runtime_minutes,
         'reviews': reviews_to_dict(movie.reviews),
+        'review_count': movie.review_count,
         'ratings': movie.rating,
         'revenue': movie.revenue
     }
@@ -0,0 +1,43 @@
+from flask import Blueprint, current_app, jsonify, request
+
+import movie_web_app.adapters.repository as repo
+from movie_web_app.adapters.caching_repository import CachingRepository
+
+# Configure Blueprint
+readiness_blueprint = Blueprint(
+    'readiness_bp', __name__)
+
+# Endpoints that are served while the repository is still loading.
+ALWAYS_AVAILABLE_ENDPOINTS = ('readiness_bp.ready', 'static')
+
+
+@readiness_blueprint.route('/ready', methods=['GET'])
+def ready():
+    progress = current_app.extensions['load_progress']
+    status = progress.as_dict()
+    # The hit rates of a repository cache are reported along with the loading progress.
+    if isinstance(repo.repo_instance, CachingRepository):
+        status['cache'] = repo.repo_instance.stats()
+    response = jsonify(status)
+    if not progress.ready:
+        response.status_code = 503
+        if not progress.done:
+            response.headers['Retry-After'] = str(current_app.config['LAZY_POPULATE_RETRY_AFTER_SECONDS'])
+    return response
+
+
+@readiness_blueprint.before_app_request
+def wait_until_ready():
+    """
+    Holds back requests that need the repository while it is loading in the background, for at most
+    LAZY_POPULATE_WAIT_SECONDS, then answers them with a 503 telling the client when to retry.
+    """
+    progress = current_app.extensions['load_progress']
+    if progress.ready or request.endpoint in ALWAYS_AVAILABLE_ENDPOINTS:
+        return None
+    if progress.wait(current_app.config['LAZY_POPULATE_WAIT_SECONDS']) and progress.ready:
+        return None
+    if progress.done:
+        return 'The movie catalog failed to load.', 503
+    retry_after = str(current_app.config['LAZY_POPULATE_RETRY_AFTER_SECONDS'])
+    return 'The movie catalog is still loading, please retry shortly.', 503, {'Retry-After': retry_after}
@@ -0,0 +1,33 @@
+// Fills the datalist of every search field that has a data-kind attribute with completions from the autocomplete
+// endpoint as the user types.
+(function () {
+    const autocompleteUrl = document.currentScript.dataset.autocompleteUrl;
+
+    document.querySelectorAll('input[data-kind]').forEach(function (field) {
+        const datalist = document.getElementById(field.getAttribute('list'));
+        let pending = null;
+
+        field.addEventListener('input', function () {
+            if (pending !== null) {
+                pending.abort();
+            }
+            if (field.value.trim().length === 0) {
+                datalist.replaceChildren();
+                return;
+            }
+
+            pending = new AbortController();
+            const query = new URLSearchParams({q: field.value, kind: field.dataset.kind});
+            fetch(autocompleteUrl + '?' + query, {signal: pending.signal})
+                .then(response => response.json())
+                .then(function (result) {
+                    datalist.replaceChildren(...result.completions.map(function (completion) {
+                        const option = document.createElement('option');
+                        option.value = completion;
+                        return option;
+                    }));
+                })
+                .catch(() => {});
+        });
+    });
+})();
@@ -0,0 +1,132 @@
+"""
+Production entry point serving the application from several worker processes that share a single repository.
+
+The application, and with it the repository, is created once in this master process, which then forks
+PREFORK_WORKERS workers accepting requests from one listening socket. Forked workers share the memory of the master
+until they write to it, so the catalog is held once rather than once per worker. The garbage collector is paused while
+loading and the loaded objects are frozen before forking: a collection in a worker would otherwise write to every
+object it traverses and copy the whole repository into that worker.
+
+With a 'memory' repository, the workers share the users and reviews added through each of them through the journal at
+JOURNAL_PATH, which is therefore required. Each worker appends its changes to the journal and applies those of the
+others before every request and every change of its own, so that all of them apply every change in the order of the
+journal. The movies loaded by the master are only read, besides the ratings folded in by reviews. A review store
+isn't supported, as its file would be shared by the workers and the reviews appended to it by one worker would be
+unknown to the others. Reloading isn't available, as the reloading thread isn't carried over into the workers.
+
+Requires a platform with fork, such as Linux:
+
+    $ python prefork.py
+"""
+import gc
+import os
+import signal
+import socket
+
+from werkzeug.serving import make_server
+
+import movie_web_app.adapters.repository as repo
+from config import Config
+from movie_web_app import create_app
+from movie_web_app.adapters.caching_repository import CachingRepository
+from movie_web_app.adapters.journal import Journal
+from movie_web_app.adapters.memory_repository import MemoryRepository
+from movie_web_app.adapters.sqlite_repository import SqliteRepository
+
+HOST = 'localhost'
+PORT = 5000
+
+
+def configuration_error(config) -> str:
+    """ Returns why the application can't be served by forked workers with config, or None if it can. """
+    if config.REPOSITORY != 'memory':
+        return None
+    if not config.JOURNAL_PATH:
+        return ('prefork.py needs JOURNAL_PATH with a memory repository, through which the workers share the users '
+                'and reviews added through each of them.')
+    if config.REVIEW_STORE_PATH:
+        return ('prefork.py can\'t serve a memory repository with REVIEW_STORE_PATH, as the workers would share its '
+                'file without knowing of the reviews the others append to it.')
+    return None
+
+
+def repository_of() -> repo.AbstractRepository:
+    repository = repo.repo_instance
+    if isinstance(repository, CachingRepository):
+        repository = repository.repository
+    return repository
+
+
+def prepare_for_fork(app):
+    """ Readies the application created by the master to be shared by the workers forked from it. """
+    # With LAZY_POPULATE the repository is loaded by a thread, which forked workers wouldn't carry over.
+    app.extensions['load_progress'].wait()
+    repository = repository_of()
+    if isinstance(repository, SqliteRepository):
+        # A SQLite connection must not be used on both sides of a fork, so each worker opens its own.
+        repository.close()
+    gc.freeze()
+
+
+def start_worker(app):
+    """ Readies the application in a newly forked worker. """
+    gc.enable()
+    repository = repository_of()
+    if isinstance(repository, MemoryRepository):
+        # The worker follows the journal from where the master left it, applying the changes made through the
+        # workers forked before it as well.
+        journal = Journal(app.config['JOURNAL_PATH'], repository.journal_position,
+                          app.config['JOURNAL_COMMIT_DELAY_MS'] / 1000, shared=True)
+        repository.attach_journal(journal)
+        app.before_request(journal.catch_up)
+
+
+def serve(app, listener: socket.socket):
+    # Each worker serves on several threads when the repository is safe to share between them, as in wsgi.py.
+    threaded = app.config['THREAD_SAFE_REPOSITORY'] or app.config['REPOSITORY'] == 'sqlite'
+    make_server(HOST, PORT, app, threaded=threaded, fd=listener.fileno()).serve_forever()
+
+
+def fork_worker(app, listener: socket.socket) -> int:
+    pid = os.fork()
+    if pid == 0:
+        signal.signal(signal.SIGTERM, signal.SIG_DFL)
+        signal.signal(signal.SIGINT, signal.SIG_DFL)
+        try:
+            start_worker(app)
+            serve(app, listener)
+        finally:
+            os._exit(0)
+    return pid
+
+
+def main():
+    error = configuration_error(Config)
+    if error is not None:
+        raise SystemExit(error)
+    gc.disable()
+    app = create_app()
+    prepare_for_fork(app)
+
+    listener = socket.create_server((HOST, PORT))
+    workers = {fork_worker(app, listener) for worker_number in range(app.config['PREFORK_WORKERS'])}
+    app.logger.info('Serving on http://%s:%d with %d workers', HOST, PORT, len(workers))
+
+    def stop(signal_number, frame):
+        for pid in workers:
+            os.kill(pid, signal.SIGTERM)
+        raise SystemExit(0)
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    while True:
+        # A worker that dies is replaced, the replacement sharing the repository as loaded by the master and catching
+        # up with the journal from there.
+        pid, status = os.wait()
+        workers.discard(pid)
+        app.logger.warning('Worker %d exited with status %d, forking another', pid, status)
+        workers.add(fork_worker(app, listener))
+
+
+if __name__ == '__main__':
+    main()
@@ -4,5 +4,7 @@ from movie_web_app import create_app
 app = create_app()
 
 if __name__ == "__main__":
-    app.run(host='localhost', port=5000, threaded=False)
+    # Requests are only served on several threads when the repository is safe to share between them.
+    app.run(host='localhost', port=5000,
+            threaded=app.config['THREAD_SAFE_REPOSITORY'] or app.config['REPOSITORY'] == 'sqlite')
 